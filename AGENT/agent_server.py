@@ -0,0 +1,298 @@
+"""HTTP and WebSocket front end for DynamicAgentSystemV2
+
+One agent system (and so one set of LLM/API clients and caches) serves every
+session. Requests run as tasks on the server's event loop; an admission
+controller caps how many run at once and rejects the rest immediately with 503
+instead of queueing them. Over HTTP, choices the request does not settle are
+made by a selection policy; over WebSocket they are sent to the client as
+prompts and its replies are awaited, without holding a slot while the client
+thinks (a session has at most one request, so waiting is bounded by sessions).
+"""
+import time
+import uuid
+import asyncio
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Optional
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+from starlette.websockets import WebSocketState
+from agents.selectors import CallbackSelector, OptionSelector, SELECTION_POLICIES, create_selector
+from services.metrics_service import metrics
+
+
+class AgentRequest(BaseModel):
+    request: str
+    policy: Optional[str] = None
+
+
+class Overloaded(Exception):
+    """Raised when a request cannot be admitted right now"""
+
+
+class SessionBusy(Overloaded):
+    """Raised when the session is still processing its previous request"""
+
+
+class AdmissionController:
+    """Counts running requests and refuses new ones past max_concurrent (fail fast, no queue)"""
+    
+    def __init__(self, max_concurrent: int):
+        self.max_concurrent = max_concurrent
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+    
+    def acquire(self) -> None:
+        if self.active >= self.max_concurrent:
+            self.rejected += 1
+            raise Overloaded(f"Server busy: {self.active} requests running")
+        self.active += 1
+        self.admitted += 1
+    
+    def release(self) -> None:
+        self.active -= 1
+    
+    @contextmanager
+    def waiting_for_client(self):
+        """Free an admitted request's slot while it waits on its client
+        
+        It takes the slot back even past max_concurrent: refusing it after the
+        client answered would throw the request away.
+        """
+        self.active -= 1
+        self.waiting += 1
+        try:
+            yield
+        finally:
+            self.waiting -= 1
+            self.active += 1
+    
+    def stats(self) -> Dict[str, int]:
+        return {"active": self.active, "waiting": self.waiting, "max_concurrent": self.max_concurrent,
+                "admitted": self.admitted, "rejected": self.rejected}
+
+
+class Session:
+    """Per-client state: recent results and a lock that allows one request at a time"""
+    
+    def __init__(self, history_size: int = 20):
+        self.id = uuid.uuid4().hex
+        self.created_at = time.time()
+        self.last_active = self.created_at
+        self.sockets = 0
+        self.requests = 0
+        self.history: Deque[Dict[str, Any]] = deque(maxlen=history_size)
+        self.lock = asyncio.Lock()
+    
+    def touch(self) -> None:
+        self.last_active = time.time()
+    
+    def record(self, request: str, result: Dict[str, Any]) -> None:
+        self.requests += 1
+        self.touch()
+        self.history.append({"request": request, "workflow": result.get("workflow"),
+                             "success": result.get("success"), "params": result.get("params")})
+    
+    def summary(self) -> Dict[str, Any]:
+        return {"session_id": self.id, "created_at": self.created_at, "last_active": self.last_active,
+                "requests": self.requests, "history": list(self.history)}
+
+
+class SessionStore:
+    """Sessions by id; idle ones expire after ttl seconds and at most max_sessions are kept
+    
+    A session with a WebSocket attached or a request running never expires.
+    """
+    
+    def __init__(self, max_sessions: int = 1000, ttl: float = 1800,
+                 on_remove: Optional[Callable[[str], None]] = None):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.on_remove = on_remove
+        self._sessions: Dict[str, Session] = {}
+    
+    def _expire(self) -> None:
+        cutoff = time.time() - self.ttl
+        for session_id in [s.id for s in self._sessions.values()
+                           if s.last_active < cutoff and not s.sockets and not s.lock.locked()]:
+            self.delete(session_id)
+    
+    def create(self) -> Session:
+        self._expire()
+        if len(self._sessions) >= self.max_sessions:
+            raise Overloaded(f"Session limit reached ({self.max_sessions})")
+        session = Session()
+        self._sessions[session.id] = session
+        return session
+    
+    def get(self, session_id: str) -> Optional[Session]:
+        self._expire()
+        session = self._sessions.get(session_id)
+        if session:
+            session.touch()
+        return session
+    
+    def delete(self, session_id: str) -> bool:
+        if self._sessions.pop(session_id, None) is None:
+            return False
+        if self.on_remove:
+            self.on_remove(session_id)
+        return True
+    
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+class AgentServer:
+    """Runs session requests on a shared DynamicAgentSystemV2 under admission control"""
+    
+    def __init__(self, system, max_concurrent: int = 32, max_sessions: int = 1000, session_ttl: float = 1800,
+                 policy: str = "llm", prompt_timeout: float = 300):
+        self.system = system
+        self.admission = AdmissionController(max_concurrent)
+        # Each session is a conversation thread; its memory and checkpoints go when the session does
+        self.sessions = SessionStore(max_sessions, session_ttl, on_remove=system.forget_thread)
+        self.policy = policy
+        self.prompt_timeout = prompt_timeout
+        # Reject an unknown default policy at startup rather than on the first request
+        create_selector(policy, system.llm_service)
+    
+    async def run(self, session: Session, request: str, selector: OptionSelector) -> Dict[str, Any]:
+        """Process one request for a session (raises Overloaded when it cannot start now)"""
+        if session.lock.locked():
+            raise SessionBusy("Session is already processing a request")
+        self.admission.acquire()
+        try:
+            async with session.lock:
+                result = await self.system.arun_request(request, selector, thread_id=session.id)
+        finally:
+            self.admission.release()
+        session.record(request, result)
+        return result
+    
+    def selector_for(self, policy: Optional[str]) -> OptionSelector:
+        policy = policy or self.policy
+        if policy not in SELECTION_POLICIES:
+            raise HTTPException(status_code=400, detail=f"Unknown policy: {policy}")
+        return create_selector(policy, self.system.llm_service)
+
+
+def create_app(server: AgentServer) -> FastAPI:
+    app = FastAPI(
+        title="Dynamic Agent Server",
+        description="Run agent requests over HTTP (policy-driven choices) or WebSocket (interactive choices)",
+        version="1.0.0"
+    )
+    
+    def get_session(session_id: str) -> Session:
+        session = server.sessions.get(session_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail="Session not found or expired")
+        return session
+    
+    def busy(e: Overloaded) -> HTTPException:
+        return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    
+    admission = server.admission
+    metrics.register_collector("agent_server_sessions", "Open sessions", (), lambda: {(): len(server.sessions)})
+    metrics.register_collector("agent_server_requests_active", "Requests running now", (),
+                               lambda: {(): admission.active})
+    metrics.register_collector("agent_server_requests_waiting", "Requests waiting on a client reply", (),
+                               lambda: {(): admission.waiting})
+    metrics.register_collector("agent_server_requests_admitted_total", "Requests admitted since start", (),
+                               lambda: {(): admission.admitted}, type="counter")
+    metrics.register_collector("agent_server_requests_rejected_total", "Requests rejected as overloaded", (),
+                               lambda: {(): admission.rejected}, type="counter")
+    
+    @app.get("/health")
+    async def health():
+        return {"status": "ok", "sessions": len(server.sessions), **server.admission.stats()}
+    
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def prometheus_metrics():
+        """Every metric in the Prometheus text format"""
+        return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+    
+    @app.get("/metrics/summary")
+    async def metrics_summary():
+        """Every metric as JSON, with estimated latency percentiles"""
+        return metrics.summary()
+    
+    @app.post("/sessions", status_code=201)
+    async def create_session():
+        try:
+            return server.sessions.create().summary()
+        except Overloaded as e:
+            raise busy(e)
+    
+    @app.get("/sessions/{session_id}")
+    async def get_session_info(session_id: str):
+        return get_session(session_id).summary()
+    
+    @app.delete("/sessions/{session_id}", status_code=204)
+    async def delete_session(session_id: str):
+        if not server.sessions.delete(session_id):
+            raise HTTPException(status_code=404, detail="Session not found or expired")
+    
+    @app.post("/sessions/{session_id}/requests")
+    async def process_request(session_id: str, body: AgentRequest):
+        """Run a request; ambiguous choices are made by the policy (server default unless given)"""
+        session = get_session(session_id)
+        selector = server.selector_for(body.policy)
+        try:
+            result = await server.run(session, body.request, selector)
+        except SessionBusy as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        except Overloaded as e:
+            raise busy(e)
+        return {"session_id": session.id, **result}
+    
+    @app.websocket("/sessions/{session_id}/ws")
+    async def session_socket(websocket: WebSocket, session_id: str):
+        """Interactive session: {"type": "request"} in, select/provide prompts out, {"type": "result"} back
+
+        Prompts are answered with {"type": "choice", "value": ...} (or "more": true) and
+        {"type": "value", "value": ...}.
+        """
+        await websocket.accept()
+        session = server.sessions.get(session_id)
+        if session is None:
+            await websocket.close(code=4404, reason="Session not found or expired")
+            return
+        
+        async def ask(prompt: Dict[str, Any]) -> Dict[str, Any]:
+            await websocket.send_json(prompt)
+            with server.admission.waiting_for_client():
+                reply = await websocket.receive_json()
+            session.touch()
+            return reply
+        
+        selector = CallbackSelector(ask, timeout=server.prompt_timeout)
+        # An attached session is kept however long the client stays idle
+        session.sockets += 1
+        try:
+            while True:
+                message = await websocket.receive_json()
+                session.touch()
+                if message.get("type") != "request" or not isinstance(message.get("request"), str):
+                    await websocket.send_json({"type": "error", "error": "Expected {\"type\": \"request\", \"request\": \"...\"}"})
+                    continue
+                try:
+                    result = await server.run(session, message["request"], selector)
+                except Overloaded as e:
+                    await websocket.send_json({"type": "error", "error": str(e), "retry_after": 1})
+                    continue
+                if websocket.client_state != WebSocketState.CONNECTED:
+                    # The client left while answering a prompt
+                    return
+                await websocket.send_json({"type": "result", **result})
+        except WebSocketDisconnect:
+            pass
+        finally:
+            session.sockets -= 1
+            session.touch()
+    
+    return app
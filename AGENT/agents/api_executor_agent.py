@@ -1,25 +1,28 @@
-from typing import Dict, Any
-from services.api_service import APIService
+from typing import Dict, Any, Union
+from services.api_service import APIService, AsyncAPIService
 from services.tracing_service import tracing_service
+from utils.async_utils import run_sync, acall
+from utils.url_template import URLTemplate
 
 class APIExecutorAgent:
     """Agent responsible for executing API calls based on collected parameters"""
     
-    def __init__(self, api_service: APIService):
+    def __init__(self, api_service: Union[APIService, AsyncAPIService]):
         self.api_service = api_service
     
-    @tracing_service.trace_function("execute_api")
     def execute(self, config: Dict[str, Any], parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute the API call with collected parameters (sync wrapper around aexecute)"""
+        return run_sync(self.aexecute(config, parameters))
+    
+    @tracing_service.trace_function("execute_api")
+    async def aexecute(self, config: Dict[str, Any], parameters: Dict[str, Any]) -> Dict[str, Any]:
         """Execute the API call with collected parameters"""
         method = config.get("method", "GET").upper()
-        endpoint = config.get("endpoint", "")
         
-        # Replace path parameters
-        for key, value in parameters.items():
-            endpoint = endpoint.replace(f"{{{key}}}", str(value))
-        
-        # Separate query and body parameters
-        query_params = {}
+        # Fill (and percent-encode) path parameters; literal query items in the endpoint are kept
+        template = config.get("endpoint", "")
+        endpoint, query_params = URLTemplate.compile(template).build(parameters)
+        query_params = query_params or {}
         body_params = {}
         
         param_configs = config.get("parameters", {})
@@ -41,21 +44,25 @@ class APIExecutorAgent:
             print(f"📦 Body params: {body_params}")
             
             if method == "GET":
-                result = self.api_service.get(endpoint, params=query_params if query_params else None)
+                result = await acall(self.api_service.get, endpoint, params=query_params if query_params else None,
+                                     template=template)
             elif method == "POST":
-                result = self.api_service.post(endpoint, json=body_params if body_params else parameters)
+                result = await acall(self.api_service.post, endpoint, json=body_params if body_params else parameters,
+                                     template=template)
             elif method == "PUT":
-                result = self.api_service.put(endpoint, json=body_params if body_params else parameters)
+                result = await acall(self.api_service.put, endpoint, json=body_params if body_params else parameters,
+                                     template=template)
             elif method == "PATCH":
-                result = self.api_service.patch(endpoint, json=body_params if body_params else parameters)
+                result = await acall(self.api_service.patch, endpoint, json=body_params if body_params else parameters,
+                                     template=template)
             elif method == "DELETE":
-                result = self.api_service.delete(endpoint)
+                result = await acall(self.api_service.delete, endpoint, template=template)
             else:
                 raise ValueError(f"Unsupported HTTP method: {method}")
             
             print(f"✅ API call successful")
             return result
-            
+        
         except Exception as e:
             print(f"❌ API call failed: {str(e)}")
             return {
@@ -1,14 +1,23 @@
-from typing import Dict, Any, Optional, TypedDict, Literal
+from typing import Dict, Any, List, Optional, Tuple, TypedDict, Literal
 from langgraph.graph import StateGraph, END
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langchain_core.runnables import RunnableConfig
 from services.llm_service import LLMService
 from services.tracing_service import tracing_service
+from utils.async_utils import run_sync, dual_node
+from utils.workflow_index import WorkflowIndex
+from utils.response_renderer import ResponseRenderer
+from utils.tool_schema import workflow_tools, tool_name, free_text_parameters, clean_arguments
 
 
 class SupervisorState(TypedDict):
     """State for supervisor agent"""
     user_input: str
     available_workflows: Dict[str, Dict[str, Any]]
+    candidates: Dict[str, Dict[str, Any]]
     selected_workflow: Optional[str]
+    previous_workflow: Optional[str]
+    follow_up: bool
     confidence: float
     reasoning: str
 
@@ -16,20 +25,48 @@ class SupervisorState(TypedDict):
 class LangGraphSupervisorAgent:
     """Supervisor agent using LangGraph for intelligent routing"""
     
-    def __init__(self, llm_service: LLMService, available_workflows: Dict[str, Dict[str, Any]]):
+    def __init__(self, llm_service: LLMService, available_workflows: Dict[str, Dict[str, Any]],
+                 top_k: int = 5, route_ratio: float = 1.15, min_route_score: float = 1.0,
+                 solo_route_score: float = 2.5, checkpointer: Optional[BaseCheckpointSaver] = None):
         self.llm_service = llm_service
         self.available_workflows = available_workflows
-        self.graph = self._build_graph()
+        self.top_k = top_k
+        self.route_ratio = route_ratio
+        self.min_route_score = min_route_score
+        # A lone hit has no runner-up to beat, so it must score this much on its own
+        self.solo_route_score = solo_route_score
+        self.index = WorkflowIndex(available_workflows)
+        builder = self._build_graph()
+        self.graph = builder.compile()
+        # Routing with a thread_id is checkpointed so follow-ups can stay on the thread's workflow
+        self.checkpointer = checkpointer
+        self.session_graph = builder.compile(checkpointer=checkpointer) if checkpointer else None
+    
+    def update_workflows(self, available_workflows: Dict[str, Dict[str, Any]]) -> None:
+        """Swap in a new workflow set (e.g. after a hot reload); requests in flight keep the old one"""
+        index = WorkflowIndex(available_workflows)
+        self.index, self.available_workflows = index, available_workflows
     
     def _build_graph(self) -> StateGraph:
         """Build supervisor routing graph"""
         workflow = StateGraph(SupervisorState)
         
-        workflow.add_node("analyze_intent", self._analyze_intent_node)
-        workflow.add_node("match_workflow", self._match_workflow_node)
+        workflow.add_node("retrieve_candidates", self._retrieve_candidates_node)
+        workflow.add_node("analyze_intent", dual_node(self._analyze_intent_node))
+        workflow.add_node("match_workflow", dual_node(self._match_workflow_node))
         workflow.add_node("validate_match", self._validate_match_node)
         
-        workflow.set_entry_point("analyze_intent")
+        workflow.set_entry_point("retrieve_candidates")
+        
+        workflow.add_conditional_edges(
+            "retrieve_candidates",
+            self._check_lexical_match,
+            {
+                "routed": "validate_match",
+                "ambiguous": "analyze_intent"
+            }
+        )
+        
         workflow.add_edge("analyze_intent", "match_workflow")
         
         workflow.add_conditional_edges(
@@ -43,10 +80,51 @@ class LangGraphSupervisorAgent:
         
         workflow.add_edge("validate_match", END)
         
-        return workflow.compile()
+        return workflow
+    
+    @tracing_service.trace_function("retrieve_candidates")
+    def _retrieve_candidates_node(self, state: SupervisorState) -> SupervisorState:
+        """Rank workflows with the local BM25 index and route directly on a clear winner"""
+        workflows = state["available_workflows"]
+        # A request naming a workflow outright ("view countries") needs no scoring
+        named = self.index.name_match(state["user_input"])
+        if named in workflows:
+            state["selected_workflow"] = named
+            state["confidence"] = 1.0
+            state["reasoning"] = f"Named workflow {named}"
+            return state
+        
+        # The index may already be newer than this request's workflows after a reload
+        ranked = [(name, score) for name, score in self.index.search(state["user_input"], self.top_k)
+                  if name in workflows]
+        
+        if ranked:
+            top_name, top_score = ranked[0]
+            runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+            # Parameter-name hits help ranking but never route a workflow on their own
+            evidence = self._evidence(state["user_input"], top_name)
+            clear = top_score >= self.route_ratio * runner_up if len(ranked) > 1 else evidence >= self.solo_route_score
+            if evidence >= self.min_route_score and clear:
+                state["selected_workflow"] = top_name
+                state["confidence"] = top_score / (top_score + runner_up)
+                state["reasoning"] = f"Lexical match (score {top_score:.2f}, runner-up {runner_up:.2f})"
+                return state
+            state["candidates"] = self._shortlist(ranked, workflows, evidence >= self.min_route_score)
+        
+        # A follow-up stays on the thread's workflow when it scores for it and nothing clearly outranks it.
+        # One naming no workflow at all ("actually make it Gold") is only tried there: the executor
+        # runs it when it changes a parameter and otherwise hands it back to be routed afresh.
+        previous = state.get("previous_workflow") if state.get("follow_up", True) else None
+        score = dict(ranked).get(previous, 0.0)
+        if previous in workflows and (not ranked or 0 < score and ranked[0][1] < self.route_ratio * score):
+            state["selected_workflow"] = previous
+            state["confidence"] = 1.0
+            state["reasoning"] = f"Follow-up to {previous}"
+        
+        return state
     
     @tracing_service.trace_function("analyze_intent")
-    def _analyze_intent_node(self, state: SupervisorState) -> SupervisorState:
+    async def _analyze_intent_node(self, state: SupervisorState) -> SupervisorState:
         """Analyze user intent"""
         user_input = state["user_input"]
         
@@ -64,17 +142,17 @@ Action: <action>
 Entity: <entity>
 Parameters: <list>"""
         
-        analysis = self.llm_service.generate(prompt)
+        analysis = await self.llm_service.agenerate(prompt, temperature=0)
         state["reasoning"] = analysis
         
         return state
     
     @tracing_service.trace_function("match_workflow")
-    def _match_workflow_node(self, state: SupervisorState) -> SupervisorState:
+    async def _match_workflow_node(self, state: SupervisorState) -> SupervisorState:
         """Match to appropriate workflow"""
         workflow_descriptions = "\n".join([
             f"- {name}: {config.get('description', config.get('api_name', name))}"
-            for name, config in state["available_workflows"].items()
+            for name, config in self._candidates(state).items()
         ])
         
         prompt = f"""Based on the user's request, select the most appropriate workflow.
@@ -88,13 +166,13 @@ Available workflows:
 
 Return ONLY the exact workflow name that best matches. If no match, return "UNKNOWN"."""
         
-        selected = self.llm_service.generate(prompt).strip()
+        selected = (await self.llm_service.agenerate(prompt, temperature=0)).strip()
         
         # Find exact or partial match
         matched_workflow = None
         max_confidence = 0.0
         
-        for workflow_name in state["available_workflows"].keys():
+        for workflow_name in self._candidates(state).keys():
             if workflow_name.lower() == selected.lower():
                 matched_workflow = workflow_name
                 max_confidence = 1.0
@@ -118,31 +196,140 @@ Return ONLY the exact workflow name that best matches. If no match, return "UNKN
         
         return state
     
+    def _evidence(self, user_input: str, name: str) -> float:
+        """Score of a workflow from the terms of its name and description alone"""
+        return self.index.score(user_input, described_only=True).get(name, 0.0)
+    
+    def _shortlist(self, ranked: List[Tuple[str, float]], workflows: Dict[str, Dict[str, Any]],
+                   strong: bool) -> Dict[str, Dict[str, Any]]:
+        """Workflows to offer the LLM: the lexical hits, padded with the rest when the evidence is weak
+        
+        A lone or weak hit may be a false positive (a parameter name), so the LLM also
+        sees the workflows the index missed and can still pick one or answer UNKNOWN.
+        """
+        shortlist = {name: workflows[name] for name, _ in ranked if name in workflows}
+        if strong and len(shortlist) > 1:
+            return shortlist
+        limit = len(workflows) if len(shortlist) <= 1 else max(self.top_k, len(shortlist))
+        for name, config in workflows.items():
+            if len(shortlist) >= limit:
+                break
+            shortlist.setdefault(name, config)
+        return shortlist
+    
+    @staticmethod
+    def _candidates(state: SupervisorState) -> Dict[str, Dict[str, Any]]:
+        """Workflows offered to the LLM: the lexical shortlist, or everything when nothing matched"""
+        return state.get("candidates") or state["available_workflows"]
+    
+    def _check_lexical_match(self, state: SupervisorState) -> Literal["routed", "ambiguous"]:
+        """Skip the LLM calls when the index already picked a workflow"""
+        return "routed" if state.get("selected_workflow") else "ambiguous"
+    
     def _check_confidence(self, state: SupervisorState) -> Literal["high", "low"]:
         """Check if confidence is high enough"""
         return "high" if state.get("confidence", 0) >= 0.7 else "low"
     
-    @tracing_service.trace_function("route_request")
-    def route_request(self, user_input: str) -> Optional[str]:
-        """Route user request to appropriate workflow"""
-        initial_state: SupervisorState = {
+    def _initial_state(self, user_input: str, previous_workflow: Optional[str] = None,
+                       follow_up: bool = True) -> SupervisorState:
+        return {
             "user_input": user_input,
             "available_workflows": self.available_workflows,
+            "candidates": {},
             "selected_workflow": None,
+            "previous_workflow": previous_workflow,
+            "follow_up": follow_up,
             "confidence": 0.0,
             "reasoning": ""
         }
+    
+    def _thread_config(self, thread_id: str) -> RunnableConfig:
+        if self.session_graph is None:
+            raise ValueError("thread_id needs a supervisor created with a checkpointer")
+        return {"configurable": {"thread_id": f"{thread_id}:supervisor"}}
+    
+    @tracing_service.trace_function("route_request")
+    def route_request(self, user_input: str, thread_id: Optional[str] = None, follow_up: bool = True) -> Optional[str]:
+        """Route user request to appropriate workflow (a thread_id lets follow-ups keep the thread's workflow;
+        follow_up=False routes a thread's turn as a new request)"""
+        if thread_id is None:
+            return self.graph.invoke(self._initial_state(user_input)).get("selected_workflow")
         
-        final_state = self.graph.invoke(initial_state)
+        config = self._thread_config(thread_id)
+        previous = self._previous_workflow(self.session_graph.get_state(config).values)
+        final_state = self.session_graph.invoke(self._initial_state(user_input, previous, follow_up), config=config)
+        return final_state.get("selected_workflow")
+    
+    @tracing_service.trace_function("route_request")
+    async def aroute_request(self, user_input: str, thread_id: Optional[str] = None,
+                             follow_up: bool = True) -> Optional[str]:
+        """Route user request to appropriate workflow without blocking the event loop"""
+        if thread_id is None:
+            return (await self.graph.ainvoke(self._initial_state(user_input))).get("selected_workflow")
         
+        config = self._thread_config(thread_id)
+        previous = self._previous_workflow((await self.session_graph.aget_state(config)).values)
+        final_state = await self.session_graph.ainvoke(self._initial_state(user_input, previous, follow_up),
+                                                       config=config)
         return final_state.get("selected_workflow")
     
-    @tracing_service.trace_function("generate_response")
+    @staticmethod
+    def _previous_workflow(values: Dict[str, Any]) -> Optional[str]:
+        """The thread's workflow; a turn that matched nothing (e.g. "thanks") does not end it"""
+        return values.get("selected_workflow") or values.get("previous_workflow")
+    
+    def forget(self, thread_id: str) -> None:
+        """Drop a thread's checkpoints"""
+        if self.checkpointer is not None:
+            self.checkpointer.delete_thread(f"{thread_id}:supervisor")
+    
+    def route_with_tools(self, user_input: str) -> Tuple[Optional[str], Dict[str, Any]]:
+        """Pick a workflow and fill its free-text parameters in one tool call (sync wrapper)"""
+        return run_sync(self.aroute_with_tools(user_input))
+    
+    @tracing_service.trace_function("route_with_tools")
+    async def aroute_with_tools(self, user_input: str) -> Tuple[Optional[str], Dict[str, Any]]:
+        """Pick a workflow and fill its free-text parameters in one tool call
+        
+        Each candidate workflow is offered as a function whose arguments are its
+        non-api_call parameters; dropdown parameters are left to the collector. The
+        lexical shortlist is padded with the other workflows when its evidence is weak,
+        since the forced choice would otherwise fall on a false positive.
+        """
+        workflows = self.available_workflows
+        ranked = [(name, score) for name, score in self.index.search(user_input, self.top_k) if name in workflows]
+        strong = bool(ranked) and self._evidence(user_input, ranked[0][0]) >= self.min_route_score
+        candidates = self._shortlist(ranked, workflows, strong)
+        names = {tool_name(name): name for name in candidates}
+        
+        prompt = f"""Call the function that handles this user request, filling only the arguments the user explicitly mentioned:
+"{user_input}"
+"""
+        
+        choice = await self.llm_service.agenerate_tool_call(prompt, workflow_tools(candidates), temperature=0)
+        if not choice or choice["name"] not in names:
+            return None, {}
+        
+        workflow_name = names[choice["name"]]
+        params = clean_arguments(choice["arguments"], free_text_parameters(candidates[workflow_name]))
+        print(f"✅ Matched workflow: {workflow_name} (tool call, {len(params)} parameters filled)")
+        return workflow_name, params
+    
     def generate_response(self, result: Dict[str, Any], workflow_name: str) -> str:
+        """Generate human-readable response from API result (sync wrapper around agenerate_response)"""
+        return run_sync(self.agenerate_response(result, workflow_name))
+    
+    @tracing_service.trace_function("generate_response")
+    async def agenerate_response(self, result: Dict[str, Any], workflow_name: str) -> str:
         """Generate human-readable response from API result"""
         if not result.get("success", True):
             return f"❌ Error: {result.get('message', result.get('error', 'Unknown error occurred'))}"
         
+        # Workflows with a response_template are formatted locally; the LLM is the fallback
+        template = self.available_workflows.get(workflow_name, {}).get("response_template")
+        if template:
+            return ResponseRenderer.render(template, result)
+        
         prompt = f"""Convert this API response into a clear, structured message.
 
 Workflow: {workflow_name}
@@ -168,4 +355,4 @@ Example format:
 
 👤 Applicant: Name (email)"""
         
-        return self.llm_service.generate(prompt)
+        return await self.llm_service.agenerate(prompt)
@@ -1,180 +1,404 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple, Union
+import asyncio
+import json
 from services.llm_service import LLMService
-from services.api_service import APIService
+from services.api_service import APIService, AsyncAPIService
 from services.tracing_service import tracing_service
 from utils.json_path_extractor import JSONPathExtractor
+from utils.dependency_graph import get_dependency_graph
+from utils.tool_schema import parameter_properties
+from utils.option_tree import OptionTree
+from utils.option_matcher import rank_options
+from utils.parameter_memory import ParameterMemory
+from utils.url_template import URLTemplate
+from utils.async_utils import run_sync, acall
+from agents.selectors import MORE_OPTIONS, OptionSelector, InteractiveSelector
 
 class ParameterCollectorAgent:
     """Agent responsible for collecting parameters dynamically based on config"""
     
-    def __init__(self, llm_service: LLMService, api_service: APIService):
+    def __init__(self, llm_service: LLMService, api_service: Union[APIService, AsyncAPIService], max_workers: int = 4,
+                 batch_extraction: bool = True, selector: Optional[OptionSelector] = None,
+                 match_threshold: float = 0.9, shortlist_size: int = 10, remember_options: int = 1000):
         self.llm_service = llm_service
         self.api_service = api_service
+        self.max_workers = max_workers
+        self.batch_extraction = batch_extraction
+        # Options the request clearly names are taken directly; the rest are offered best first, shortlist_size at a time
+        self.match_threshold = match_threshold
+        self.shortlist_size = shortlist_size
+        # Option lists up to this size are kept (in seen_options) so follow-ups can be matched against them
+        self.remember_options = remember_options
+        # Default policy for choices the request does not settle; callers may pass their own per call
+        self.selector = selector or InteractiveSelector()
     
-    @tracing_service.trace_function("collect_parameters")
     def collect_parameters(self, config: Dict[str, Any], user_input: str, 
-                          collected_params: Dict[str, Any] = None) -> Dict[str, Any]:
-        """Collect all required parameters for the workflow"""
+                          collected_params: Dict[str, Any] = None, extract: bool = True,
+                          selector: Optional[OptionSelector] = None,
+                          seen_options: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+                          memory: Optional[ParameterMemory] = None) -> Dict[str, Any]:
+        """Collect all required parameters for the workflow (sync wrapper around acollect_parameters)"""
+        return run_sync(self.acollect_parameters(config, user_input, collected_params, extract, selector,
+                                                 seen_options, memory))
+    
+    @tracing_service.trace_function("collect_parameters")
+    async def acollect_parameters(self, config: Dict[str, Any], user_input: str,
+                                  collected_params: Dict[str, Any] = None, extract: bool = True,
+                                  selector: Optional[OptionSelector] = None,
+                                  seen_options: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+                                  memory: Optional[ParameterMemory] = None) -> Dict[str, Any]:
+        """Collect all required parameters for the workflow
+        
+        Parameters are resolved over the workflow's dependency DAG: every parameter
+        whose dependencies are known is fetched/extracted concurrently (at most
+        max_workers at a time), and a parameter is scheduled the moment its last
+        dependency resolves. With batch_extraction enabled, all free-text parameters
+        are extracted from the request in a single structured LLM call. Dropdowns with a
+        page_size fetch one page of options and follow the cursor only on request. With extract
+        disabled (values were already pre-filled, e.g. by a tool call), missing free-text
+        parameters fall back to their default or are asked for. When the workflow declares
+        a prefetch_tree source, dropdowns with a tree_level are resolved locally from that
+        single response instead of one api_call per level. Choices the request does not
+        settle (several options, missing required values) go to selector, defaulting to
+        the agent's own (interactive unless configured otherwise). The first page of options
+        offered for each dropdown is recorded in seen_options when given (see arevise_parameters).
+        With a session memory, dropdowns it holds a still-valid value for take that value
+        (or another of its remembered options the request clearly names) without fetching
+        or selecting, and newly selected dropdown values are remembered.
+        """
         if collected_params is None:
             collected_params = {}
+        selector = selector or self.selector
         
-        parameters = config.get("parameters", {})
-        max_iterations = 10
-        iteration = 0
+        graph = get_dependency_graph(config)
+        parameters = graph.parameters
+        position = {name: index for index, name in enumerate(graph.order)}
+        scheduled = set(collected_params)
+        running: Dict[asyncio.Task, Tuple[str, ...]] = {}
+        limit = asyncio.Semaphore(self.max_workers)
         
-        while iteration < max_iterations:
-            iteration += 1
-            params_collected_this_round = False
-            
-            for param_name, param_config in parameters.items():
-                if param_name in collected_params:
+        tree = await self._afetch_option_tree(config, parameters)
+        
+        async def bounded(coro):
+            async with limit:
+                return await coro
+        
+        def schedule_ready():
+            for name in graph.order:
+                if name in scheduled or not graph.is_ready(name, collected_params):
                     continue
-                
-                # Check if parameter has api_call defined
-                api_call = param_config.get("api_call")
-                
-                if api_call:
-                    # Has API call - check dependencies
-                    depends_on = param_config.get("depends_on")
-                    if depends_on:
-                        # Ensure dependencies are collected first
-                        if isinstance(depends_on, str):
-                            depends_on = [depends_on]
-                        
-                        if not all(dep in collected_params for dep in depends_on):
-                            continue
-                    
-                    # Fetch options from API
-                    options = self._fetch_dependent_options(param_config, collected_params)
-                    
-                    if options:
-                        selected = self._llm_select_option(param_name, options, user_input)
-                        collected_params[param_name] = selected
-                        params_collected_this_round = True
-                    elif not param_config.get("required", False):
-                        # Optional param with no options - skip
-                        params_collected_this_round = True
-                else:
-                    # No API call - extract from user input
-                    value = self._extract_from_user_input(param_name, param_config, user_input)
-                    if value:
-                        collected_params[param_name] = value
-                        params_collected_this_round = True
-            
-            # If no params collected this round, break
-            if not params_collected_this_round:
-                break
+                scheduled.add(name)
+                # Dependents later in the order become ready in this same pass
+                if memory is not None and self._recall(name, parameters[name], graph.dependencies[name],
+                                                       user_input, collected_params, seen_options, memory):
+                    continue
+                task = asyncio.create_task(bounded(self._aprepare_parameter(
+                    name, parameters[name], dict(collected_params), user_input, extract, tree)))
+                running[task] = (name,)
+        
+        batch_task = None
+        if extract and self.batch_extraction:
+            batch = {
+                name: parameters[name] for name in graph.order
+                if name not in scheduled and self._needs_extraction(parameters[name])
+            }
+            if batch:
+                scheduled.update(batch)
+                batch_task = asyncio.create_task(bounded(self._aextract_batch_from_user_input(batch, user_input)))
+                running[batch_task] = tuple(batch)
+        
+        try:
+            schedule_ready()
+            while running:
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in sorted(done, key=lambda t: position[running[t][0]]):
+                    names = running.pop(task)
+                    result = task.result()
+                    for name in names:
+                        prepared = result.get(name) if task is batch_task else result
+                        # Only whole lists: a follow-up naming an option on a later page must not look unchanged
+                        if seen_options is not None and parameters[name].get("api_call") and \
+                                prepared[1] is None and len(prepared[0]) <= self.remember_options:
+                            seen_options[name] = prepared[0]
+                        await self._aresolve_parameter(name, parameters[name], prepared,
+                                                       user_input, collected_params, selector)
+                        if memory is not None and parameters[name].get("api_call") and name in collected_params:
+                            memory.remember(name, parameters[name], graph.dependencies[name],
+                                            collected_params, collected_params[name], prepared[0],
+                                            complete=prepared[1] is None)
+                schedule_ready()
+        finally:
+            for task in running:
+                task.cancel()
         
         return collected_params
     
-    def _fetch_dependent_options(self, param_config: Dict[str, Any], 
-                                 collected_params: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Fetch options from dependent API call"""
+    async def arevise_parameters(self, config: Dict[str, Any], user_input: str, collected_params: Dict[str, Any],
+                                 seen_options: Dict[str, List[Dict[str, Any]]], extract: bool = True,
+                                 revisions: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], List[str]]:
+        """Apply a follow-up request ("actually make it Gold") to previously collected parameters
+        
+        A dropdown changes when the follow-up clearly names another of its remembered
+        options (a list not kept whole, e.g. paginated, is searched page by page); free-text values are changed by whatever the follow-up mentions (one
+        structured extraction call), and revisions are applied as given. Parameters that
+        depend on a changed one are dropped so that only they are collected again.
+        Returns the revised parameters and the names of the changed ones.
+        """
+        graph = get_dependency_graph(config)
+        parameters = graph.parameters
+        changes = dict(revisions or {})
+        
+        if extract:
+            free_text = {
+                name: parameters[name] for name in graph.order
+                if name not in changes and self._needs_extraction(parameters[name])
+            }
+            if free_text:
+                extracted = await self._aextract_batch_from_user_input(free_text, user_input)
+                changes.update({
+                    name: value for name, value in extracted.items()
+                    if value is not None and value != collected_params.get(name)
+                })
+        
+        invalidated = set()
+        for name in graph.order:
+            if name in invalidated:
+                continue
+            if name not in changes and name in seen_options:
+                _, match = rank_options(seen_options[name], user_input, self.match_threshold)
+                if match is not None and match["value"] != collected_params.get(name):
+                    changes[name] = match["value"]
+            elif name not in changes and name in collected_params and parameters[name].get("api_call"):
+                match = await self._afind_option(parameters[name], collected_params, user_input)
+                if match is not None and match["value"] != collected_params.get(name):
+                    changes[name] = match["value"]
+            if name in changes:
+                invalidated |= graph.descendants(name)
+        
+        revised = {name: value for name, value in collected_params.items() if name not in invalidated}
+        revised.update(changes)
+        recollect = sorted(invalidated - set(changes))
+        if changes:
+            print(f"   🔁 Follow-up changes {', '.join(changes)}"
+                  + (f"; re-collecting {', '.join(recollect)}" if recollect else ""))
+        return revised, list(changes)
+    
+    async def _afind_option(self, param_config: Dict[str, Any], collected_params: Dict[str, Any],
+                            user_input: str) -> Optional[Dict[str, Any]]:
+        """The option the request clearly names, searching the pages of its list (up to remember_options items)"""
+        cursor, searched = None, 0
+        while True:
+            options, cursor = await self._afetch_dependent_options(param_config, collected_params, cursor)
+            _, match = rank_options(options, user_input, self.match_threshold)
+            searched += len(options)
+            if match is not None or not cursor or not options or searched >= self.remember_options:
+                return match
+    
+    def _recall(self, name: str, param_config: Dict[str, Any], dependencies: Tuple[str, ...], user_input: str,
+                collected_params: Dict[str, Any], seen_options: Optional[Dict[str, List[Dict[str, Any]]]],
+                memory: ParameterMemory) -> bool:
+        """Fill a dropdown from the session memory; False when it holds no valid value for it"""
+        if not param_config.get("api_call"):
+            return False
+        remembered = memory.recall(name, param_config, dependencies, collected_params)
+        if remembered is None:
+            return False
+        
+        if remembered.options:
+            # "...for Gujarat this time" overrides the remembered state without a fetch
+            _, match = rank_options(remembered.options, user_input, self.match_threshold)
+            if seen_options is not None:
+                seen_options[name] = remembered.options
+            if match is not None and match["value"] != remembered.value:
+                print(f"   🎯 Matched {name} from your request: {match['label']}")
+                memory.remember(name, param_config, dependencies, collected_params, match["value"], remembered.options)
+                collected_params[name] = match["value"]
+                return True
+        else:
+            # Only part of the list was kept (paginated or too long), so a request naming another
+            # option would go unnoticed; unless it names the remembered one, the options are fetched
+            _, match = rank_options([{"label": remembered.label, "value": remembered.value}], user_input,
+                                    self.match_threshold)
+            if match is None:
+                return False
+        print(f"   🧠 Using {name} from this session: {remembered.label}")
+        collected_params[name] = remembered.value
+        return True
+    
+    async def _aprepare_parameter(self, param_name: str, param_config: Dict[str, Any],
+                                  collected_params: Dict[str, Any], user_input: str, extract: bool = True,
+                                  tree: Optional[OptionTree] = None) -> Any:
+        """Concurrent step: fetch dropdown options or extract a free-text value"""
+        if param_config.get("api_call"):
+            options = tree.options_for(param_name, collected_params) if tree else None
+            if options is not None:
+                return options, None
+            return await self._afetch_dependent_options(param_config, collected_params)
+        if not extract:
+            return param_config.get("default")
+        return await self._aextract_from_user_input(param_name, param_config, user_input)
+    
+    async def _aresolve_parameter(self, param_name: str, param_config: Dict[str, Any], prepared: Any,
+                                  user_input: str, collected_params: Dict[str, Any],
+                                  selector: OptionSelector) -> None:
+        """Sequential step: select from fetched options or confirm the extracted value"""
+        if param_config.get("api_call"):
+            options, cursor = prepared
+            # Optional params with no options are skipped; their dependents stay unscheduled
+            if options:
+                collected_params[param_name] = await self._aselect_option(
+                    param_name, param_config, options, cursor, user_input, collected_params, selector)
+            return
+        
+        value = prepared
+        if value is None and param_config.get("required", False):
+            value = await selector.aprovide(param_name, param_config)
+        if value:
+            collected_params[param_name] = value
+    
+    async def _afetch_dependent_options(self, param_config: Dict[str, Any], collected_params: Dict[str, Any],
+                                        cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Fetch options from dependent API call, plus the cursor of the next page when paginated"""
         api_call = param_config.get("api_call")
         if not api_call:
-            return []
-        
-        # Replace placeholders in API call (both path and query params)
-        for key, value in collected_params.items():
-            api_call = api_call.replace(f"{{{key}}}", str(value))
-        
-        # Parse query parameters
-        if "?" in api_call:
-            endpoint, query_string = api_call.split("?", 1)
-            params = {}
-            for param in query_string.split("&"):
-                if "=" in param:
-                    k, v = param.split("=", 1)
-                    # Replace any remaining placeholders in values
-                    for key, value in collected_params.items():
-                        v = v.replace(f"{{{key}}}", str(value))
-                    params[k] = v
-        else:
-            endpoint = api_call
-            params = None
+            return [], None
+        
+        endpoint, params = URLTemplate.compile(api_call).build(collected_params)
+        page_size = param_config.get("page_size")
+        if page_size:
+            params = {**(params or {}), "limit": page_size}
+            if cursor:
+                params["cursor"] = cursor
         
         try:
-            response = self.api_service.get(endpoint, params=params)
+            response = await self._aget(endpoint, params, param_config.get("cache_ttl"), api_call)
             response_field = param_config.get("response_field", "data")
             display_field = param_config.get("display_field", response_field)
             
-            # Extract options using JSONPathExtractor
-            extracted_data = JSONPathExtractor.extract(response, response_field)
-            
-            # If display_field is different, extract that too
-            display_data = extracted_data
-            if display_field != response_field:
-                display_data = JSONPathExtractor.extract(response, display_field)
-            
-            if isinstance(extracted_data, list):
-                if isinstance(display_data, list) and len(display_data) == len(extracted_data):
-                    return [{"label": str(display_data[i]), "value": extracted_data[i]} for i in range(len(extracted_data))]
-                else:
-                    return [{"label": str(item), "value": item} for item in extracted_data]
-            
-            return []
+            # Pull value and label out of the same array in one traversal
+            rows = JSONPathExtractor.project(response, {"value": response_field, "label": display_field})
+            # Items without a display value are labelled with their value
+            options = [{"label": str(row["value"] if row["label"] is None else row["label"]), "value": row["value"]}
+                       for row in rows]
+            next_cursor = None
+            if page_size and isinstance(response, dict):
+                next_cursor = response.get(param_config.get("cursor_field", "next_cursor"))
+            return options, next_cursor
         except Exception as e:
             print(f"   ❌ Error fetching options from {endpoint}: {e}")
-            return []
+            return [], None
     
-    def _llm_select_option(self, param_name: str, options: List[Dict[str, Any]], 
-                          user_input: str) -> Any:
-        """Ask user to select from options"""
-        if not options:
+    async def _aget(self, endpoint: str, params: Optional[Dict[str, str]], cache_ttl: Optional[float],
+                    template: str) -> Any:
+        # Catalog lookups can declare how long their responses stay valid
+        if cache_ttl is not None:
+            return await acall(self.api_service.get, endpoint, params=params, cache_ttl=cache_ttl, template=template)
+        return await acall(self.api_service.get, endpoint, params=params, template=template)
+    
+    async def _afetch_option_tree(self, config: Dict[str, Any],
+                                  parameters: Dict[str, Dict[str, Any]]) -> Optional[OptionTree]:
+        """Fetch the workflow's prefetch_tree once so tree_level dropdowns need no further calls"""
+        source = config.get("prefetch_tree")
+        tree_levels = {
+            name: param_config["tree_level"] for name, param_config in parameters.items()
+            if param_config.get("tree_level")
+        }
+        if not source or not tree_levels:
+            return None
+        
+        endpoint, params = URLTemplate.compile(source["api_call"]).build({})
+        try:
+            response = await self._aget(endpoint, params, source.get("cache_ttl"), source["api_call"])
+            return OptionTree(response, tree_levels)
+        except Exception as e:
+            # Dropdowns fall back to their own api_call
+            print(f"   ⚠️  Could not prefetch options from {endpoint}: {e}")
             return None
+    
+    async def _aselect_option(self, param_name: str, param_config: Dict[str, Any], options: List[Dict[str, Any]],
+                              cursor: Optional[str], user_input: str, collected_params: Dict[str, Any],
+                              selector: OptionSelector) -> Any:
+        """Select from paged options
         
-        if len(options) == 1:
+        An option the request clearly names is selected without asking. Otherwise the
+        selector sees the options ranked by how well they match the request, a shortlist
+        at a time; asking for more moves to the next shortlist and then to the next page.
+        """
+        if len(options) == 1 and cursor is None:
             print(f"   ℹ️  Only one option for {param_name}: {options[0]['label']}")
             return options[0]["value"]
         
-        # Display options to user
-        print(f"\n📋 Please select {param_name}:")
-        for i, opt in enumerate(options, 1):
-            print(f"  {i}. {opt['label']}")
-        
         while True:
-            try:
-                choice = input(f"Enter choice (1-{len(options)}): ").strip()
-                idx = int(choice) - 1
-                if 0 <= idx < len(options):
-                    selected = options[idx]
-                    print(f"   ✅ Selected {param_name}: {selected['label']}")
-                    return selected["value"]
-                else:
-                    print(f"   ⚠️  Please enter a number between 1 and {len(options)}")
-            except ValueError:
-                print("   ⚠️  Please enter a valid number")
-            except KeyboardInterrupt:
-                print("\n   ⚠️  Selection cancelled, using first option")
-                return options[0]["value"]
-    
-    def _extract_from_user_input(self, param_name: str, param_config: Dict[str, Any], 
-                                 user_input: str) -> Optional[str]:
-        """Extract or ask user for parameter value"""
+            ranked, match = rank_options(options, user_input, self.match_threshold)
+            if match is not None:
+                print(f"   🎯 Matched {param_name} from your request: {match['label']}")
+                return match["value"]
+            while ranked:
+                shortlist, ranked = ranked[:self.shortlist_size], ranked[self.shortlist_size:]
+                selected = await selector.aselect(param_name, shortlist, user_input,
+                                                  has_more=bool(ranked) or cursor is not None)
+                if selected is not MORE_OPTIONS:
+                    return selected
+            page, next_cursor = await self._afetch_dependent_options(param_config, collected_params, cursor)
+            if page:
+                options, cursor = page, next_cursor
+            else:
+                # Keep the current page if the next one could not be loaded
+                cursor = None
+    
+    async def _aextract_from_user_input(self, param_name: str, param_config: Dict[str, Any],
+                                        user_input: str) -> Optional[str]:
+        """Extract parameter value from the user request, or None when not mentioned"""
         param_type = param_config.get("type", "string")
-        required = param_config.get("required", False)
         default_value = param_config.get("default")
         
         # Use default if provided
         if default_value is not None:
             return default_value
         
-        # Try to extract from user input first
         prompt = f"""Extract the value for parameter "{param_name}" (type: {param_type}) from this user request:
 "{user_input}"
 
 If the value is not explicitly mentioned, return "NOT_FOUND".
 Return ONLY the extracted value, nothing else."""
         
-        value = self.llm_service.generate(prompt).strip().strip('"').strip("'")
-        
-        # If not found and required, ask user
-        if value == "NOT_FOUND" and required:
-            print(f"\n❓ Please provide {param_name} (type: {param_type}):")
-            value = input(f"{param_name}: ").strip()
-            if value:
-                print(f"   ✅ Got {param_name}: {value}")
-                return value
-            return None
-        
+        value = (await self.llm_service.agenerate(prompt, temperature=0)).strip().strip('"').strip("'")
         return value if value != "NOT_FOUND" else None
+    
+    @staticmethod
+    def _needs_extraction(param_config: Dict[str, Any]) -> bool:
+        """Free-text parameters without a default are extracted from the user request"""
+        return not param_config.get("api_call") and param_config.get("default") is None
+    
+    @staticmethod
+    def _build_extraction_schema(params: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Build a JSON schema with one nullable property per parameter"""
+        return {
+            "type": "object",
+            "properties": parameter_properties(params),
+            "required": list(params),
+            "additionalProperties": False
+        }
+    
+    async def _aextract_batch_from_user_input(self, params: Dict[str, Dict[str, Any]],
+                                              user_input: str) -> Dict[str, Any]:
+        """Extract every free-text parameter from the user request in one structured LLM call"""
+        schema = self._build_extraction_schema(params)
+        prompt = f"""Extract the values for these parameters from the user request:
+"{user_input}"
+
+Parameters:
+{json.dumps(schema["properties"], indent=2)}
+
+Return a JSON object with exactly these keys. Use null for any value that is not explicitly mentioned."""
+        
+        extracted = await self.llm_service.agenerate_structured(prompt, schema, temperature=0)
+        values = {}
+        for name in params:
+            value = extracted.get(name) if isinstance(extracted, dict) else None
+            if isinstance(value, str):
+                value = value.strip()
+                if value in ("", "NOT_FOUND"):
+                    value = None
+            values[name] = value
+        return values
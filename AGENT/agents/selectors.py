@@ -0,0 +1,198 @@
+import re
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from services.llm_service import LLMService
+from utils.async_utils import ablocking
+from utils.option_matcher import rank_options
+
+# Selection sentinel: the user asked for the next page of options
+MORE_OPTIONS = object()
+
+
+class SelectionError(RuntimeError):
+    """Raised when a non-interactive policy cannot choose a value"""
+
+
+class OptionSelector(ABC):
+    """Policy for choosing among dropdown options and supplying missing required values
+
+    aselect returns the chosen option's value, or MORE_OPTIONS to load the next page
+    when has_more is set. Non-interactive policies raise SelectionError instead of
+    guessing when they cannot decide.
+    """
+    
+    @abstractmethod
+    async def aselect(self, param_name: str, options: List[Dict[str, Any]], user_input: str,
+                      has_more: bool = False) -> Any:
+        pass
+    
+    async def aprovide(self, param_name: str, param_config: Dict[str, Any]) -> Optional[str]:
+        """Value for a required parameter that was not found in the request"""
+        raise SelectionError(f"No value for required parameter '{param_name}' in the request")
+
+
+def _read_line(prompt: str) -> Optional[str]:
+    """input(), or None when the user pressed Ctrl-C"""
+    try:
+        return input(prompt).strip()
+    except KeyboardInterrupt:
+        return None
+
+
+class InteractiveSelector(OptionSelector):
+    """Ask on stdin (the default for interactive mode)"""
+    
+    async def aselect(self, param_name: str, options: List[Dict[str, Any]], user_input: str,
+                      has_more: bool = False) -> Any:
+        # Display options to user
+        print(f"\n📋 Please select {param_name}:")
+        for i, opt in enumerate(options, 1):
+            print(f"  {i}. {opt['label']}")
+        choices = len(options)
+        if has_more:
+            choices += 1
+            print(f"  {choices}. ➡️  More options...")
+        
+        while True:
+            choice = await ablocking(_read_line, f"Enter choice (1-{choices}): ")
+            if choice is None:
+                print("\n   ⚠️  Selection cancelled, using first option")
+                return options[0]["value"]
+            try:
+                idx = int(choice) - 1
+                if has_more and idx == len(options):
+                    return MORE_OPTIONS
+                if 0 <= idx < len(options):
+                    selected = options[idx]
+                    print(f"   ✅ Selected {param_name}: {selected['label']}")
+                    return selected["value"]
+                else:
+                    print(f"   ⚠️  Please enter a number between 1 and {choices}")
+            except ValueError:
+                print("   ⚠️  Please enter a valid number")
+    
+    async def aprovide(self, param_name: str, param_config: Dict[str, Any]) -> Optional[str]:
+        param_type = param_config.get("type", "string")
+        print(f"\n❓ Please provide {param_name} (type: {param_type}):")
+        value = await ablocking(_read_line, f"{param_name}: ")
+        if value:
+            print(f"   ✅ Got {param_name}: {value}")
+            return value
+        return None
+
+
+class FirstOptionSelector(OptionSelector):
+    """Always take the first option"""
+    
+    async def aselect(self, param_name: str, options: List[Dict[str, Any]], user_input: str,
+                      has_more: bool = False) -> Any:
+        return options[0]["value"]
+
+
+class FailSelector(OptionSelector):
+    """Refuse to guess: any choice between several options fails the request"""
+    
+    async def aselect(self, param_name: str, options: List[Dict[str, Any]], user_input: str,
+                      has_more: bool = False) -> Any:
+        raise SelectionError(f"Ambiguous {param_name}: {len(options)}{'+' if has_more else ''} options")
+
+
+class FuzzySelector(OptionSelector):
+    """Pick the option whose label the request matches best (character trigrams, see OptionMatcher)"""
+    
+    def __init__(self, threshold: float = 0.6):
+        self.threshold = threshold
+    
+    async def aselect(self, param_name: str, options: List[Dict[str, Any]], user_input: str,
+                      has_more: bool = False) -> Any:
+        _, best = rank_options(options, user_input, self.threshold)
+        if best is not None:
+            return best["value"]
+        if has_more:
+            return MORE_OPTIONS
+        raise SelectionError(f"No {param_name} option clearly matches the request ({len(options)} options)")
+
+
+class LLMSelector(OptionSelector):
+    """Let the LLM pick the option the request refers to"""
+    
+    def __init__(self, llm_service: LLMService):
+        self.llm_service = llm_service
+    
+    async def aselect(self, param_name: str, options: List[Dict[str, Any]], user_input: str,
+                      has_more: bool = False) -> Any:
+        listing = "\n".join(f"{i}. {opt['label']}" for i, opt in enumerate(options, 1))
+        prompt = f"""Which {param_name} does this user request refer to?
+"{user_input}"
+
+Options:
+{listing}
+
+Return ONLY the option number. Return 0 if the request does not determine one."""
+        
+        answer = (await self.llm_service.agenerate(prompt, temperature=0)).strip()
+        match = re.search(r"\d+", answer)
+        index = int(match.group()) - 1 if match else -1
+        if 0 <= index < len(options):
+            return options[index]["value"]
+        if has_more:
+            return MORE_OPTIONS
+        raise SelectionError(f"LLM could not choose a {param_name} ({len(options)} options)")
+
+
+class CallbackSelector(OptionSelector):
+    """Forward choices to an async callback, e.g. a client connected over WebSocket
+
+    The callback receives a prompt ({"type": "select", "param", "options", "has_more"} or
+    {"type": "provide", "param", "param_type"}) and returns the reply: {"value": ...} or,
+    for a select with has_more, {"more": true}. Unanswered prompts fail after timeout seconds.
+    """
+    
+    def __init__(self, callback: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+                 timeout: Optional[float] = None):
+        self.callback = callback
+        self.timeout = timeout
+    
+    async def _ask(self, prompt: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            reply = await asyncio.wait_for(self.callback(prompt), self.timeout)
+        except asyncio.TimeoutError:
+            raise SelectionError(f"No answer for {prompt['param']} within {self.timeout:g}s")
+        return reply if isinstance(reply, dict) else {}
+    
+    async def aselect(self, param_name: str, options: List[Dict[str, Any]], user_input: str,
+                      has_more: bool = False) -> Any:
+        reply = await self._ask({"type": "select", "param": param_name, "options": options, "has_more": has_more})
+        if has_more and reply.get("more"):
+            return MORE_OPTIONS
+        for option in options:
+            if option["value"] == reply.get("value"):
+                return option["value"]
+        raise SelectionError(f"{reply.get('value')!r} is not one of the {param_name} options")
+    
+    async def aprovide(self, param_name: str, param_config: Dict[str, Any]) -> Optional[str]:
+        reply = await self._ask({"type": "provide", "param": param_name,
+                                 "param_type": param_config.get("type", "string")})
+        value = reply.get("value")
+        if value is None:
+            return None
+        return str(value).strip() or None
+
+
+SELECTION_POLICIES = ("llm", "fuzzy", "first", "fail")
+
+
+def create_selector(policy: str, llm_service: Optional[LLMService] = None) -> OptionSelector:
+    """Selector for a batch selection policy name"""
+    if policy == "llm":
+        if llm_service is None:
+            raise ValueError("The llm policy needs an LLM service")
+        return LLMSelector(llm_service)
+    if policy == "fuzzy":
+        return FuzzySelector()
+    if policy == "first":
+        return FirstOptionSelector()
+    if policy == "fail":
+        return FailSelector()
+    raise ValueError(f"Unknown selection policy: {policy} (expected one of {', '.join(SELECTION_POLICIES)})")
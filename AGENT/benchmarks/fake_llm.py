@@ -0,0 +1,93 @@
+import re
+import time
+import asyncio
+from collections import Counter
+from typing import Any, Dict, List, Optional
+from services.llm_service import LLMService
+
+# Prompt markers of every LLM call the agent makes, checked in order
+_PROMPT_KINDS = (
+    ("select the most appropriate workflow", "match_workflow"),
+    ("Analyze this user request", "analyze_intent"),
+    ("Convert this API response", "generate_response"),
+    ("Return ONLY the option number", "select_option"),
+    ("Extract the value for parameter", "extract"),
+)
+
+_SAMPLE_VALUES = {"integer": 1, "number": 1.0, "boolean": True}
+
+
+def _words(text: str) -> set:
+    return set(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+class FakeLLMService(LLMService):
+    """Deterministic LLMService stand-in with a fixed injected latency per call
+    
+    Workflow matching picks the listed workflow sharing the most words with the
+    request, extraction fills every requested field with a sample value of its type,
+    option selection picks the first option and responses are a fixed string, so a
+    run makes the same calls every time. Calls are counted by kind in calls.
+    """
+    
+    def __init__(self, latency_ms: float = 0):
+        self.model = "fake"
+        self.latency = latency_ms / 1000
+        self.calls: Counter = Counter()
+    
+    def _answer(self, prompt: str) -> str:
+        kind = next((kind for marker, kind in _PROMPT_KINDS if marker in prompt), "other")
+        self.calls[kind] += 1
+        if kind == "match_workflow":
+            request = _words(prompt.split("User request:", 1)[1].split("\n", 1)[0])
+            listed = re.findall(r"^- (.+?): ", prompt.split("Available workflows:", 1)[1], re.MULTILINE)
+            best = max(listed, key=lambda name: len(_words(name) & request), default=None)
+            return best if best and _words(best) & request else "UNKNOWN"
+        if kind == "analyze_intent":
+            return "Action: create\nEntity: unknown\nParameters: []"
+        if kind == "select_option":
+            return "1"
+        if kind == "extract":
+            name, param_type = re.search(r'parameter "(.+?)" \(type: (\w+)\)', prompt).groups()
+            return str(self._sample(name, {"type": param_type}))
+        return "✅ Success!"
+    
+    def _structured(self, prompt: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+        properties = schema.get("properties", {})
+        if "tool" in properties:
+            self.calls["tool_call"] += 1
+            request = _words(prompt.split('"', 2)[1])
+            tools: List[str] = [name for name in properties["tool"].get("enum", []) if name]
+            best: Optional[str] = max(tools, key=lambda name: len(_words(name.replace("_", " ")) & request),
+                                      default=None)
+            return {"tool": best, "arguments": {}}
+        self.calls["extract_batch"] += 1
+        return {name: self._sample(name, spec) for name, spec in properties.items()}
+    
+    @staticmethod
+    def _sample(name: str, spec: Dict[str, Any]) -> Any:
+        types = spec.get("type", "string")
+        json_type = next((t for t in types if t != "null"), "string") if isinstance(types, list) else types
+        if json_type in _SAMPLE_VALUES:
+            return _SAMPLE_VALUES[json_type]
+        if "email" in name:
+            return "bench@example.com"
+        if "phone" in name:
+            return "+10000000000"
+        return "Bench"
+    
+    def generate(self, prompt: str, **kwargs) -> str:
+        time.sleep(self.latency)
+        return self._answer(prompt)
+    
+    def generate_structured(self, prompt: str, schema: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        time.sleep(self.latency)
+        return self._structured(prompt, schema)
+    
+    async def agenerate(self, prompt: str, **kwargs) -> str:
+        await asyncio.sleep(self.latency)
+        return self._answer(prompt)
+    
+    async def agenerate_structured(self, prompt: str, schema: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        await asyncio.sleep(self.latency)
+        return self._structured(prompt, schema)
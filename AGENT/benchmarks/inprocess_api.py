@@ -0,0 +1,52 @@
+import os
+import sys
+import importlib
+from collections import Counter
+import httpx
+
+# Top-level names of the API project, some of which (utils) AGENT uses too
+_API_MODULES = ("main", "utils", "models", "routers")
+
+DEFAULT_API_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "API")
+
+
+def _api_modules():
+    return [name for name in sys.modules if name.split(".")[0] in _API_MODULES]
+
+
+def load_api_app(api_dir: str = DEFAULT_API_DIR):
+    """Import the API project's FastAPI app in this process
+    
+    The API's packages are imported under their own names while AGENT's are set
+    aside, then taken out of sys.modules again; the app keeps its modules alive
+    through its routes, so both projects' utils coexist.
+    """
+    shadowed = {name: sys.modules.pop(name) for name in _api_modules()}
+    sys.path.insert(0, api_dir)
+    try:
+        return importlib.import_module("main").app
+    finally:
+        sys.path.remove(api_dir)
+        for name in _api_modules():
+            del sys.modules[name]
+        sys.modules.update(shadowed)
+
+
+class CountingTransport(httpx.AsyncBaseTransport):
+    """Transport wrapper that counts requests by method and path"""
+    
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self.transport = transport
+        self.calls: Counter = Counter()
+    
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.calls[f"{request.method} {request.url.path}"] += 1
+        return await self.transport.handle_async_request(request)
+    
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+def inprocess_transport(api_dir: str = DEFAULT_API_DIR) -> CountingTransport:
+    """A counting transport that serves requests from the API app without a network or server"""
+    return CountingTransport(httpx.ASGITransport(app=load_api_app(api_dir)))
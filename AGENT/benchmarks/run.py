@@ -0,0 +1,320 @@
+"""Offline end-to-end benchmark of DynamicAgentSystemV2
+
+Every workflow in config/workflows is driven through process_request with a
+deterministic fake LLM (fixed injected latency) and the API app served in-process,
+so runs need neither an OpenAI key nor a running server. Reports latency
+percentiles, per-node wall time and LLM/HTTP call counts per workflow, and can
+save the report as a baseline or fail when a later run regresses against one.
+With --cassette the requests, LLM answers and API responses of a recorded session
+are replayed instead, with their recorded latencies scaled. --round-trip records a
+run on a cassette and checks that it replays.
+
+    python -m benchmarks.run --iterations 20 --llm-latency-ms 50 --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run --iterations 20 --llm-latency-ms 50 --baseline benchmarks/baseline.json
+    python -m benchmarks.run --cassette session.cassette.jsonl.gz --cassette-latency-scale 0
+    python -m benchmarks.run --iterations 3 --llm-latency-ms 30 --round-trip /tmp/round-trip.jsonl.gz
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import contextlib
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+
+AGENT_DIR = Path(__file__).resolve().parent.parent
+if str(AGENT_DIR) not in sys.path:
+    sys.path.insert(0, str(AGENT_DIR))
+
+from main_langgraph import DynamicAgentSystemV2
+from agents.selectors import create_selector
+from services.tracing_service import tracing_service
+from services.cassette import Cassette, CassetteTransport, ReplayLLMService
+from benchmarks.fake_llm import FakeLLMService
+from benchmarks.inprocess_api import DEFAULT_API_DIR, CountingTransport, inprocess_transport
+
+PERCENTILES = (50, 95, 99)
+# The in-process app answers on any host; the path prefix is what matters
+BASE_URL = "http://api.benchmark/api/v1"
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Percentiles and mean of samples in milliseconds"""
+    values = np.array(samples) * 1000
+    summary = {f"p{p}": round(float(np.percentile(values, p)), 3) for p in PERCENTILES}
+    summary["mean"] = round(float(values.mean()), 3)
+    return summary
+
+
+class NodeProfiler:
+    """Wall time of every traced node/function call, grouped by name"""
+    
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+    
+    def __call__(self, name: str, seconds: float) -> None:
+        self.samples[name].append(seconds)
+    
+    def report(self, iterations: int) -> Dict[str, Dict[str, float]]:
+        return {
+            name: {**summarize(samples), "calls_per_request": round(len(samples) / iterations, 2)}
+            for name, samples in sorted(self.samples.items())
+        }
+
+
+def scenarios(system: DynamicAgentSystemV2) -> List[Tuple[str, str, Optional[str]]]:
+    """One (name, request, expected workflow) per workflow; the request is the workflow's name"""
+    return [(name, name.lower(), name) for name in sorted(system.workflows)]
+
+
+def cassette_scenarios(cassette: Cassette) -> List[Tuple[str, str, Optional[str]]]:
+    """The distinct requests recorded on a cassette, routed wherever the recording routed them"""
+    return [(request, request, None) for request in dict.fromkeys(cassette.user_requests)]
+
+
+def run_benchmark(iterations: int = 10, warmup: int = 1, llm_latency_ms: float = 0,
+                  api_dir: str = DEFAULT_API_DIR, warm_cache: bool = False,
+                  workflows: Optional[List[str]] = None, cassette: Optional[Cassette] = None) -> Dict[str, Any]:
+    """Run every scenario warmup + iterations times and return the report
+    
+    The API response cache is cleared before each request unless warm_cache is set,
+    so each iteration pays for its option fetches. A replay-mode cassette supplies the
+    requests, LLM answers and API responses instead of the fake LLM and in-process API;
+    a record-mode one records the run.
+    """
+    # A benchmark must not read or write the on-disk caches of a real deployment
+    for variable in ("LLM_CACHE_PATH", "API_CACHE_PATH"):
+        os.environ.pop(variable, None)
+    replay = cassette is not None and not cassette.recording
+    if replay:
+        llm = ReplayLLMService(cassette)
+        transport = CountingTransport(CassetteTransport(cassette))
+    else:
+        llm = FakeLLMService(latency_ms=llm_latency_ms)
+        transport = inprocess_transport(api_dir)
+    selector = create_selector("first", llm)
+    # The agent narrates every step on stdout; only the report is printed
+    devnull = open(os.devnull, "w")
+    
+    with contextlib.redirect_stdout(devnull):
+        system = DynamicAgentSystemV2(
+            config_dir=str(AGENT_DIR / "config" / "workflows"),
+            base_url=BASE_URL,
+            llm_service=llm,
+            api_transport=transport,
+            cassette=cassette if cassette is not None and cassette.recording else None
+        )
+    # The executor switches LangSmith tracing on when it builds its graph; stay offline
+    os.environ["LANGCHAIN_TRACING_V2"] = "false"
+    
+    report: Dict[str, Any] = {
+        "meta": {
+            "iterations": iterations,
+            "warmup": warmup,
+            "llm_latency_ms": llm_latency_ms,
+            "warm_cache": warm_cache,
+            "cassette": cassette.path if cassette is not None else None,
+            "cassette_latency_scale": cassette.latency_scale if replay else None,
+            "replay": replay,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+        },
+        "workflows": {}
+    }
+    all_latencies: List[float] = []
+    
+    for name, request, expected in cassette_scenarios(cassette) if replay else scenarios(system):
+        if workflows and name not in workflows:
+            continue
+        profiler = NodeProfiler()
+        latencies, failures = [], []
+        llm_calls, http_calls = Counter(), Counter()
+        
+        for iteration in range(warmup + iterations):
+            measured = iteration >= warmup
+            if not warm_cache:
+                system.response_cache.clear()
+            llm_before, http_before = Counter(llm.calls), Counter(transport.calls)
+            stop = tracing_service.observe(profiler) if measured else None
+            started = time.perf_counter()
+            try:
+                with contextlib.redirect_stdout(devnull):
+                    result = system.run_request(request, selector)
+            finally:
+                elapsed = time.perf_counter() - started
+                if stop:
+                    stop()
+            if not measured:
+                continue
+            latencies.append(elapsed)
+            llm_calls.update(llm.calls - llm_before)
+            http_calls.update(transport.calls - http_before)
+            if not result["success"] or expected not in (None, result["workflow"]):
+                failures.append(result.get("error") or f"routed to {result['workflow']}")
+        
+        all_latencies.extend(latencies)
+        report["workflows"][name] = {
+            "request": request,
+            "latency_ms": summarize(latencies),
+            "llm_calls": round(sum(llm_calls.values()) / iterations, 2),
+            "llm_calls_by_kind": {kind: round(n / iterations, 2) for kind, n in sorted(llm_calls.items())},
+            "http_calls": round(sum(http_calls.values()) / iterations, 2),
+            "http_calls_by_path": {path: round(n / iterations, 2) for path, n in sorted(http_calls.items())},
+            "success_rate": round(1 - len(failures) / iterations, 3),
+            "errors": sorted(set(failures))[:5],
+            "nodes": profiler.report(iterations)
+        }
+    
+    devnull.close()
+    if cassette is not None:
+        cassette.save()
+    report["overall"] = {
+        "latency_ms": summarize(all_latencies) if all_latencies else {},
+        "llm_calls": round(sum(w["llm_calls"] for w in report["workflows"].values()), 2),
+        "http_calls": round(sum(w["http_calls"] for w in report["workflows"].values()), 2)
+    }
+    return report
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], threshold: float,
+            min_delta_ms: float) -> List[str]:
+    """Regressions of report against baseline
+    
+    A latency percentile regresses when it is more than threshold (a fraction) and
+    min_delta_ms above the baseline; call counts and success rates regress on any
+    change for the worse, since the fake LLM makes runs deterministic.
+    """
+    regressions = []
+    for workflow, base in baseline.get("workflows", {}).items():
+        current = report["workflows"].get(workflow)
+        if current is None:
+            continue
+        for percentile, base_ms in base["latency_ms"].items():
+            now_ms = current["latency_ms"].get(percentile)
+            if now_ms is not None and now_ms > base_ms * (1 + threshold) and now_ms - base_ms > min_delta_ms:
+                regressions.append(f"{workflow}: {percentile} {base_ms:.1f} ms -> {now_ms:.1f} ms "
+                                   f"(+{(now_ms / base_ms - 1) * 100 if base_ms else float('inf'):.0f}%)")
+        for counter in ("llm_calls", "http_calls"):
+            if current[counter] > base[counter]:
+                regressions.append(f"{workflow}: {counter} {base[counter]} -> {current[counter]}")
+        if current["success_rate"] < base["success_rate"]:
+            regressions.append(f"{workflow}: success rate {base['success_rate']} -> {current['success_rate']}")
+    return regressions
+
+
+def print_report(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> None:
+    meta = report["meta"]
+    source = (f"replaying {meta['cassette']} at {meta['cassette_latency_scale']}x recorded latency"
+              if meta.get("replay") else f"LLM latency {meta['llm_latency_ms']} ms")
+    print(f"\n📊 Benchmark: {meta['iterations']} iterations, {source}, "
+          f"{'warm' if meta['warm_cache'] else 'cold'} API cache\n")
+    print(f"{'Workflow':<30} {'p50':>9} {'p95':>9} {'p99':>9} {'LLM':>6} {'HTTP':>6} {'OK':>6}")
+    for workflow, stats in report["workflows"].items():
+        latency = stats["latency_ms"]
+        base = (baseline or {}).get("workflows", {}).get(workflow)
+        delta = ""
+        if base and base["latency_ms"].get("p50"):
+            delta = f"  ({(latency['p50'] / base['latency_ms']['p50'] - 1) * 100:+.0f}% p50)"
+        print(f"{workflow:<30} {latency['p50']:>9.1f} {latency['p95']:>9.1f} {latency['p99']:>9.1f} "
+              f"{stats['llm_calls']:>6} {stats['http_calls']:>6} {stats['success_rate']:>6.0%}{delta}")
+        for error in stats["errors"]:
+            print(f"   ❌ {error}")
+    overall = report["overall"]
+    if overall["latency_ms"]:
+        print(f"{'Overall':<30} {overall['latency_ms']['p50']:>9.1f} {overall['latency_ms']['p95']:>9.1f} "
+              f"{overall['latency_ms']['p99']:>9.1f} {overall['llm_calls']:>6} {overall['http_calls']:>6}")
+    
+    nodes: Dict[str, List[float]] = defaultdict(list)
+    for stats in report["workflows"].values():
+        for name, node in stats["nodes"].items():
+            nodes[name].append(node["mean"])
+    print(f"\n{'Node (mean ms per call, across workflows)':<45} {'mean':>9} {'max':>9}")
+    for name, means in sorted(nodes.items(), key=lambda item: -max(item[1])):
+        print(f"{name:<45} {sum(means) / len(means):>9.1f} {max(means):>9.1f}")
+
+
+def round_trip(path: str, iterations: int, warmup: int, llm_latency_ms: float, api_dir: str,
+               workflows: Optional[List[str]]) -> int:
+    """Record a run on the cassette at path, then replay it without delays
+    
+    Returns 1 when a recorded request fails on replay, e.g. because a call's key
+    differs between runs and misses the cassette.
+    """
+    recorded = run_benchmark(iterations, warmup, llm_latency_ms, api_dir, False, workflows, Cassette(path, "record"))
+    print_report(recorded)
+    replayed = run_benchmark(iterations, warmup, 0, api_dir, False, None, Cassette(path, "replay", 0))
+    print_report(replayed)
+    # Replayed scenarios are named by their request
+    recorded_rates = {stats["request"]: stats["success_rate"] for stats in recorded["workflows"].values()}
+    failures = [
+        f"{request}: {', '.join(stats['errors']) or 'failed'}" for request, stats in replayed["workflows"].items()
+        if stats["success_rate"] < recorded_rates.get(request, 1.0)
+    ]
+    if failures:
+        print(f"\n❌ {len(failures)} request(s) did not replay from {path}:")
+        for failure in failures:
+            print(f"   • {failure}")
+        return 1
+    print(f"\n✅ All {len(replayed['workflows'])} recorded requests replayed from {path}")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline end-to-end agent benchmark")
+    parser.add_argument("--iterations", type=int, default=int(os.getenv("BENCH_ITERATIONS", "10")))
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--llm-latency-ms", type=float, default=float(os.getenv("BENCH_LLM_LATENCY_MS", "0")),
+                        help="Latency injected into every fake LLM call")
+    parser.add_argument("--warm-cache", action="store_true", help="Keep the API response cache between requests")
+    parser.add_argument("--workflow", action="append", dest="workflows", help="Only this workflow (repeatable)")
+    parser.add_argument("--api-dir", default=DEFAULT_API_DIR, help="API project to serve in-process")
+    parser.add_argument("--cassette", metavar="PATH",
+                        help="Replay this recorded session instead of the fake LLM and in-process API")
+    parser.add_argument("--cassette-latency-scale", type=float, default=1.0,
+                        help="Multiplier for the recorded latencies when replaying (0 = no delays)")
+    parser.add_argument("--round-trip", metavar="PATH",
+                        help="Record the run on this cassette, replay it without delays and fail unless it replays")
+    parser.add_argument("--output", help="Write the full report as JSON")
+    parser.add_argument("--save-baseline", metavar="PATH", help="Write the report as the new baseline")
+    parser.add_argument("--baseline", metavar="PATH", help="Compare against this baseline and fail on regressions")
+    parser.add_argument("--threshold", type=float, default=float(os.getenv("BENCH_REGRESSION_THRESHOLD", "0.2")),
+                        help="Allowed latency increase as a fraction of the baseline (default 0.2)")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0,
+                        help="Latency increases below this many ms never count as regressions")
+    args = parser.parse_args(argv)
+    if args.round_trip:
+        return round_trip(args.round_trip, args.iterations, args.warmup, args.llm_latency_ms,
+                          args.api_dir, args.workflows)
+    
+    cassette = Cassette(args.cassette, "replay", args.cassette_latency_scale) if args.cassette else None
+    report = run_benchmark(args.iterations, args.warmup, args.llm_latency_ms, args.api_dir,
+                           args.warm_cache, args.workflows, cassette)
+    baseline = json.loads(Path(args.baseline).read_text()) if args.baseline else None
+    print_report(report, baseline)
+    
+    for path in (args.output, args.save_baseline):
+        if path:
+            Path(path).write_text(json.dumps(report, indent=2) + "\n")
+            print(f"\n💾 Report written to {path}")
+    
+    if baseline is None:
+        return 0
+    if baseline["meta"].get("llm_latency_ms") != args.llm_latency_ms:
+        print(f"\n⚠️  Baseline used LLM latency {baseline['meta'].get('llm_latency_ms')} ms; comparing anyway")
+    regressions = compare(report, baseline, args.threshold, args.min_delta_ms)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) against {args.baseline}:")
+        for regression in regressions:
+            print(f"   • {regression}")
+        return 1
+    print(f"\n✅ No regressions against {args.baseline} (threshold {args.threshold:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,34 @@
 import os
+import sys
+import json
+import time
+import uuid
+import atexit
+import asyncio
+import argparse
+import contextlib
+import httpx
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
 from pathlib import Path
 from dotenv import load_dotenv
-from services.llm_service import LLMServiceFactory
-from services.api_service import HTTPAPIService
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from services.llm_service import LLMService, LLMServiceFactory, MeteredLLMService
+from services.api_service import HTTPAPIService, AsyncHTTPAPIService
+from services.response_cache import ResponseCache
+from services.llm_cache import LLMResponseCache, CachedLLMService
+from services.metrics_service import metrics
+from services.cassette import (CASSETTE_MODES, Cassette, CassetteAdapter, CassetteTransport,
+                               RecordingLLMService, ReplayLLMService)
 from agents.langgraph_supervisor import LangGraphSupervisorAgent
 from agents.parameter_collector_agent import ParameterCollectorAgent
 from agents.api_executor_agent import APIExecutorAgent
+from agents.selectors import OptionSelector, SELECTION_POLICIES, create_selector
 from workflows.langgraph_executor import LangGraphWorkflowExecutor
-from utils.config_loader import ConfigLoader
+from utils.workflow_registry import WorkflowRegistry
+from utils.async_utils import run_sync
+from utils.checkpointing import CHECKPOINT_BACKENDS, create_checkpointer
+from utils.parameter_memory import ParameterMemory
 
 # Load environment variables
 load_dotenv()
@@ -26,57 +47,376 @@ if os.getenv("LANGSMITH_TRACING", "false").lower() == "true":
         print("⚠️  LangSmith not installed. Install with: pip install langsmith")
 
 
+class _Outcome:
+    """Result fields and per-stage timings of one request (see run_request)"""
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.workflow: Optional[str] = None
+        self.params: Dict[str, Any] = {}
+        self.timings: Dict[str, float] = {}
+    
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            # A rerouted follow-up runs route and execute twice; their times add up
+            key = f"{name}_ms"
+            self.timings[key] = round(self.timings.get(key, 0.0) + (time.perf_counter() - start) * 1000, 2)
+    
+    def succeed(self, response: str) -> Dict[str, Any]:
+        return self._result(True, response, None)
+    
+    def fail(self, response: str, error: Optional[str] = None) -> Dict[str, Any]:
+        return self._result(False, response, error or response.removeprefix("❌ "))
+    
+    def _result(self, success: bool, response: str, error: Optional[str]) -> Dict[str, Any]:
+        total = time.perf_counter() - self.started
+        self.timings["total_ms"] = round(total * 1000, 2)
+        workflow = self.workflow or "none"
+        metrics.observe("agent_request_seconds", "End-to-end request latency", total,
+                        workflow=workflow, outcome="ok" if success else "error")
+        for stage, ms in self.timings.items():
+            if stage != "total_ms":
+                metrics.observe("agent_request_stage_seconds", "Request latency by stage (route, execute, respond)",
+                                ms / 1000, workflow=workflow, stage=stage.removesuffix("_ms"))
+        return {
+            "success": success,
+            "workflow": self.workflow,
+            "response": response,
+            "error": error,
+            "params": self.params,
+            "timings": self.timings
+        }
+
+
+def _read_batch_requests(path: str) -> Iterator[Dict[str, Any]]:
+    """Lazily read {"id", "request"} items from a JSONL file (ids default to the line number)"""
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield {"id": line_number, "request": None, "success": False, "error": f"Invalid JSON: {e}"}
+                continue
+            if isinstance(item, str):
+                item = {"request": item}
+            if not isinstance(item, dict) or not isinstance(item.get("request"), str):
+                yield {"id": line_number, "request": None, "success": False,
+                       "error": "Expected a JSON string or an object with a 'request' string"}
+                continue
+            yield {"id": item.get("id", line_number), "request": item["request"]}
+
+
 class DynamicAgentSystemV2:
     """Enhanced dynamic agent system with LangGraph integration"""
     
-    def __init__(self, config_dir: str, base_url: str, llm_type: str = "openai"):
+    def __init__(self, config_dir: str, base_url: str, llm_type: str = "openai", async_http: bool = False,
+                 routing_strategy: str = "pipeline", llm_service: Optional[LLMService] = None,
+                 reload_interval: float = 0, checkpointer: Optional[BaseCheckpointSaver] = None,
+                 session_memory: bool = True, api_transport: Optional[httpx.AsyncBaseTransport] = None,
+                 cassette: Optional[Cassette] = None):
+        if routing_strategy not in ("pipeline", "tool_calling"):
+            raise ValueError(f"Unknown routing strategy: {routing_strategy}")
+        self.routing_strategy = routing_strategy
+        
         # Initialize services (SOLID: Dependency Injection)
-        self.llm_service = LLMServiceFactory.create(llm_type)
-        self.api_service = HTTPAPIService(base_url=base_url)
+        # A cassette records the raw provider and API traffic, or replays it instead of calling them
+        self.cassette = cassette
+        if cassette is not None and not cassette.recording:
+            self.llm_service = ReplayLLMService(cassette)
+        else:
+            self.llm_service = llm_service or LLMServiceFactory.create(llm_type)
+            if cassette is not None:
+                self.llm_service = RecordingLLMService(self.llm_service, cassette)
+                atexit.register(cassette.save)
+        self.llm_cache = None
+        if os.getenv("LLM_CACHE_PATH"):
+            # Deterministic (temperature=0) prompts are answered from disk on repeat
+            self.llm_cache = LLMResponseCache(
+                path=os.getenv("LLM_CACHE_PATH"),
+                max_bytes=int(float(os.getenv("LLM_CACHE_MAX_MB", "50")) * 1024 * 1024)
+            )
+            self.llm_service = CachedLLMService(self.llm_service, self.llm_cache)
+        if metrics.enabled:
+            # Outermost, so a cached answer is timed as the caller sees it
+            self.llm_service = MeteredLLMService(self.llm_service)
+        self.response_cache = ResponseCache(
+            max_entries=int(os.getenv("API_CACHE_SIZE", "512")),
+            default_ttl=float(os.getenv("API_CACHE_TTL", "0")),
+            persist_path=os.getenv("API_CACHE_PATH") or None
+        )
+        atexit.register(self.response_cache.save)
+        self._register_cache_metrics()
+        if async_http or api_transport is not None:
+            # Pooled non-blocking client; sync entry points share it through one background event loop.
+            # api_transport (e.g. an in-process ASGI app) replaces the network and implies async_http.
+            limits = httpx.Limits(
+                max_connections=int(os.getenv("API_MAX_CONNECTIONS", "100")),
+                max_keepalive_connections=int(os.getenv("API_MAX_KEEPALIVE_CONNECTIONS", "20"))
+            )
+            if cassette is not None:
+                api_transport = CassetteTransport(cassette, api_transport, limits)
+            self.api_service = AsyncHTTPAPIService(
+                base_url=base_url,
+                cache=self.response_cache,
+                max_connections=limits.max_connections,
+                max_keepalive_connections=limits.max_keepalive_connections,
+                max_connections_per_host=int(os.getenv("API_MAX_CONNECTIONS_PER_HOST", "20")),
+                transport=api_transport
+            )
+        else:
+            self.api_service = HTTPAPIService(base_url=base_url, cache=self.response_cache,
+                                              adapter=CassetteAdapter(cassette) if cassette is not None else None)
         
-        # Load all workflow configurations
-        self.workflows = ConfigLoader.load_all_configs(config_dir)
+        # Load, validate and compile all workflow configurations
+        self.registry = WorkflowRegistry(config_dir)
         print(f"📚 Loaded {len(self.workflows)} workflow configurations")
         
         # Initialize agents
-        self.supervisor = LangGraphSupervisorAgent(self.llm_service, self.workflows)
-        self.parameter_collector = ParameterCollectorAgent(self.llm_service, self.api_service)
+        # With a checkpointer, requests that carry a thread_id resume that thread's last workflow
+        self.checkpointer = checkpointer
+        self.supervisor = LangGraphSupervisorAgent(self.llm_service, self.workflows, checkpointer=checkpointer)
+        self.registry.subscribe(self.supervisor.update_workflows)
+        if reload_interval > 0:
+            # Edited workflow files are recompiled and swapped in without a restart
+            self.registry.watch(reload_interval)
+        self.parameter_collector = ParameterCollectorAgent(
+            self.llm_service,
+            self.api_service,
+            match_threshold=float(os.getenv("OPTION_MATCH_THRESHOLD", "0.9")),
+            shortlist_size=int(os.getenv("OPTION_SHORTLIST_SIZE", "10"))
+        )
         self.api_executor = APIExecutorAgent(self.api_service)
+        # Dropdown values each conversation thread has chosen, reused across its workflows
+        self.session_memory = session_memory
+        self.memories: Dict[str, ParameterMemory] = {}
         
         # Initialize LangGraph workflow executor
         self.workflow_executor = LangGraphWorkflowExecutor(
             self.parameter_collector, 
-            self.api_executor
+            self.api_executor,
+            checkpointer=checkpointer
         )
     
-    def process_request(self, user_input: str) -> str:
+    def _register_cache_metrics(self) -> None:
+        """Export the API and LLM response caches' counters with every metrics scrape"""
+        caches = {"api_response": self.response_cache, "llm_response": self.llm_cache}
+        
+        def read(stat: str) -> Dict[Tuple[str, ...], float]:
+            return {(name,): cache.stats()[stat] for name, cache in caches.items() if cache is not None}
+        
+        metrics.register_collector("agent_cache_hits_total", "Cache hits since start", ("cache",),
+                                   lambda: read("hits"), type="counter")
+        metrics.register_collector("agent_cache_misses_total", "Cache misses since start", ("cache",),
+                                   lambda: read("misses"), type="counter")
+        metrics.register_collector("agent_cache_hit_ratio", "Cache hits / lookups since start", ("cache",),
+                                   lambda: read("hit_rate"))
+    
+    @property
+    def workflows(self) -> Dict[str, Dict[str, Any]]:
+        """Current workflow configs (replaced as a whole on reload)"""
+        return self.registry.workflows
+    
+    def process_request(self, user_input: str, selector: Optional[OptionSelector] = None,
+                        thread_id: Optional[str] = None) -> str:
         """Process user request end-to-end using LangGraph"""
+        return self.run_request(user_input, selector, thread_id)["response"]
+    
+    async def aprocess_request(self, user_input: str, selector: Optional[OptionSelector] = None,
+                               thread_id: Optional[str] = None) -> str:
+        """Async variant of process_request; many sessions can share one event loop"""
+        return (await self.arun_request(user_input, selector, thread_id))["response"]
+    
+    def run_request(self, user_input: str, selector: Optional[OptionSelector] = None,
+                    thread_id: Optional[str] = None) -> Dict[str, Any]:
+        """Process a request and return the outcome with per-stage timings
+        
+        selector overrides how ambiguous choices are made (the collector's interactive
+        prompt by default). thread_id makes the request a turn of that conversation:
+        dropdown values chosen earlier in it are reused (session memory), and with a
+        checkpointer a follow-up on the same workflow resumes its parameters.
+        """
+        return run_sync(self.arun_request(user_input, selector, thread_id))
+    
+    async def arun_request(self, user_input: str, selector: Optional[OptionSelector] = None,
+                           thread_id: Optional[str] = None) -> Dict[str, Any]:
+        """Async variant of run_request (which wraps it)"""
         print(f"\n{'='*60}")
         print(f"🤖 Processing: {user_input}")
         print(f"{'='*60}")
+        outcome = _Outcome()
+        if self.cassette is not None:
+            self.cassette.record_request(user_input)
+        memory, thread_id = self._session(thread_id)
         
-        # Step 1: Route to appropriate workflow using LangGraph supervisor
-        workflow_name = self.supervisor.route_request(user_input)
+        prefilled = None
+        with outcome.stage("route"):
+            if self.routing_strategy == "tool_calling":
+                workflow_name, prefilled = await self.supervisor.aroute_with_tools(user_input)
+            else:
+                workflow_name = await self.supervisor.aroute_request(user_input, thread_id)
         
         if not workflow_name:
-            return "❌ I couldn't find a matching workflow for your request. Please try rephrasing."
+            return outcome.fail("❌ I couldn't find a matching workflow for your request. Please try rephrasing.")
         
         print(f"\n📋 Selected workflow: {workflow_name}")
+        outcome.workflow = workflow_name
         
-        # Step 2: Get workflow config
-        config = self.workflows[workflow_name]
+        config = self.workflows.get(workflow_name)
+        if config is None:
+            return outcome.fail(f"❌ Workflow {workflow_name} was removed while routing. Please try again.")
         print(f"🔧 Method: {config.get('method')} {config.get('endpoint')}")
         
-        # Step 3: Execute workflow using LangGraph
-        result = self.workflow_executor.execute(config, user_input)
+        with outcome.stage("execute"):
+            if prefilled is not None:
+                result = await self.workflow_executor.aexecute(config, user_input, collected_params=prefilled,
+                                                               extract=False, selector=selector, thread_id=thread_id,
+                                                               memory=memory)
+            else:
+                result = await self.workflow_executor.aexecute(config, user_input, selector=selector,
+                                                               thread_id=thread_id, memory=memory)
+        
+        if result.get("unchanged"):
+            # The follow-up changes none of the thread's parameters, so it is a new request after all;
+            # one that names the same workflow again runs it afresh (e.g. a second, identical order)
+            with outcome.stage("route"):
+                if self.routing_strategy == "tool_calling":
+                    rerouted = workflow_name
+                else:
+                    rerouted = await self.supervisor.aroute_request(user_input, thread_id, follow_up=False)
+            if not rerouted:
+                outcome.workflow = None
+                return outcome.fail("❌ I couldn't find a matching workflow for your request. Please try rephrasing.")
+            config = self.workflows.get(rerouted)
+            if config is None:
+                return outcome.fail(f"❌ Workflow {rerouted} was removed while routing. Please try again.")
+            workflow_name = outcome.workflow = rerouted
+            print(f"\n📋 New request for workflow: {workflow_name}")
+            with outcome.stage("execute"):
+                result = await self.workflow_executor.aexecute(config, user_input, collected_params=prefilled,
+                                                               extract=prefilled is None, selector=selector,
+                                                               thread_id=thread_id, memory=memory, resume=False)
+        outcome.params = result["collected_params"]
         
         if not result["success"]:
-            return f"❌ Error: {result.get('error', 'Unknown error')}"
+            return outcome.fail(f"❌ Error: {result.get('error', 'Unknown error')}", result.get("error"))
         
-        # Step 4: Generate response
-        response = self.supervisor.generate_response(result["api_response"], workflow_name)
+        with outcome.stage("respond"):
+            response = await self.supervisor.agenerate_response(result["api_response"], workflow_name)
         
-        return response
+        return outcome.succeed(response)
+    
+    def _session(self, thread_id: Optional[str]) -> Tuple[Optional[ParameterMemory], Optional[str]]:
+        """A thread's parameter memory, and the thread_id to checkpoint under (None without a checkpointer)"""
+        if thread_id is None:
+            return None, None
+        memory = None
+        if self.session_memory:
+            memory = self.memories.setdefault(thread_id, ParameterMemory(self.parameter_collector.remember_options))
+        return memory, thread_id if self.checkpointer else None
+    
+    def forget_thread(self, thread_id: str) -> None:
+        """Drop a conversation's memory and checkpoints (e.g. when its session ends)"""
+        self.memories.pop(thread_id, None)
+        self.supervisor.forget(thread_id)
+        self.workflow_executor.forget(thread_id)
+    
+    def batch_mode(self, input_path: str, output_path: str = "-", workers: int = 4, pool: str = "thread",
+                   policy: str = "llm") -> Dict[str, Any]:
+        """Process a JSONL file of requests without prompting and stream JSONL results
+        
+        Each input line is {"id": ..., "request": "..."} or a bare JSON string. Results are
+        written as they complete (not in input order) and carry the request id. Choices a
+        request does not settle are made by the selection policy (llm, fuzzy, first or fail).
+        Requests run on a thread pool (pool="thread") or as tasks on the shared event loop
+        (pool="async"); at most 2 x workers requests are read ahead of the results.
+        """
+        if pool not in ("thread", "async"):
+            raise ValueError(f"Unknown worker pool: {pool}")
+        selector = create_selector(policy, self.llm_service)
+        out = sys.stdout if output_path == "-" else open(output_path, "w", encoding="utf-8")
+        summary = {"requests": 0, "succeeded": 0, "failed": 0}
+        started = time.perf_counter()
+        
+        def write(record: Dict[str, Any]) -> None:
+            out.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            out.flush()
+            summary["requests"] += 1
+            summary["succeeded" if record.get("success") else "failed"] += 1
+        
+        try:
+            # Progress output goes to stderr so stdout can carry the results
+            with contextlib.redirect_stdout(sys.stderr):
+                items = _read_batch_requests(input_path)
+                if pool == "thread":
+                    self._run_batch_threads(items, selector, workers, write)
+                else:
+                    run_sync(self._arun_batch(items, selector, workers, write))
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        
+        summary["seconds"] = round(time.perf_counter() - started, 3)
+        print(f"📦 Batch finished: {summary['requests']} requests, {summary['succeeded']} succeeded, "
+              f"{summary['failed']} failed in {summary['seconds']}s", file=sys.stderr)
+        return summary
+    
+    def _run_batch_item(self, item: Dict[str, Any], selector: OptionSelector) -> Dict[str, Any]:
+        if "error" in item:
+            return item
+        try:
+            return {**item, **self.run_request(item["request"], selector)}
+        except Exception as e:
+            return {**item, "success": False, "error": str(e)}
+    
+    async def _arun_batch_item(self, item: Dict[str, Any], selector: OptionSelector) -> Dict[str, Any]:
+        if "error" in item:
+            return item
+        try:
+            return {**item, **(await self.arun_request(item["request"], selector))}
+        except Exception as e:
+            return {**item, "success": False, "error": str(e)}
+    
+    def _run_batch_threads(self, items: Iterator[Dict[str, Any]], selector: OptionSelector, workers: int,
+                           write: Callable[[Dict[str, Any]], None]) -> None:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as executor:
+            pending = set()
+            for item in items:
+                if len(pending) >= 2 * workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        write(future.result())
+                pending.add(executor.submit(self._run_batch_item, item, selector))
+            for future in as_completed(pending):
+                write(future.result())
+    
+    async def _arun_batch(self, items: Iterator[Dict[str, Any]], selector: OptionSelector, workers: int,
+                          write: Callable[[Dict[str, Any]], None]) -> None:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=2 * workers)
+        
+        async def worker():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                write(await self._arun_batch_item(item, selector))
+        
+        tasks = [asyncio.create_task(worker()) for _ in range(workers)]
+        try:
+            for item in items:
+                await queue.put(item)
+            for _ in tasks:
+                await queue.put(None)
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
     
     def interactive_mode(self):
         """Run in interactive mode"""
@@ -102,20 +442,26 @@ class DynamicAgentSystemV2:
         print("  - 'Create an order for a laptop in India'")
         print("\nType 'exit' to quit\n")
         
+        # One conversation thread: earlier choices are reused and follow-ups resume the last workflow
+        thread_id = uuid.uuid4().hex
+        
         while True:
             try:
                 user_input = input("You: ").strip()
                 
                 if user_input.lower() in ['exit', 'quit', 'q']:
+                    if self.llm_cache:
+                        stats = self.llm_cache.stats()
+                        print(f"🗄️  LLM cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%})")
                     print("👋 Goodbye!")
                     break
                 
                 if not user_input:
                     continue
                 
-                response = self.process_request(user_input)
+                response = self.process_request(user_input, thread_id=thread_id)
                 print(f"\n🤖 Agent: {response}\n")
-                
+            
             except KeyboardInterrupt:
                 print("\n👋 Goodbye!")
                 break
@@ -125,19 +471,111 @@ class DynamicAgentSystemV2:
 
 def main():
     """Main entry point"""
+    parser = argparse.ArgumentParser(description="Dynamic Agent System V2 (LangGraph Edition)")
+    commands = parser.add_subparsers(dest="command")
+    batch = commands.add_parser("batch", help="Process a JSONL file of requests without prompting")
+    batch.add_argument("input", help="JSONL file: one {\"id\", \"request\"} object or JSON string per line")
+    batch.add_argument("-o", "--output", default="-", help="JSONL results file (default: stdout)")
+    batch.add_argument("-w", "--workers", type=int, default=int(os.getenv("BATCH_WORKERS", "4")),
+                       help="Requests processed concurrently")
+    batch.add_argument("--pool", choices=("thread", "async"), default=os.getenv("BATCH_POOL", "thread"),
+                       help="Run requests on worker threads or as tasks on one event loop")
+    batch.add_argument("--policy", choices=SELECTION_POLICIES, default=os.getenv("BATCH_SELECTION_POLICY", "llm"),
+                       help="How to choose when a request matches several options")
+    serve = commands.add_parser("serve", help="Serve sessions over HTTP and WebSocket")
+    serve.add_argument("--host", default=os.getenv("AGENT_SERVER_HOST", "127.0.0.1"))
+    serve.add_argument("--port", type=int, default=int(os.getenv("AGENT_SERVER_PORT", "8100")))
+    serve.add_argument("--max-concurrent", type=int, default=int(os.getenv("AGENT_SERVER_MAX_CONCURRENT", "32")),
+                       help="Requests running at once; more are rejected with 503")
+    serve.add_argument("--max-sessions", type=int, default=int(os.getenv("AGENT_SERVER_MAX_SESSIONS", "1000")))
+    serve.add_argument("--policy", choices=SELECTION_POLICIES, default=os.getenv("AGENT_SERVER_POLICY", "llm"),
+                       help="Selection policy for HTTP requests (WebSocket clients choose themselves)")
+    args = parser.parse_args()
+    
     # Configuration
     CONFIG_DIR = os.path.join(Path(__file__).parent, "config", "workflows")
     BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000/api/v1")
     LLM_TYPE = os.getenv("LLM_TYPE", "openai")
+    ASYNC_HTTP = os.getenv("API_ASYNC", "false").lower() == "true"
+    ROUTING_STRATEGY = os.getenv("ROUTING_STRATEGY", "pipeline")
+    RELOAD_INTERVAL = float(os.getenv("WORKFLOW_RELOAD_INTERVAL", "2"))
+    CHECKPOINT_BACKEND = os.getenv("CHECKPOINT_BACKEND", "memory")
+    CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH", "checkpoints.sqlite")
+    SESSION_MEMORY = os.getenv("SESSION_MEMORY", "true").lower() == "true"
+    CASSETTE_MODE = os.getenv("CASSETTE_MODE", "off")
+    CASSETTE_PATH = os.getenv("CASSETTE_PATH", "session.cassette.jsonl.gz")
+    CASSETTE_LATENCY_SCALE = float(os.getenv("CASSETTE_LATENCY_SCALE", "1"))
+    METRICS_DUMP_PATH = os.getenv("METRICS_DUMP_PATH")
     
     # Create config directory if it doesn't exist
     os.makedirs(CONFIG_DIR, exist_ok=True)
     
+    if CHECKPOINT_BACKEND not in CHECKPOINT_BACKENDS + ("none",):
+        raise ValueError(f"Unknown CHECKPOINT_BACKEND: {CHECKPOINT_BACKEND}")
+    if CASSETTE_MODE not in CASSETTE_MODES + ("off",):
+        raise ValueError(f"Unknown CASSETTE_MODE: {CASSETTE_MODE}")
+    # Record every LLM call and API exchange of this run, or replay a recorded one offline
+    cassette = None if CASSETTE_MODE == "off" else Cassette(CASSETTE_PATH, CASSETTE_MODE, CASSETTE_LATENCY_SCALE)
+    if METRICS_DUMP_PATH and metrics.enabled:
+        # JSON summary of every metric, written when the process exits
+        atexit.register(metrics.dump, METRICS_DUMP_PATH)
+    
+    if args.command == "batch":
+        # Keep startup output off stdout, which may carry the results
+        with contextlib.redirect_stdout(sys.stderr):
+            system = DynamicAgentSystemV2(
+                config_dir=CONFIG_DIR,
+                base_url=BASE_URL,
+                llm_type=LLM_TYPE,
+                async_http=ASYNC_HTTP,
+                routing_strategy=ROUTING_STRATEGY,
+                cassette=cassette
+            )
+        summary = system.batch_mode(args.input, args.output, workers=args.workers, pool=args.pool,
+                                    policy=args.policy)
+        sys.exit(1 if summary["failed"] else 0)
+    
+    # Batch requests are independent; sessions (interactive, server) are checkpointed per thread
+    checkpointer = None if CHECKPOINT_BACKEND == "none" else create_checkpointer(CHECKPOINT_BACKEND, CHECKPOINT_PATH)
+    
+    if args.command == "serve":
+        import uvicorn
+        from agent_server import AgentServer, create_app
+        
+        # Sessions share the pooled async HTTP client
+        system = DynamicAgentSystemV2(
+            config_dir=CONFIG_DIR,
+            base_url=BASE_URL,
+            llm_type=LLM_TYPE,
+            async_http=True,
+            routing_strategy=ROUTING_STRATEGY,
+            reload_interval=RELOAD_INTERVAL,
+            checkpointer=checkpointer,
+            session_memory=SESSION_MEMORY,
+            cassette=cassette
+        )
+        server = AgentServer(
+            system,
+            max_concurrent=args.max_concurrent,
+            max_sessions=args.max_sessions,
+            session_ttl=float(os.getenv("AGENT_SERVER_SESSION_TTL", "1800")),
+            policy=args.policy,
+            prompt_timeout=float(os.getenv("AGENT_SERVER_PROMPT_TIMEOUT", "300"))
+        )
+        uvicorn.run(create_app(server), host=args.host, port=args.port)
+        return
+    
     # Initialize system
     system = DynamicAgentSystemV2(
         config_dir=CONFIG_DIR,
         base_url=BASE_URL,
-        llm_type=LLM_TYPE
+        llm_type=LLM_TYPE,
+        async_http=ASYNC_HTTP,
+        routing_strategy=ROUTING_STRATEGY,
+        reload_interval=RELOAD_INTERVAL,
+        checkpointer=checkpointer,
+        session_memory=SESSION_MEMORY,
+        cassette=cassette
     )
     
     # Run interactive mode
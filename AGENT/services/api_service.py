@@ -1,43 +1,187 @@
+import time
+import asyncio
+import weakref
 import requests
-from typing import Dict, Any, Optional
+import httpx
+from typing import Dict, Any, Optional, Tuple
 from abc import ABC, abstractmethod
+from urllib.parse import urlsplit
+from services.response_cache import ResponseCache
+from services.metrics_service import record_http
 
 class APIService(ABC):
     @abstractmethod
     def call(self, method: str, url: str, **kwargs) -> Dict[str, Any]:
         pass
 
+class AsyncAPIService(ABC):
+    @abstractmethod
+    async def call(self, method: str, url: str, **kwargs) -> Dict[str, Any]:
+        pass
+
+def _cache_lookup(cache: Optional[ResponseCache], method: str, full_url: str, params: Optional[Dict],
+                  cache_ttl: Optional[float]) -> Tuple[Optional[str], float, Optional[Any]]:
+    """Return (cache_key, ttl, cached_response); cache_key is None when the call is not cacheable"""
+    # Only GETs are cached; cache_ttl overrides the cache's default TTL for this endpoint.
+    # GETs without a TTL still get a key so their ETag can be stored for revalidation.
+    if cache is None or method.upper() != "GET":
+        return None, 0, None
+    ttl = cache.default_ttl if cache_ttl is None else cache_ttl
+    cache_key = ResponseCache.make_key(method, full_url, params)
+    return cache_key, ttl, cache.get(cache_key) if ttl > 0 else None
+
+def _conditional_headers(cache: Optional[ResponseCache], cache_key: Optional[str],
+                         headers: Optional[Dict]) -> Tuple[Dict, Optional[str]]:
+    """Request headers plus If-None-Match when a stored ETag can be revalidated"""
+    headers = dict(headers or {})
+    etag = cache.validator(cache_key) if cache_key is not None else None
+    if etag is not None:
+        headers["If-None-Match"] = etag
+    return headers, etag
+
+def _read_response(cache: Optional[ResponseCache], cache_key: Optional[str], ttl: float, response: Any,
+                   etag: Optional[str]) -> Any:
+    """Parse a requests/httpx response, reusing the stored value on 304 and keeping the new ETag"""
+    if response.status_code == 304 and etag is not None:
+        stored = cache.revalidate(cache_key, ttl)
+        if stored is not None:
+            return stored
+    response.raise_for_status()
+    result = response.json()
+    if cache_key is not None:
+        cache.set(cache_key, result, ttl, etag=response.headers.get("ETag"), text=response.text)
+    return result
+
 class HTTPAPIService(APIService):
-    def __init__(self, base_url: str = "", timeout: int = 30):
+    def __init__(self, base_url: str = "", timeout: int = 30, cache: Optional[ResponseCache] = None,
+                 adapter: Optional[requests.adapters.HTTPAdapter] = None):
         self.base_url = base_url
         self.timeout = timeout
         self.session = requests.Session()
+        if adapter is not None:
+            # e.g. a cassette adapter recording or replaying every exchange
+            self.session.mount("http://", adapter)
+            self.session.mount("https://", adapter)
+        self.cache = cache
     
-    def call(self, method: str, url: str, params: Optional[Dict] = None, 
-             json: Optional[Dict] = None, headers: Optional[Dict] = None) -> Dict[str, Any]:
+    def call(self, method: str, url: str, params: Optional[Dict] = None,
+             json: Optional[Dict] = None, headers: Optional[Dict] = None,
+             cache_ttl: Optional[float] = None, template: Optional[str] = None) -> Dict[str, Any]:
+        # template is the endpoint before its parameters were filled; it names the metrics series
         full_url = f"{self.base_url}{url}" if not url.startswith("http") else url
-        response = self.session.request(
-            method=method.upper(),
-            url=full_url,
-            params=params,
-            json=json,
-            headers=headers or {},
-            timeout=self.timeout
+        cache_key, ttl, cached = _cache_lookup(self.cache, method, full_url, params, cache_ttl)
+        if cached is not None:
+            return cached
+        headers, etag = _conditional_headers(self.cache, cache_key, headers)
+        
+        started, status = time.perf_counter(), "error"
+        try:
+            response = self.session.request(
+                method=method.upper(),
+                url=full_url,
+                params=params,
+                json=json,
+                headers=headers,
+                timeout=self.timeout
+            )
+            status = response.status_code
+        finally:
+            record_http(method, template or url, status, time.perf_counter() - started)
+        return _read_response(self.cache, cache_key, ttl, response, etag)
+    
+    def get(self, url: str, params: Optional[Dict] = None, cache_ttl: Optional[float] = None,
+            template: Optional[str] = None) -> Dict[str, Any]:
+        return self.call("GET", url, params=params, cache_ttl=cache_ttl, template=template)
+    
+    def post(self, url: str, json: Optional[Dict] = None, template: Optional[str] = None) -> Dict[str, Any]:
+        return self.call("POST", url, json=json, template=template)
+    
+    def put(self, url: str, json: Optional[Dict] = None, template: Optional[str] = None) -> Dict[str, Any]:
+        return self.call("PUT", url, json=json, template=template)
+    
+    def patch(self, url: str, json: Optional[Dict] = None, template: Optional[str] = None) -> Dict[str, Any]:
+        return self.call("PATCH", url, json=json, template=template)
+    
+    def delete(self, url: str, template: Optional[str] = None) -> Dict[str, Any]:
+        return self.call("DELETE", url, template=template)
+
+class AsyncHTTPAPIService(AsyncAPIService):
+    """Non-blocking API client backed by a bounded keep-alive connection pool
+    
+    httpx pools are bound to the event loop that created them, so one pool (and one
+    set of per-host limits) is kept per running loop.
+    """
+    
+    def __init__(self, base_url: str = "", timeout: int = 30, cache: Optional[ResponseCache] = None,
+                 max_connections: int = 100, max_keepalive_connections: int = 20,
+                 max_connections_per_host: int = 20, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.cache = cache
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections
         )
-        response.raise_for_status()
-        return response.json()
+        self.max_connections_per_host = max_connections_per_host
+        # e.g. httpx.ASGITransport to call an in-process app instead of the network
+        self.transport = transport
+        self._pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Tuple[httpx.AsyncClient, Dict[str, asyncio.Semaphore]]]" = weakref.WeakKeyDictionary()
+    
+    def _pool(self) -> Tuple[httpx.AsyncClient, Dict[str, asyncio.Semaphore]]:
+        loop = asyncio.get_running_loop()
+        if loop not in self._pools:
+            self._pools[loop] = (httpx.AsyncClient(timeout=self.timeout, limits=self.limits,
+                                                   transport=self.transport), {})
+        return self._pools[loop]
+    
+    async def call(self, method: str, url: str, params: Optional[Dict] = None,
+                   json: Optional[Dict] = None, headers: Optional[Dict] = None,
+                   cache_ttl: Optional[float] = None, template: Optional[str] = None) -> Dict[str, Any]:
+        full_url = f"{self.base_url}{url}" if not url.startswith("http") else url
+        cache_key, ttl, cached = _cache_lookup(self.cache, method, full_url, params, cache_ttl)
+        if cached is not None:
+            return cached
+        headers, etag = _conditional_headers(self.cache, cache_key, headers)
+        
+        client, host_limits = self._pool()
+        host = urlsplit(full_url).netloc
+        if host not in host_limits:
+            host_limits[host] = asyncio.Semaphore(self.max_connections_per_host)
+        
+        started, status = time.perf_counter(), "error"
+        try:
+            async with host_limits[host]:
+                response = await client.request(
+                    method=method.upper(),
+                    url=full_url,
+                    params=params,
+                    json=json,
+                    headers=headers
+                )
+            status = response.status_code
+        finally:
+            # Includes the wait for a per-host connection slot
+            record_http(method, template or url, status, time.perf_counter() - started)
+        return _read_response(self.cache, cache_key, ttl, response, etag)
+    
+    async def get(self, url: str, params: Optional[Dict] = None, cache_ttl: Optional[float] = None,
+                  template: Optional[str] = None) -> Dict[str, Any]:
+        return await self.call("GET", url, params=params, cache_ttl=cache_ttl, template=template)
     
-    def get(self, url: str, params: Optional[Dict] = None) -> Dict[str, Any]:
-        return self.call("GET", url, params=params)
+    async def post(self, url: str, json: Optional[Dict] = None, template: Optional[str] = None) -> Dict[str, Any]:
+        return await self.call("POST", url, json=json, template=template)
     
-    def post(self, url: str, json: Optional[Dict] = None) -> Dict[str, Any]:
-        return self.call("POST", url, json=json)
+    async def put(self, url: str, json: Optional[Dict] = None, template: Optional[str] = None) -> Dict[str, Any]:
+        return await self.call("PUT", url, json=json, template=template)
     
-    def put(self, url: str, json: Optional[Dict] = None) -> Dict[str, Any]:
-        return self.call("PUT", url, json=json)
+    async def patch(self, url: str, json: Optional[Dict] = None, template: Optional[str] = None) -> Dict[str, Any]:
+        return await self.call("PATCH", url, json=json, template=template)
     
-    def patch(self, url: str, json: Optional[Dict] = None) -> Dict[str, Any]:
-        return self.call("PATCH", url, json=json)
+    async def delete(self, url: str, template: Optional[str] = None) -> Dict[str, Any]:
+        return await self.call("DELETE", url, template=template)
     
-    def delete(self, url: str) -> Dict[str, Any]:
-        return self.call("DELETE", url)
+    async def aclose(self) -> None:
+        """Close the connection pool of the current event loop"""
+        pool = self._pools.pop(asyncio.get_running_loop(), None)
+        if pool is not None:
+            await pool[0].aclose()
@@ -0,0 +1,311 @@
+import os
+import gzip
+import json
+import time
+import asyncio
+import threading
+import weakref
+import requests
+import httpx
+from collections import Counter
+from requests.structures import CaseInsensitiveDict
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import parse_qsl, unquote, urlsplit
+from services.llm_service import LLMService
+from services.llm_cache import LLMResponseCache
+
+CASSETTE_MODES = ("record", "replay")
+
+# Response headers worth keeping; the rest only make cassettes bigger
+_KEPT_HEADERS = ("content-type", "etag", "cache-control", "retry-after")
+# Describe the wire encoding of a body that has already been decoded
+_WIRE_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay when the cassette holds no recording of a call"""
+
+
+class Cassette:
+    """Recorded LLM calls, HTTP exchanges and user requests of a session, with timings
+    
+    In record mode every call is appended (with its wall time) and the cassette is
+    written to path by save(), as gzip-compressed JSON lines. In replay mode calls are
+    answered from the recording: an LLM call by method, prompt and arguments, an HTTP
+    request by method, path, query and body. Repeated identical calls get their recorded
+    answers in order, the last one repeating once they run out. Replayed calls wait
+    latency_scale times their recorded duration (0 replays without delays).
+    """
+    
+    def __init__(self, path: str, mode: str = "record", latency_scale: float = 1.0):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unknown cassette mode: {mode} (expected one of {', '.join(CASSETTE_MODES)})")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.entries: List[Dict[str, Any]] = []
+        self._started = time.time()
+        self._lock = threading.Lock()
+        self._recorded: Dict[str, List[Dict[str, Any]]] = {}
+        self._played: Dict[str, int] = {}
+        if mode == "replay":
+            self._load()
+    
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+    
+    @property
+    def user_requests(self) -> List[str]:
+        """User requests in the order they were recorded"""
+        return [entry["input"] for entry in self.entries if entry["kind"] == "request"]
+    
+    def _load(self) -> None:
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                if entry.get("kind") == "header":
+                    continue
+                self.entries.append(entry)
+                if "key" in entry:
+                    self._recorded.setdefault(entry["key"], []).append(entry)
+    
+    def save(self) -> None:
+        """Write the recording (record mode only); the file is replaced atomically"""
+        if not self.recording:
+            return
+        with self._lock:
+            entries = list(self.entries)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            f.write(json.dumps({"kind": "header", "version": 1, "started_at": self._started}) + "\n")
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+        os.replace(tmp, self.path)
+    
+    def _append(self, entry: Dict[str, Any]) -> None:
+        entry["t"] = round(time.time() - self._started, 6)
+        with self._lock:
+            self.entries.append(entry)
+    
+    def record_request(self, user_input: str) -> None:
+        """Mark the start of a user request so replays can re-issue the session's requests"""
+        if self.recording:
+            self._append({"kind": "request", "input": user_input})
+    
+    def record(self, kind: str, key: str, elapsed: float, **fields: Any) -> None:
+        self._append({"kind": kind, "key": key, "elapsed": round(elapsed, 6), **fields})
+    
+    def play(self, key: str, accept: Optional[Callable[[Dict[str, Any]], bool]] = None) -> Dict[str, Any]:
+        """Next recorded entry for key (that accept allows); raises CassetteMiss when there is none"""
+        entries = [entry for entry in self._recorded.get(key, ()) if accept is None or accept(entry)]
+        if not entries:
+            raise CassetteMiss(f"No recording in {self.path} for this call (key {key[:12]})")
+        with self._lock:
+            played = self._played.get(key, 0)
+            self._played[key] = played + 1
+        return entries[min(played, len(entries) - 1)]
+    
+    def delay(self, entry: Dict[str, Any]) -> float:
+        return entry.get("elapsed", 0) * self.latency_scale
+
+
+def llm_key(method: str, prompt: str, kwargs: Dict[str, Any]) -> str:
+    # The model is left out so a cassette replays whatever model name the service reports
+    return LLMResponseCache.make_key("", method, prompt, **kwargs)
+
+
+def _canonical_body(body: Optional[bytes]) -> str:
+    # Parameters are collected concurrently, so a JSON body's key order follows completion order
+    text = (body or b"").decode("utf-8", "replace")
+    try:
+        return json.dumps(json.loads(text), sort_keys=True)
+    except ValueError:
+        return text
+
+
+def http_key(method: str, url: str, body: Optional[bytes]) -> str:
+    # The host is left out so a cassette replays under any BASE_URL; requests and httpx
+    # encode query strings differently, so the decoded, sorted items are compared
+    parts = urlsplit(url)
+    query = sorted(parse_qsl(parts.query, keep_blank_values=True))
+    return LLMResponseCache.make_key("", method.upper(), unquote(parts.path),
+                                     query=query, body=_canonical_body(body))
+
+
+class RecordingLLMService(LLMService):
+    """Decorates an LLMService, recording every call's prompt, arguments, response and duration"""
+    
+    def __init__(self, service: LLMService, cassette: Cassette):
+        self.service = service
+        self.cassette = cassette
+        self.model = getattr(service, "model", service.__class__.__name__)
+    
+    def _record(self, method: str, prompt: str, kwargs: Dict[str, Any], started: float, result: Any) -> Any:
+        self.cassette.record("llm", llm_key(method, prompt, kwargs), time.perf_counter() - started,
+                             method=method, prompt=prompt, kwargs=kwargs, response=result)
+        return result
+    
+    def generate(self, prompt: str, **kwargs) -> str:
+        started = time.perf_counter()
+        return self._record("generate", prompt, kwargs, started, self.service.generate(prompt, **kwargs))
+    
+    def generate_structured(self, prompt: str, schema: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        started = time.perf_counter()
+        result = self.service.generate_structured(prompt, schema, **kwargs)
+        return self._record("generate_structured", prompt, dict(kwargs, schema=schema), started, result)
+    
+    def generate_tool_call(self, prompt: str, tools: List[Dict[str, Any]], **kwargs) -> Optional[Dict[str, Any]]:
+        started = time.perf_counter()
+        result = self.service.generate_tool_call(prompt, tools, **kwargs)
+        return self._record("generate_tool_call", prompt, dict(kwargs, tools=tools), started, result)
+    
+    async def agenerate(self, prompt: str, **kwargs) -> str:
+        started = time.perf_counter()
+        return self._record("generate", prompt, kwargs, started, await self.service.agenerate(prompt, **kwargs))
+    
+    async def agenerate_structured(self, prompt: str, schema: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        started = time.perf_counter()
+        result = await self.service.agenerate_structured(prompt, schema, **kwargs)
+        return self._record("generate_structured", prompt, dict(kwargs, schema=schema), started, result)
+    
+    async def agenerate_tool_call(self, prompt: str, tools: List[Dict[str, Any]], **kwargs) -> Optional[Dict[str, Any]]:
+        started = time.perf_counter()
+        result = await self.service.agenerate_tool_call(prompt, tools, **kwargs)
+        return self._record("generate_tool_call", prompt, dict(kwargs, tools=tools), started, result)
+
+
+class ReplayLLMService(LLMService):
+    """Answers LLM calls from a cassette instead of a provider (calls counts them by method)"""
+    
+    def __init__(self, cassette: Cassette):
+        self.cassette = cassette
+        self.model = "cassette"
+        self.calls: Counter = Counter()
+    
+    def _entry(self, method: str, prompt: str, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        self.calls[method] += 1
+        return self.cassette.play(llm_key(method, prompt, kwargs))
+    
+    def _play(self, method: str, prompt: str, kwargs: Dict[str, Any]) -> Any:
+        entry = self._entry(method, prompt, kwargs)
+        time.sleep(self.cassette.delay(entry))
+        return entry["response"]
+    
+    async def _aplay(self, method: str, prompt: str, kwargs: Dict[str, Any]) -> Any:
+        entry = self._entry(method, prompt, kwargs)
+        await asyncio.sleep(self.cassette.delay(entry))
+        return entry["response"]
+    
+    def generate(self, prompt: str, **kwargs) -> str:
+        return self._play("generate", prompt, kwargs)
+    
+    def generate_structured(self, prompt: str, schema: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        return self._play("generate_structured", prompt, dict(kwargs, schema=schema))
+    
+    def generate_tool_call(self, prompt: str, tools: List[Dict[str, Any]], **kwargs) -> Optional[Dict[str, Any]]:
+        return self._play("generate_tool_call", prompt, dict(kwargs, tools=tools))
+    
+    async def agenerate(self, prompt: str, **kwargs) -> str:
+        return await self._aplay("generate", prompt, kwargs)
+    
+    async def agenerate_structured(self, prompt: str, schema: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        return await self._aplay("generate_structured", prompt, dict(kwargs, schema=schema))
+    
+    async def agenerate_tool_call(self, prompt: str, tools: List[Dict[str, Any]], **kwargs) -> Optional[Dict[str, Any]]:
+        return await self._aplay("generate_tool_call", prompt, dict(kwargs, tools=tools))
+
+
+def _record_http(cassette: Cassette, method: str, url: str, body: Optional[bytes], etag: Optional[str],
+                 status: int, headers: Any, content: bytes, elapsed: float) -> None:
+    cassette.record(
+        "http", http_key(method, url, body), elapsed,
+        method=method, url=url, if_none_match=etag, status=status,
+        headers={name: headers[name] for name in _KEPT_HEADERS if name in headers},
+        content=content.decode("utf-8", "replace")
+    )
+
+
+def _play_http(cassette: Cassette, method: str, url: str, body: Optional[bytes],
+               etag: Optional[str]) -> Dict[str, Any]:
+    # A recorded 304 only answers a request revalidating the same ETag
+    return cassette.play(http_key(method, url, body),
+                         lambda entry: entry["status"] != 304 or entry.get("if_none_match") == etag)
+
+
+class CassetteAdapter(requests.adapters.HTTPAdapter):
+    """requests transport adapter that records exchanges to, or replays them from, a cassette"""
+    
+    def __init__(self, cassette: Cassette, **kwargs):
+        super().__init__(**kwargs)
+        self.cassette = cassette
+    
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        body = request.body.encode() if isinstance(request.body, str) else request.body
+        etag = request.headers.get("If-None-Match")
+        if self.cassette.recording:
+            started = time.perf_counter()
+            response = super().send(request, **kwargs)
+            _record_http(self.cassette, request.method, request.url, body, etag, response.status_code,
+                         response.headers, response.content, time.perf_counter() - started)
+            return response
+        
+        entry = _play_http(self.cassette, request.method, request.url, body, etag)
+        time.sleep(self.cassette.delay(entry))
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response._content = entry["content"].encode("utf-8")
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        return response
+
+
+class CassetteTransport(httpx.AsyncBaseTransport):
+    """httpx transport that records exchanges to, or replays them from, a cassette
+    
+    Recording forwards to transport, or to a pooled network transport per event loop
+    (httpx connections are bound to the loop that opened them) when none is given.
+    """
+    
+    def __init__(self, cassette: Cassette, transport: Optional[httpx.AsyncBaseTransport] = None,
+                 limits: Optional[httpx.Limits] = None):
+        self.cassette = cassette
+        self.transport = transport
+        self.limits = limits or httpx.Limits()
+        self._transports: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncHTTPTransport]" = weakref.WeakKeyDictionary()
+    
+    def _inner(self) -> httpx.AsyncBaseTransport:
+        if self.transport is not None:
+            return self.transport
+        loop = asyncio.get_running_loop()
+        if loop not in self._transports:
+            self._transports[loop] = httpx.AsyncHTTPTransport(limits=self.limits)
+        return self._transports[loop]
+    
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        url = str(request.url)
+        etag = request.headers.get("If-None-Match")
+        if self.cassette.recording:
+            started = time.perf_counter()
+            response = await self._inner().handle_async_request(request)
+            content = await response.aread()
+            _record_http(self.cassette, request.method, url, body, etag, response.status_code,
+                         response.headers, content, time.perf_counter() - started)
+            headers = [(name, value) for name, value in response.headers.items() if name.lower() not in _WIRE_HEADERS]
+            return httpx.Response(response.status_code, headers=headers, content=content, request=request)
+        
+        entry = _play_http(self.cassette, request.method, url, body, etag)
+        await asyncio.sleep(self.cassette.delay(entry))
+        return httpx.Response(entry["status"], headers=entry["headers"], content=entry["content"].encode("utf-8"),
+                              request=request)
+    
+    async def aclose(self) -> None:
+        transport = self._transports.pop(asyncio.get_running_loop(), None) or self.transport
+        if transport is not None:
+            await transport.aclose()
@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, List, Optional
+from services.llm_service import LLMService
+
+
+class LLMResponseCache:
+    """Exact-match LLM response store in SQLite, evicting least recently used entries past max_bytes"""
+    
+    def __init__(self, path: str = ":memory:", max_bytes: int = 50 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        
+        directory = os.path.dirname(path) if path != ":memory:" else ""
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_responses_access ON llm_responses (last_access)")
+        self._conn.commit()
+    
+    @staticmethod
+    def make_key(model: str, method: str, prompt: str, **kwargs) -> str:
+        """Hash model, method, prompt and call kwargs (including any schema) into a cache key"""
+        payload = json.dumps([model, method, prompt, kwargs], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM llm_responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE llm_responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+            return json.loads(row[0])
+    
+    def set(self, key: str, value: Any) -> None:
+        encoded = json.dumps(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, encoded, len(encoded), time.time())
+            )
+            self._evict()
+            self._conn.commit()
+    
+    def _evict(self) -> None:
+        """Drop least recently used entries until the store fits in max_bytes"""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute(
+                "SELECT key, size FROM llm_responses ORDER BY last_access").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+            total -= size
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_responses")
+            self._conn.commit()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_responses").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes
+        }
+    
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CachedLLMService(LLMService):
+    """Decorates an LLMService with an exact-match response cache
+    
+    Only deterministic calls are cached: a call is cacheable when it passes
+    temperature <= 0 explicitly, since provider defaults sample at temperature > 0.
+    """
+    
+    def __init__(self, service: LLMService, cache: LLMResponseCache):
+        self.service = service
+        self.cache = cache
+        self.model = getattr(service, "model", service.__class__.__name__)
+    
+    def _key(self, method: str, prompt: str, kwargs: Dict[str, Any]) -> Optional[str]:
+        temperature = kwargs.get("temperature")
+        if temperature is None or temperature > 0:
+            return None
+        return LLMResponseCache.make_key(self.model, method, prompt, **kwargs)
+    
+    def generate(self, prompt: str, **kwargs) -> str:
+        key = self._key("generate", prompt, kwargs)
+        cached = self.cache.get(key) if key else None
+        if cached is not None:
+            return cached
+        result = self.service.generate(prompt, **kwargs)
+        if key:
+            self.cache.set(key, result)
+        return result
+    
+    def generate_structured(self, prompt: str, schema: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        key = self._key("generate_structured", prompt, dict(kwargs, schema=schema))
+        cached = self.cache.get(key) if key else None
+        if cached is not None:
+            return cached
+        result = self.service.generate_structured(prompt, schema, **kwargs)
+        if key:
+            self.cache.set(key, result)
+        return result
+    
+    async def agenerate(self, prompt: str, **kwargs) -> str:
+        key = self._key("generate", prompt, kwargs)
+        cached = self.cache.get(key) if key else None
+        if cached is not None:
+            return cached
+        result = await self.service.agenerate(prompt, **kwargs)
+        if key:
+            self.cache.set(key, result)
+        return result
+    
+    async def agenerate_structured(self, prompt: str, schema: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        key = self._key("generate_structured", prompt, dict(kwargs, schema=schema))
+        cached = self.cache.get(key) if key else None
+        if cached is not None:
+            return cached
+        result = await self.service.agenerate_structured(prompt, schema, **kwargs)
+        if key:
+            self.cache.set(key, result)
+        return result
+    
+    def generate_tool_call(self, prompt: str, tools: List[Dict[str, Any]], **kwargs) -> Optional[Dict[str, Any]]:
+        key = self._key("generate_tool_call", prompt, dict(kwargs, tools=tools))
+        cached = self.cache.get(key) if key else None
+        if cached is not None:
+            return cached
+        result = self.service.generate_tool_call(prompt, tools, **kwargs)
+        if key and result is not None:
+            self.cache.set(key, result)
+        return result
+    
+    async def agenerate_tool_call(self, prompt: str, tools: List[Dict[str, Any]], **kwargs) -> Optional[Dict[str, Any]]:
+        key = self._key("generate_tool_call", prompt, dict(kwargs, tools=tools))
+        cached = self.cache.get(key) if key else None
+        if cached is not None:
+            return cached
+        result = await self.service.agenerate_tool_call(prompt, tools, **kwargs)
+        if key and result is not None:
+            self.cache.set(key, result)
+        return result
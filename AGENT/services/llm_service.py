@@ -1,7 +1,11 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 import os
+import json
+import time
+import asyncio
 from functools import wraps
+from services.metrics_service import metrics, llm_call_type, record_llm_usage
 
 class LLMService(ABC):
     @abstractmethod
@@ -9,26 +13,83 @@ class LLMService(ABC):
         pass
     
     @abstractmethod
-    def generate_structured(self, prompt: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+    def generate_structured(self, prompt: str, schema: Dict[str, Any], **kwargs) -> Dict[str, Any]:
         pass
+    
+    async def agenerate(self, prompt: str, **kwargs) -> str:
+        """Async generate; providers without a native async client run generate on a worker thread"""
+        return await asyncio.to_thread(self.generate, prompt, **kwargs)
+    
+    async def agenerate_structured(self, prompt: str, schema: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.generate_structured, prompt, schema, **kwargs)
+    
+    def generate_tool_call(self, prompt: str, tools: List[Dict[str, Any]], **kwargs) -> Optional[Dict[str, Any]]:
+        """Pick one tool and fill its arguments; returns {"name", "arguments"} or None
+        
+        Providers without native tool calling emulate it with generate_structured.
+        """
+        schema, tool_prompt = _tool_call_request(prompt, tools)
+        result = self.generate_structured(tool_prompt, schema, **kwargs)
+        return _parse_tool_choice(result, tools)
+    
+    async def agenerate_tool_call(self, prompt: str, tools: List[Dict[str, Any]], **kwargs) -> Optional[Dict[str, Any]]:
+        schema, tool_prompt = _tool_call_request(prompt, tools)
+        result = await self.agenerate_structured(tool_prompt, schema, **kwargs)
+        return _parse_tool_choice(result, tools)
+
+def _tool_call_request(prompt: str, tools: List[Dict[str, Any]]):
+    """Schema and prompt that emulate a tool call with structured output"""
+    functions = [tool["function"] for tool in tools]
+    schema = {
+        "type": "object",
+        "properties": {
+            "tool": {"type": ["string", "null"], "enum": [f["name"] for f in functions] + [None]},
+            "arguments": {"type": "object"}
+        },
+        "required": ["tool", "arguments"]
+    }
+    tool_prompt = f"""{prompt}
+
+Available tools:
+{json.dumps(functions, indent=2)}
+
+Return the name of the single best tool in "tool" (null if none applies) and its arguments in "arguments"."""
+    return schema, tool_prompt
+
+def _parse_tool_choice(result: Any, tools: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    names = {tool["function"]["name"] for tool in tools}
+    if not isinstance(result, dict) or result.get("tool") not in names:
+        return None
+    arguments = result.get("arguments")
+    return {"name": result["tool"], "arguments": arguments if isinstance(arguments, dict) else {}}
+
+def _traced_llm_func(self, func):
+    if os.getenv("LANGSMITH_TRACING", "false").lower() == "true":
+        try:
+            from langsmith import traceable
+            return traceable(name=f"{self.__class__.__name__}.{func.__name__}")(func)
+        except ImportError:
+            pass
+    return func
 
 def trace_llm_call(func):
+    if asyncio.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(self, prompt: str, *args, **kwargs):
+            return await _traced_llm_func(self, func)(self, prompt, *args, **kwargs)
+        return async_wrapper
+    
     @wraps(func)
-    def wrapper(self, prompt: str, **kwargs):
-        if os.getenv("LANGSMITH_TRACING", "false").lower() == "true":
-            try:
-                from langsmith import traceable
-                traced_func = traceable(name=f"{self.__class__.__name__}.{func.__name__}")(func)
-                return traced_func(self, prompt, **kwargs)
-            except ImportError:
-                pass
-        return func(self, prompt, **kwargs)
+    def wrapper(self, prompt: str, *args, **kwargs):
+        return _traced_llm_func(self, func)(self, prompt, *args, **kwargs)
     return wrapper
 
 class OpenAIService(LLMService):
     def __init__(self, api_key: str = None, model: str = "gpt-4"):
-        from openai import OpenAI
-        self.client = OpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"))
+        from openai import OpenAI, AsyncOpenAI
+        api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.client = OpenAI(api_key=api_key)
+        self.async_client = AsyncOpenAI(api_key=api_key)
         self.model = model
     
     @trace_llm_call
@@ -38,17 +99,132 @@ class OpenAIService(LLMService):
             messages=[{"role": "user", "content": prompt}],
             **kwargs
         )
+        record_llm_usage(response.usage)
         return response.choices[0].message.content
     
     @trace_llm_call
-    def generate_structured(self, prompt: str, schema: Dict[str, Any]) -> Dict[str, Any]:
-        import json
+    def generate_structured(self, prompt: str, schema: Dict[str, Any], **kwargs) -> Dict[str, Any]:
         response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": f"Respond only with a JSON object matching this JSON schema:\n{json.dumps(schema)}"},
+                {"role": "user", "content": prompt}
+            ],
+            response_format={"type": "json_object"},
+            **kwargs
+        )
+        record_llm_usage(response.usage)
+        return json.loads(response.choices[0].message.content)
+    
+    @trace_llm_call
+    async def agenerate(self, prompt: str, **kwargs) -> str:
+        response = await self.async_client.chat.completions.create(
             model=self.model,
             messages=[{"role": "user", "content": prompt}],
-            response_format={"type": "json_object"}
+            **kwargs
+        )
+        record_llm_usage(response.usage)
+        return response.choices[0].message.content
+    
+    @trace_llm_call
+    async def agenerate_structured(self, prompt: str, schema: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        response = await self.async_client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": f"Respond only with a JSON object matching this JSON schema:\n{json.dumps(schema)}"},
+                {"role": "user", "content": prompt}
+            ],
+            response_format={"type": "json_object"},
+            **kwargs
         )
+        record_llm_usage(response.usage)
         return json.loads(response.choices[0].message.content)
+    
+    @staticmethod
+    def _tool_choice(response) -> Optional[Dict[str, Any]]:
+        tool_calls = response.choices[0].message.tool_calls
+        if not tool_calls:
+            return None
+        call = tool_calls[0].function
+        try:
+            arguments = json.loads(call.arguments or "{}")
+        except ValueError:
+            arguments = {}
+        return {"name": call.name, "arguments": arguments}
+    
+    @trace_llm_call
+    def generate_tool_call(self, prompt: str, tools: List[Dict[str, Any]], **kwargs) -> Optional[Dict[str, Any]]:
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            tools=tools,
+            tool_choice="auto",
+            **kwargs
+        )
+        record_llm_usage(response.usage)
+        return self._tool_choice(response)
+    
+    @trace_llm_call
+    async def agenerate_tool_call(self, prompt: str, tools: List[Dict[str, Any]], **kwargs) -> Optional[Dict[str, Any]]:
+        response = await self.async_client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            tools=tools,
+            tool_choice="auto",
+            **kwargs
+        )
+        record_llm_usage(response.usage)
+        return self._tool_choice(response)
+
+class MeteredLLMService(LLMService):
+    """Decorates an LLMService, timing every call by method and call type"""
+    
+    def __init__(self, service: LLMService):
+        self.service = service
+        self.model = getattr(service, "model", service.__class__.__name__)
+    
+    def _timed(self, method: str, started: float, failed: bool = False) -> None:
+        metrics.observe("agent_llm_call_seconds", "LLM call latency by method and call type",
+                        time.perf_counter() - started, method=method, call_type=llm_call_type(),
+                        outcome="error" if failed else "ok")
+    
+    def _call(self, method: str, *args, **kwargs) -> Any:
+        started = time.perf_counter()
+        try:
+            result = getattr(self.service, method)(*args, **kwargs)
+        except Exception:
+            self._timed(method, started, failed=True)
+            raise
+        self._timed(method, started)
+        return result
+    
+    async def _acall(self, method: str, *args, **kwargs) -> Any:
+        started = time.perf_counter()
+        try:
+            result = await getattr(self.service, f"a{method}")(*args, **kwargs)
+        except Exception:
+            self._timed(method, started, failed=True)
+            raise
+        self._timed(method, started)
+        return result
+    
+    def generate(self, prompt: str, **kwargs) -> str:
+        return self._call("generate", prompt, **kwargs)
+    
+    def generate_structured(self, prompt: str, schema: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        return self._call("generate_structured", prompt, schema, **kwargs)
+    
+    def generate_tool_call(self, prompt: str, tools: List[Dict[str, Any]], **kwargs) -> Optional[Dict[str, Any]]:
+        return self._call("generate_tool_call", prompt, tools, **kwargs)
+    
+    async def agenerate(self, prompt: str, **kwargs) -> str:
+        return await self._acall("generate", prompt, **kwargs)
+    
+    async def agenerate_structured(self, prompt: str, schema: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        return await self._acall("generate_structured", prompt, schema, **kwargs)
+    
+    async def agenerate_tool_call(self, prompt: str, tools: List[Dict[str, Any]], **kwargs) -> Optional[Dict[str, Any]]:
+        return await self._acall("generate_tool_call", prompt, tools, **kwargs)
 
 class LLMServiceFactory:
     @staticmethod
@@ -0,0 +1,277 @@
+import os
+import json
+import time
+import threading
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+from services.tracing_service import tracing_service
+
+# Seconds; from in-memory steps (sub-millisecond) up to slow LLM calls
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# Label sets past this many per metric are folded into one "other" series
+MAX_SERIES = 500
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    type = "untyped"
+    
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...], lock: threading.Lock):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._lock = lock
+        self._series: Dict[Labels, Any] = {}
+    
+    def _key(self, labels: Dict[str, Any]) -> Labels:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        if key not in self._series and len(self._series) >= MAX_SERIES:
+            return ("other",) * len(self.labelnames)
+        return key
+    
+    def _label_string(self, key: Labels) -> str:
+        return ",".join(f"{name}={value}" for name, value in zip(self.labelnames, key)) or "total"
+
+
+class Counter(_Metric):
+    type = "counter"
+    
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        with self._lock:
+            key = self._key(labels)
+            self._series[key] = self._series.get(key, 0) + amount
+    
+    def _items(self) -> List[Tuple[Labels, float]]:
+        with self._lock:
+            return sorted(self._series.items())
+    
+    def render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_number(value)}"
+                for key, value in self._items()]
+    
+    def summary(self) -> Dict[str, Any]:
+        return {self._label_string(key): value for key, value in self._items()}
+
+
+class Histogram(_Metric):
+    type = "histogram"
+    
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...], lock: threading.Lock,
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames, lock)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+    
+    def observe(self, value: float, **labels: Any) -> None:
+        with self._lock:
+            key = self._key(labels)
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket (not cumulative) counts, then sum
+                series = self._series[key] = [[0] * len(self.buckets), 0.0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+    
+    def _items(self) -> List[Tuple[Labels, List[int], float]]:
+        with self._lock:
+            return [(key, list(counts), total) for key, (counts, total) in sorted(self._series.items())]
+    
+    def render(self) -> List[str]:
+        lines = []
+        for key, counts, total in self._items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = f'le="{_format_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_number(round(total, 6))}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+    
+    def _quantile(self, counts: List[int], q: float) -> float:
+        """Estimate a quantile by interpolating within its bucket, like Prometheus' histogram_quantile"""
+        rank = q * sum(counts)
+        cumulative = 0
+        for index, count in enumerate(counts):
+            if count and cumulative + count >= rank:
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index]
+                if upper == float("inf"):
+                    return lower
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return 0.0
+    
+    def summary(self) -> Dict[str, Any]:
+        result = {}
+        for key, counts, total in self._items():
+            count = sum(counts)
+            result[self._label_string(key)] = {
+                "count": count,
+                "sum_s": round(total, 6),
+                "mean_ms": round(total / count * 1000, 3) if count else 0.0,
+                **{f"p{int(q * 100)}_ms": round(self._quantile(counts, q) * 1000, 3) for q in (0.5, 0.95, 0.99)}
+            }
+        return result
+
+
+class _Collected(_Metric):
+    """Values read from a callback at export time (cache stats, server load)"""
+    
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...], lock: threading.Lock,
+                 type: str, read: Callable[[], Dict[Labels, float]]):
+        super().__init__(name, help, labelnames, lock)
+        self.type = type
+        self.read = read
+    
+    def _values(self) -> Dict[Labels, float]:
+        try:
+            return self.read()
+        except Exception:
+            # A collector of a closed cache must not break the export
+            return {}
+    
+    def render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_number(value)}"
+                for key, value in sorted(self._values().items())]
+    
+    def summary(self) -> Dict[str, Any]:
+        return {self._label_string(key): value for key, value in sorted(self._values().items())}
+
+
+class MetricsRegistry:
+    """In-process counters and latency histograms, exported as Prometheus text or a JSON summary
+    
+    Metrics are created on first use and shared by name, so any module can record
+    into them. Recording is a dict update under one lock; with METRICS_ENABLED=false
+    nothing is recorded at all.
+    """
+    
+    def __init__(self):
+        self.enabled = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+        if self.enabled:
+            # Every traced call (graph nodes, supervisor steps) lands in one histogram
+            tracing_service.observe(self._observe_node)
+    
+    def _get(self, cls, name: str, help: str, labelnames: Iterable[str], **kwargs) -> Any:
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(name)
+                if metric is None:
+                    metric = self._metrics[name] = cls(name, help, tuple(labelnames), self._lock, **kwargs)
+        return metric
+    
+    def counter(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._get(Counter, name, help, labelnames)
+    
+    def histogram(self, name: str, help: str, labelnames: Iterable[str] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help, labelnames, buckets=buckets)
+    
+    def register_collector(self, name: str, help: str, labelnames: Iterable[str], read: Callable[[], Dict[Labels, float]],
+                           type: str = "gauge") -> None:
+        """Export read()'s {label values: value} under name; registering a name again replaces it"""
+        with self._lock:
+            self._metrics[name] = _Collected(name, help, tuple(labelnames), self._lock, type, read)
+    
+    def inc(self, name: str, help: str, amount: float = 1, **labels: Any) -> None:
+        if self.enabled:
+            self.counter(name, help, labels).inc(amount, **labels)
+    
+    def observe(self, name: str, help: str, seconds: float, **labels: Any) -> None:
+        if self.enabled:
+            self.histogram(name, help, labels).observe(seconds, **labels)
+    
+    def _observe_node(self, name: str, seconds: float) -> None:
+        self.observe("agent_node_seconds", "Wall time of traced graph nodes and agent steps", seconds, node=name)
+    
+    def _snapshot(self) -> List[_Metric]:
+        with self._lock:
+            return [self._metrics[name] for name in sorted(self._metrics)]
+    
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for metric in self._snapshot():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+    
+    def summary(self) -> Dict[str, Any]:
+        """All metrics as JSON-ready dicts; histograms give count, sum and estimated percentiles"""
+        metrics = {}
+        for metric in self._snapshot():
+            metrics[metric.name] = {"type": metric.type, "help": metric.help, "values": metric.summary()}
+        return {"started_at": self.started_at, "uptime_s": round(time.time() - self.started_at, 3),
+                "metrics": metrics}
+    
+    def dump(self, path: str) -> None:
+        """Write summary() to path as JSON"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+            f.write("\n")
+    
+    def reset(self) -> None:
+        """Drop every recorded value (collectors stay registered)"""
+        with self._lock:
+            for metric in self._metrics.values():
+                if not isinstance(metric, _Collected):
+                    metric._series.clear()
+
+
+metrics = MetricsRegistry()
+
+
+def llm_call_type() -> str:
+    """What an LLM call is for: the innermost traced step making it (match_workflow, collect_parameters, ...)"""
+    return tracing_service.current_span() or "other"
+
+
+def record_llm_usage(usage: Any) -> None:
+    """Count the prompt and completion tokens of a provider response's usage block"""
+    if usage is None or not metrics.enabled:
+        return
+    call_type = llm_call_type()
+    for kind in ("prompt", "completion"):
+        tokens = getattr(usage, f"{kind}_tokens", None)
+        if tokens:
+            metrics.inc("agent_llm_tokens_total", "LLM tokens by call type and kind", tokens,
+                        call_type=call_type, kind=kind)
+
+
+def record_http(method: str, endpoint: str, status: Any, seconds: float) -> None:
+    """Latency of one downstream API request, by method, endpoint and status
+    
+    endpoint should be the workflow's template ("/identifier/{id}"), not the filled path,
+    so that path parameters do not make a series per value; its query string is dropped.
+    """
+    if not metrics.enabled:
+        return
+    endpoint = endpoint.split("?", 1)[0]
+    if "://" in endpoint:
+        endpoint = "/" + endpoint.split("://", 1)[1].partition("/")[2]
+    metrics.observe("agent_http_request_seconds", "Downstream API request latency", seconds,
+                    method=method.upper(), endpoint=endpoint, status=str(status))
+
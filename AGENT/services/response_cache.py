@@ -0,0 +1,139 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+
+class ResponseCache:
+    """Size-bounded LRU cache of API responses with per-entry TTL and optional disk persistence
+    
+    Entries stored with an ETag outlive their TTL as validators: the client can send
+    If-None-Match and reuse the stored value on a 304 instead of downloading it again.
+    Values are kept as JSON text and parsed on every hit, so callers get their own copy
+    to modify (parsing is several times faster than deep-copying the stored object).
+    """
+    
+    def __init__(self, max_entries: int = 512, default_ttl: float = 0, persist_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.persist_path = persist_path
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self._entries: "OrderedDict[str, Tuple[str, float, Optional[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        
+        if persist_path and os.path.exists(persist_path):
+            self._load()
+    
+    @staticmethod
+    def make_key(method: str, url: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """Build a cache key from method, URL and normalized query params"""
+        normalized = sorted((str(k), str(v)) for k, v in (params or {}).items() if v is not None)
+        return json.dumps([method.upper(), url, normalized], separators=(",", ":"))
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Return a fresh cached response, or None on miss/expiry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.time():
+                if entry is not None and entry[2] is None:
+                    del self._entries[key]
+                    self._dirty = True
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            text = entry[0]
+        return json.loads(text)
+    
+    def validator(self, key: str) -> Optional[str]:
+        """ETag of a stored response that can be revalidated, fresh or not"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[2] if entry is not None else None
+    
+    def revalidate(self, key: str, ttl: Optional[float] = None) -> Optional[Any]:
+        """Restart the TTL of an entry the server confirmed unchanged (304) and return its value"""
+        ttl = self.default_ttl if ttl is None else ttl
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries[key] = (entry[0], time.time() + max(ttl, 0), entry[2])
+            self._entries.move_to_end(key)
+            self.revalidations += 1
+            self._dirty = True
+            text = entry[0]
+        return json.loads(text)
+    
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, etag: Optional[str] = None,
+            text: Optional[str] = None) -> None:
+        """Store a response for ttl seconds (default_ttl when not given)
+        
+        With an ETag the entry is kept even when ttl is 0, so it can be revalidated.
+        text is value's JSON when the caller already has it (e.g. the response body).
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl <= 0 and not etag:
+            return
+        value = json.dumps(value) if text is None else text
+        with self._lock:
+            self._entries[key] = (value, time.time() + max(ttl, 0), etag)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._dirty = True
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self._entries),
+            "max_entries": self.max_entries
+        }
+    
+    def save(self) -> None:
+        """Write unexpired or revalidatable entries to persist_path so they survive restarts"""
+        if not self.persist_path or not self._dirty:
+            return
+        now = time.time()
+        with self._lock:
+            entries = [
+                [key, value, expires_at, etag] for key, (value, expires_at, etag) in self._entries.items()
+                if expires_at > now or etag
+            ]
+            self._dirty = False
+        directory = os.path.dirname(self.persist_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.persist_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self.persist_path)
+    
+    def _load(self) -> None:
+        now = time.time()
+        try:
+            with open(self.persist_path, "r") as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Ignoring unreadable response cache {self.persist_path}: {e}")
+            return
+        for key, value, expires_at, *etag in entries[-self.max_entries:]:
+            etag = etag[0] if etag else None
+            if expires_at > now or etag:
+                # Caches written before values were kept as JSON text hold the parsed value
+                self._entries[key] = (value if isinstance(value, str) else json.dumps(value), expires_at, etag)
@@ -1,11 +1,18 @@
 import os
-from typing import Dict, Any
+import time
+import asyncio
+from contextvars import ContextVar
+from typing import Callable, Dict, Any, List, Optional
 from functools import wraps
 
 class TracingService:
     def __init__(self):
         self.enabled = os.getenv("LANGSMITH_TRACING", "false").lower() == "true"
         self.client = None
+        # Called with (name, seconds) after every traced call, e.g. by the benchmark profiler
+        self.observers: List[Callable[[str, float], None]] = []
+        # Name of the innermost traced call running in this context (see current_span)
+        self._span: ContextVar[Optional[str]] = ContextVar("span", default=None)
         
         if self.enabled:
             os.environ["LANGCHAIN_TRACING_V2"] = "true"
@@ -24,17 +31,54 @@ class TracingService:
     
     def trace_function(self, name: str = None):
         def decorator(func):
+            span = name or func.__name__
+            if asyncio.iscoroutinefunction(func):
+                @wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    token = self._span.set(span)
+                    started = time.perf_counter()
+                    try:
+                        return await self._traced(func, name)(*args, **kwargs)
+                    finally:
+                        self._span.reset(token)
+                        if self.observers:
+                            self._notify(span, time.perf_counter() - started)
+                return async_wrapper
+            
             @wraps(func)
             def wrapper(*args, **kwargs):
-                if self.enabled and self.client:
-                    try:
-                        from langsmith import traceable
-                        traced = traceable(name=name or func.__name__)(func)
-                        return traced(*args, **kwargs)
-                    except Exception:
-                        pass
-                return func(*args, **kwargs)
+                token = self._span.set(span)
+                started = time.perf_counter()
+                try:
+                    return self._traced(func, name)(*args, **kwargs)
+                finally:
+                    self._span.reset(token)
+                    if self.observers:
+                        self._notify(span, time.perf_counter() - started)
             return wrapper
         return decorator
+    
+    def observe(self, callback: Callable[[str, float], None]) -> Callable[[], None]:
+        """Receive the wall time of every traced call; returns a function that stops it"""
+        self.observers.append(callback)
+        return lambda: self.observers.remove(callback)
+    
+    def current_span(self) -> Optional[str]:
+        """Name of the innermost traced call in progress (e.g. "match_workflow"), if any"""
+        return self._span.get()
+    
+    def _notify(self, name: str, seconds: float) -> None:
+        for observer in list(self.observers):
+            observer(name, seconds)
+    
+    def _traced(self, func, name: str = None):
+        """Return the LangSmith-traced version of func when tracing is enabled"""
+        if self.enabled and self.client:
+            try:
+                from langsmith import traceable
+                return traceable(name=name or func.__name__)(func)
+            except Exception:
+                pass
+        return func
 
 tracing_service = TracingService()
@@ -0,0 +1,102 @@
+import queue
+import asyncio
+import inspect
+import threading
+import contextvars
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+from langchain_core.runnables import RunnableLambda
+
+T = TypeVar("T")
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_thread: Optional[threading.Thread] = None
+_loop_lock = threading.Lock()
+# Calls for the thread blocked in run_sync on the current coroutine (see ablocking)
+_caller_calls: contextvars.ContextVar[Optional[queue.SimpleQueue]] = contextvars.ContextVar("caller_calls",
+                                                                                             default=None)
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    """Event loop shared by every synchronous wrapper, so pooled async clients stay bound to one loop"""
+    global _loop, _loop_thread
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            _loop_thread = threading.Thread(target=_loop.run_forever, name="agent-sync-loop", daemon=True)
+            _loop_thread.start()
+        return _loop
+
+
+def run_sync(coro: Awaitable[T]) -> T:
+    """Run a coroutine to completion from synchronous code
+    
+    While waiting, the calling thread runs the coroutine's ablocking calls. Ctrl-C
+    (delivered to the main thread) cancels the coroutine.
+    """
+    loop = _background_loop()
+    if threading.current_thread() is _loop_thread:
+        coro.close()
+        raise RuntimeError("Synchronous API called from async code; use the async (a*) variant instead")
+    calls = queue.SimpleQueue()
+    # The task copies this context, so its ablocking calls find the queue
+    token = _caller_calls.set(calls)
+    try:
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+    finally:
+        _caller_calls.reset(token)
+    future.add_done_callback(lambda _: calls.put(None))
+    try:
+        while True:
+            call = calls.get()
+            if call is None:
+                return future.result()
+            if not future.done():
+                call()
+    except KeyboardInterrupt:
+        future.cancel()
+        raise
+
+
+async def ablocking(func: Callable[..., T], *args) -> T:
+    """Run a blocking call such as input() without blocking the event loop
+    
+    Under run_sync it runs on the waiting caller thread, so input() there still
+    receives Ctrl-C; otherwise it runs on a worker thread.
+    """
+    calls = _caller_calls.get()
+    if calls is None:
+        return await asyncio.to_thread(func, *args)
+    loop = asyncio.get_running_loop()
+    result = loop.create_future()
+    
+    def settle(outcome: Callable[[], None]) -> None:
+        if not result.done():
+            outcome()
+    
+    def call() -> None:
+        try:
+            value = func(*args)
+        except Exception as e:
+            loop.call_soon_threadsafe(settle, lambda: result.set_exception(e))
+        else:
+            loop.call_soon_threadsafe(settle, lambda: result.set_result(value))
+    
+    calls.put(call)
+    return await result
+
+
+async def acall(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Await func if it is a coroutine function, otherwise run it on a worker thread"""
+    if asyncio.iscoroutinefunction(func):
+        return await func(*args, **kwargs)
+    return await asyncio.to_thread(func, *args, **kwargs)
+
+
+def dual_node(afunc: Callable[..., Awaitable[Any]]) -> RunnableLambda:
+    """Wrap an async LangGraph node so the graph supports both invoke and ainvoke
+
+    Nodes that take a config argument receive the run's RunnableConfig (e.g. its configurable values).
+    """
+    if "config" in inspect.signature(afunc).parameters:
+        return RunnableLambda(lambda state, config: run_sync(afunc(state, config)), afunc=afunc, name=afunc.__name__)
+    return RunnableLambda(lambda state: run_sync(afunc(state)), afunc=afunc, name=afunc.__name__)
@@ -0,0 +1,56 @@
+import asyncio
+import sqlite3
+from typing import Any, AsyncIterator, Dict, Optional, Sequence
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.memory import InMemorySaver
+
+try:
+    from langgraph.checkpoint.sqlite import SqliteSaver
+except ImportError:
+    SqliteSaver = None
+
+CHECKPOINT_BACKENDS = ("memory", "sqlite")
+
+
+if SqliteSaver is not None:
+    class ThreadedSqliteSaver(SqliteSaver):
+        """SqliteSaver whose async methods run the sync ones on a worker thread
+
+        The graphs are driven both by invoke (sync entry points) and ainvoke (server,
+        batch), so one saver has to serve both; the connection is shared under
+        SqliteSaver's own lock.
+        """
+        
+        async def aget_tuple(self, config: RunnableConfig):
+            return await asyncio.to_thread(self.get_tuple, config)
+        
+        async def alist(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+                        before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> AsyncIterator:
+            items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+            for item in items:
+                yield item
+        
+        async def aput(self, config: RunnableConfig, checkpoint, metadata, new_versions) -> RunnableConfig:
+            return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+        
+        async def aput_writes(self, config: RunnableConfig, writes: Sequence, task_id: str, task_path: str = "") -> None:
+            await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+        
+        async def adelete_thread(self, thread_id: str) -> None:
+            await asyncio.to_thread(self.delete_thread, thread_id)
+        
+        async def aget_delta_channel_history(self, *, config: RunnableConfig, channels: Sequence[str]):
+            return await asyncio.to_thread(lambda: self.get_delta_channel_history(config=config, channels=channels))
+
+
+def create_checkpointer(backend: str, path: Optional[str] = None) -> BaseCheckpointSaver:
+    """Checkpointer for session threads: "memory" (per process) or "sqlite" (file at path, survives restarts)"""
+    if backend == "memory":
+        return InMemorySaver()
+    if backend == "sqlite":
+        if SqliteSaver is None:
+            raise ImportError("The sqlite checkpointer needs langgraph-checkpoint-sqlite. "
+                              "Install with: pip install langgraph-checkpoint-sqlite")
+        return ThreadedSqliteSaver(sqlite3.connect(path or "checkpoints.sqlite", check_same_thread=False))
+    raise ValueError(f"Unknown checkpoint backend: {backend} (expected one of {', '.join(CHECKPOINT_BACKENDS)})")
@@ -1,6 +1,7 @@
 import json
 from typing import Dict, Any, List
 from pathlib import Path
+from utils.workflow_compiler import CompiledWorkflow, workflow_errors
 
 class ConfigLoader:
     """Load and parse workflow configuration files"""
@@ -11,21 +12,25 @@ class ConfigLoader:
         with open(config_path, 'r') as f:
             return json.load(f)
     
+    @staticmethod
+    def compile(config_path: Path) -> CompiledWorkflow:
+        """Load, validate and compile one workflow config file"""
+        try:
+            return CompiledWorkflow(ConfigLoader.load(str(config_path)), source=config_path.name)
+        except ValueError as e:
+            raise ValueError(f"Invalid workflow config {config_path.name}: {e}") from e
+    
     @staticmethod
     def load_all_configs(config_dir: str) -> Dict[str, Dict[str, Any]]:
-        """Load all JSON configs from directory"""
+        """Load all JSON configs from directory, validating and compiling each one"""
         configs = {}
-        config_path = Path(config_dir)
-        
-        for json_file in config_path.glob("*.json"):
-            config = ConfigLoader.load(str(json_file))
-            config_name = config.get("api_name", json_file.stem)
-            configs[config_name] = config
+        for json_file in Path(config_dir).glob("*.json"):
+            compiled = ConfigLoader.compile(json_file)
+            configs[compiled.name] = compiled.config
         
         return configs
     
     @staticmethod
     def validate_config(config: Dict[str, Any]) -> bool:
         """Validate configuration structure"""
-        required_fields = ["api_name", "endpoint", "method"]
-        return all(field in config for field in required_fields)
+        return not workflow_errors(config)
@@ -0,0 +1,87 @@
+from typing import Dict, Any, List, Set, Tuple
+
+
+class DependencyCycleError(ValueError):
+    """Raised when workflow parameters depend on each other in a cycle"""
+
+
+class ParameterDependencyGraph:
+    """Topologically ordered DAG of workflow parameters built from their depends_on fields"""
+    
+    def __init__(self, parameters: Dict[str, Dict[str, Any]]):
+        self.parameters = parameters
+        self.dependencies: Dict[str, Tuple[str, ...]] = {}
+        self.dependents: Dict[str, List[str]] = {name: [] for name in parameters}
+        
+        for name, param_config in parameters.items():
+            depends_on = param_config.get("depends_on") or []
+            if isinstance(depends_on, str):
+                depends_on = [depends_on]
+            self.dependencies[name] = tuple(depends_on)
+            for dep in depends_on:
+                # Dependencies on names outside the workflow are satisfied by pre-collected values
+                if dep in self.dependents:
+                    self.dependents[dep].append(name)
+        
+        self.waves = self._build_waves()
+        self.order = [name for wave in self.waves for name in wave]
+    
+    def _build_waves(self) -> List[List[str]]:
+        """Group parameters into levels whose members only depend on earlier levels (Kahn's algorithm)"""
+        indegree = {
+            name: sum(1 for dep in deps if dep in self.parameters)
+            for name, deps in self.dependencies.items()
+        }
+        wave = [name for name in self.parameters if indegree[name] == 0]
+        waves = []
+        placed = 0
+        
+        while wave:
+            waves.append(wave)
+            placed += len(wave)
+            next_wave = []
+            for name in wave:
+                for child in self.dependents[name]:
+                    indegree[child] -= 1
+                    if indegree[child] == 0:
+                        next_wave.append(child)
+            wave = next_wave
+        
+        if placed != len(self.parameters):
+            cyclic = sorted(name for name, degree in indegree.items() if degree > 0)
+            raise DependencyCycleError(f"Circular depends_on between parameters: {', '.join(cyclic)}")
+        
+        return waves
+    
+    def is_ready(self, name: str, collected_params: Dict[str, Any]) -> bool:
+        """Check whether every dependency of a parameter has been collected"""
+        return all(dep in collected_params for dep in self.dependencies[name])
+    
+    def descendants(self, name: str) -> Set[str]:
+        """All parameters that directly or transitively depend on the given one"""
+        found: Set[str] = set()
+        stack = list(self.dependents.get(name, []))
+        while stack:
+            child = stack.pop()
+            if child not in found:
+                found.add(child)
+                stack.extend(self.dependents[child])
+        return found
+
+
+_graph_cache: Dict[str, ParameterDependencyGraph] = {}
+
+
+def get_dependency_graph(config: Dict[str, Any]) -> ParameterDependencyGraph:
+    """Return the compiled dependency graph for a workflow config, building it on first use"""
+    parameters = config.get("parameters", {})
+    cache_key = config.get("api_name", "")
+    cached = _graph_cache.get(cache_key)
+    
+    # Reuse only while the config still holds the very parameters dict the graph was built from
+    if cached is not None and cached.parameters is parameters:
+        return cached
+    
+    graph = ParameterDependencyGraph(parameters)
+    _graph_cache[cache_key] = graph
+    return graph
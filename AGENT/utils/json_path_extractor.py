@@ -1,6 +1,85 @@
-from typing import Any, List, Dict
+from typing import Any, List, Dict, Optional, Tuple
+from functools import lru_cache
 import re
 
+_SEGMENT_PATTERN = re.compile(r"^(?P<key>[^\[\]]*)(?:\[(?P<selector>[^\]]*)\])?$")
+_MISSING = object()
+
+
+class CompiledPath:
+    """Pre-parsed JSON path that can be evaluated many times without re-parsing"""
+    
+    def __init__(self, path: str, steps: Tuple[Tuple[str, Any], ...]):
+        self.path = path
+        self.steps = steps
+    
+    def __repr__(self) -> str:
+        return f"CompiledPath({self.path!r})"
+    
+    def extract(self, data: Any) -> Any:
+        """Evaluate the path against data, returning None when it does not resolve"""
+        return self._evaluate(data, self.steps)
+    
+    @property
+    def array_prefix_length(self) -> int:
+        """Number of leading steps up to and including the last array step"""
+        for index in range(len(self.steps) - 1, -1, -1):
+            if self.steps[index][0] == "array":
+                return index + 1
+        return 0
+    
+    @staticmethod
+    def _evaluate(data: Any, steps: Tuple[Tuple[str, Any], ...], expand: bool = False) -> Any:
+        current = data
+        
+        for step_type, arg in steps:
+            if step_type == "key":
+                if expand:
+                    current = [item.get(arg) for item in current if isinstance(item, dict)]
+                elif isinstance(current, dict):
+                    current = current.get(arg)
+                else:
+                    return None
+            else:
+                key, condition = arg
+                if expand:
+                    flattened = []
+                    for item in current:
+                        value = item.get(key) if key and isinstance(item, dict) else (item if not key else None)
+                        if isinstance(value, list):
+                            flattened.extend(value)
+                    current = flattened
+                else:
+                    if key:
+                        if not isinstance(current, dict) or key not in current:
+                            return None
+                        current = current[key]
+                    if not isinstance(current, list):
+                        return None
+                    expand = True
+                if condition is not None:
+                    current = [item for item in current if _matches(item, condition)]
+        
+        return current
+
+
+def _matches(item: Any, condition: Tuple[str, bool, Optional[str]]) -> bool:
+    """Evaluate a [?field], [?!field] or [?field=value] filter against one array item"""
+    if not isinstance(item, dict):
+        return False
+    field, negate, expected = condition
+    value = item.get(field, _MISSING)
+    if expected is None:
+        result = value is not _MISSING and bool(value)
+    elif value is _MISSING:
+        result = False
+    elif isinstance(value, bool):
+        result = str(value).lower() == expected.lower()
+    else:
+        result = str(value) == expected
+    return result != negate
+
+
 class JSONPathExtractor:
     """Extract values from JSON using path notation like data[].field or data.field"""
     
@@ -12,47 +91,102 @@ class JSONPathExtractor:
             data[].state_name -> extracts state_name from array in data
             classPlanList[].PolicyId -> extracts PolicyId from classPlanList array
             data.enrollment_id -> extracts enrollment_id from data object
+            data[].cities[].name -> flattens nested arrays
+            data[?active].state_name -> keeps only items whose active field is truthy
         """
         if not path:
             return data
         
-        parts = JSONPathExtractor._parse_path(path)
-        current = data
+        return JSONPathExtractor.compile(path).extract(data)
+    
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def compile(path: str) -> CompiledPath:
+        """Compile a path string once; repeated calls with the same path share the result"""
+        return CompiledPath(path, JSONPathExtractor._parse_path(path))
+    
+    @staticmethod
+    def _parse_path(path: str) -> Tuple[Tuple[str, Any], ...]:
+        """Parse path string into structured steps"""
+        steps = []
         
-        for part in parts:
-            if part["type"] == "array":
-                if isinstance(current, dict) and part["key"] in current:
-                    current = current[part["key"]]
-                    if isinstance(current, list):
-                        if part["field"]:
-                            current = [item.get(part["field"]) for item in current if isinstance(item, dict)]
-                        continue
-                return None
-            elif part["type"] == "object":
-                if isinstance(current, dict):
-                    current = current.get(part["key"])
-                else:
-                    return None
+        for segment in path.split("."):
+            match = _SEGMENT_PATTERN.match(segment)
+            if not match:
+                raise ValueError(f"Invalid JSON path segment '{segment}' in '{path}'")
+            
+            key = match.group("key")
+            selector = match.group("selector")
+            
+            if selector is None:
+                steps.append(("key", key))
+            elif selector == "":
+                steps.append(("array", (key, None)))
+            elif selector.startswith("?"):
+                steps.append(("array", (key, JSONPathExtractor._parse_filter(selector[1:], path))))
+            else:
+                raise ValueError(f"Unsupported array selector '[{selector}]' in '{path}'")
         
-        return current
+        return tuple(steps)
     
     @staticmethod
-    def _parse_path(path: str) -> List[Dict[str, Any]]:
-        """Parse path string into structured parts"""
-        parts = []
-        segments = path.split(".")
+    def _parse_filter(expression: str, path: str) -> Tuple[str, bool, Optional[str]]:
+        """Parse the body of a [?...] filter into (field, negate, expected_value)"""
+        negate = expression.startswith("!")
+        if negate:
+            expression = expression[1:]
         
-        for segment in segments:
-            if "[]" in segment:
-                key = segment.replace("[]", "")
-                parts.append({"type": "array", "key": key, "field": None})
-            else:
-                if parts and parts[-1]["type"] == "array" and parts[-1]["field"] is None:
-                    parts[-1]["field"] = segment
-                else:
-                    parts.append({"type": "object", "key": segment})
+        field, separator, expected = expression.partition("=")
+        field = field.strip()
+        if not field:
+            raise ValueError(f"Empty filter in '{path}'")
         
-        return parts
+        return field, negate, (expected.strip() if separator else None)
+    
+    @staticmethod
+    def project(data: Any, fields: Dict[str, str]) -> List[Dict[str, Any]]:
+        """
+        Pull several fields out of the same array in a single traversal
+        Example:
+            project(response, {"value": "data[].state_id", "label": "data[].state_name"})
+            -> [{"value": "ST001", "label": "Gujarat"}, ...]
+        Paths that share the same array prefix are walked once; each array item
+        then yields one dict. Paths without a common array prefix are extracted
+        separately and zipped by index: the first field's list decides the rows, and
+        a later field whose list does not line up with it is None in every row.
+        """
+        if not fields:
+            return []
+        
+        compiled = {name: JSONPathExtractor.compile(path) for name, path in fields.items()}
+        paths = list(compiled.values())
+        prefix_length = paths[0].array_prefix_length
+        prefix = paths[0].steps[:prefix_length]
+        
+        shared = prefix_length > 0 and all(
+            p.steps[:prefix_length] == prefix and p.array_prefix_length == prefix_length for p in paths
+        )
+        
+        if shared:
+            items = CompiledPath._evaluate(data, prefix)
+            if not isinstance(items, list):
+                return []
+            suffixes = [(name, p.steps[prefix_length:]) for name, p in compiled.items()]
+            needs_object = any(suffix for _, suffix in suffixes)
+            return [
+                {name: CompiledPath._evaluate(item, suffix) if suffix else item for name, suffix in suffixes}
+                for item in items
+                if not needs_object or isinstance(item, dict)
+            ]
+        
+        columns = {name: p.extract(data) for name, p in compiled.items()}
+        rows = next(iter(columns.values()))
+        if not isinstance(rows, list):
+            return []
+        for name, column in columns.items():
+            if not isinstance(column, list) or len(column) != len(rows):
+                columns[name] = [None] * len(rows)
+        return [{name: column[i] for name, column in columns.items()} for i in range(len(rows))]
     
     @staticmethod
     def extract_options(data: Any, path: str, display_field: str = None, value_field: str = None) -> List[Dict[str, Any]]:
@@ -0,0 +1,90 @@
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Lowercase ASCII letters and digits survive, other ASCII folds to a space; UTF-8 bytes and separators are kept
+_FOLD = bytes(
+    c if c == 0 or c >= 128 or chr(c).isalnum() else ord(" ") for c in range(256)
+).lower()
+_SPACE = ord(" ")
+
+
+def _normalize(texts: Sequence[str]) -> np.ndarray:
+    """Texts as one NUL-separated byte buffer: lowercased, punctuation folded, single-spaced and space-padded"""
+    joined = " " + " \0 ".join(str(text).replace("\0", " ") for text in texts).lower() + " "
+    buf = np.frombuffer(joined.encode().translate(_FOLD), dtype=np.uint8)
+    keep = np.ones(len(buf), dtype=bool)
+    keep[1:] = (buf[1:] != _SPACE) | (buf[:-1] != _SPACE)
+    return buf[keep]
+
+
+def _trigrams(buf: np.ndarray) -> np.ndarray:
+    """Every overlapping 3-byte window of buf packed into one integer"""
+    b = buf.astype(np.uint32)
+    return (b[:-2] << 16) | (b[1:-1] << 8) | b[2:]
+
+
+class OptionMatcher:
+    """Character-trigram index over option labels, scored against a request in one vectorized pass
+
+    A label's score is the share of its trigrams that also occur in the request, so
+    "California" scores 1.0 against "identifier for California" and typos or partial
+    mentions keep partial credit. Building the index and scoring are numpy operations
+    over all labels at once, which keeps 100k-option lists in the tens of milliseconds.
+    """
+    
+    def __init__(self, labels: Sequence[str]):
+        self.size = len(labels)
+        buf = _normalize(labels)
+        separators = np.flatnonzero(buf == 0)
+        self._buf = buf
+        self._starts = np.concatenate(([0], separators + 1))
+        self._ends = np.concatenate((separators, [len(buf)]))
+        if len(buf) >= 3:
+            # Windows touching a separator span two labels and are dropped
+            valid = (buf[:-2] != 0) & (buf[1:-1] != 0) & (buf[2:] != 0)
+            self.codes = _trigrams(buf)[valid]
+            self.owner = np.cumsum(buf == 0)[:-2][valid]
+        else:
+            self.codes = np.empty(0, dtype=np.uint32)
+            self.owner = np.empty(0, dtype=np.int64)
+        self.totals = np.bincount(self.owner, minlength=self.size)
+    
+    def _text(self, index: int) -> bytes:
+        return self._buf[self._starts[index]:self._ends[index]].tobytes()
+    
+    def scores(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(score, matched trigram count) for every label"""
+        query = _normalize([text])
+        if len(query) < 3 or not len(self.codes):
+            return np.zeros(self.size), np.zeros(self.size, dtype=np.int64)
+        hit = np.isin(self.codes, np.unique(_trigrams(query)), kind="table")
+        matched = np.bincount(self.owner[hit], minlength=self.size)
+        return matched / np.maximum(self.totals, 1), matched
+    
+    def match(self, text: str, threshold: float) -> Tuple[List[int], Optional[int]]:
+        """Label indices best first, plus the index the text clearly names (or None)
+
+        The best label is clear when it scores at least threshold and every other label
+        that does is contained in it: "North California" wins over "California" for
+        "north california", but "Texas" and "India" both named in a request (or two
+        identical labels) are left to the selector.
+        """
+        if not self.size:
+            return [], None
+        scores, matched = self.scores(text)
+        order = np.lexsort((np.arange(self.size), -matched, -scores))
+        best = int(order[0])
+        if scores[best] < threshold:
+            return order.tolist(), None
+        best_text = self._text(best)
+        for other in np.flatnonzero(scores >= threshold):
+            if other != best and (self._text(other) == best_text or self._text(other) not in best_text):
+                return order.tolist(), None
+        return order.tolist(), best
+
+
+def rank_options(options: List[Dict[str, Any]], text: str,
+                 threshold: float) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """Options ordered by how well their labels match text, plus the clear match if any"""
+    order, best = OptionMatcher([option["label"] for option in options]).match(text, threshold)
+    return [options[i] for i in order], options[best] if best is not None else None
@@ -0,0 +1,45 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class OptionTree:
+    """Dependent dropdown options resolved locally from one prefetched tree response
+
+    The response holds nested {"level", "id", "name", "children"} nodes under "data"
+    and the levels it covers under "levels". Parameters map to a level through
+    their "tree_level"; options for a parameter are the nodes at its level whose
+    ancestors match the values already collected for the other tree parameters.
+    """
+    
+    def __init__(self, response: Dict[str, Any], tree_levels: Dict[str, str]):
+        self.tree_levels = tree_levels
+        self.levels = set(response.get("levels", []))
+        self.nodes: Dict[str, List[Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]]] = {}
+        stack = [(node, {}) for node in response.get("data", [])]
+        while stack:
+            node, ancestors = stack.pop()
+            self.nodes.setdefault(node.get("level"), []).append((node, ancestors))
+            path = {**ancestors, node.get("level"): node}
+            stack.extend((child, path) for child in node.get("children", []))
+        # The stack walk reverses siblings; restore API order
+        for entries in self.nodes.values():
+            entries.reverse()
+    
+    def options_for(self, param_name: str, collected_params: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """Options for param_name, or None when the tree does not cover its level"""
+        level = self.tree_levels.get(param_name)
+        if level not in self.levels:
+            return None
+        selected = {
+            self.tree_levels[name]: value for name, value in collected_params.items()
+            if name in self.tree_levels
+        }
+        return [
+            {"label": str(node["name"]), "value": node["name"]}
+            for node, ancestors in self.nodes.get(level, [])
+            if all(self._matches(ancestors[lvl], value) for lvl, value in selected.items() if lvl in ancestors)
+        ]
+    
+    @staticmethod
+    def _matches(node: Dict[str, Any], value: Any) -> bool:
+        value = str(value)
+        return value == str(node.get("id")) or value.lower() == str(node.get("name", "")).lower()
@@ -0,0 +1,64 @@
+import time
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from utils.url_template import URLTemplate
+
+
+class RememberedValue(NamedTuple):
+    value: Any
+    label: str
+    # Values of the parameters the option list was fetched with
+    dependencies: Tuple[Tuple[str, Any], ...]
+    # The option list the value was picked from (None when too long to keep or only partly fetched)
+    options: Optional[List[Dict[str, Any]]]
+    remembered_at: float
+
+
+class ParameterMemory:
+    """Dropdown values a session already resolved, reusable by any workflow with the same option source
+
+    Values are keyed by parameter name and api_call template, so "country" picked from
+    /dummy/countries in view_cities is reused by create_order, while a "state" from
+    /states?active=true is not reused for /states. A value is still valid while the
+    parameters its options were fetched with (depends_on and template placeholders)
+    have the same values, and, when the parameter declares a cache_ttl, while its
+    options would still be cached.
+    """
+    
+    def __init__(self, remember_options: int = 1000):
+        self.remember_options = remember_options
+        self._values: Dict[Tuple[str, str], RememberedValue] = {}
+    
+    @staticmethod
+    def _dependencies(param_config: Dict[str, Any], dependencies: Iterable[str],
+                      collected_params: Dict[str, Any]) -> Tuple[Tuple[str, Any], ...]:
+        names = set(dependencies) | URLTemplate.compile(param_config["api_call"]).placeholders
+        return tuple(sorted((name, str(collected_params.get(name))) for name in names))
+    
+    def recall(self, name: str, param_config: Dict[str, Any], dependencies: Iterable[str],
+               collected_params: Dict[str, Any]) -> Optional[RememberedValue]:
+        """The remembered value for this parameter if it is still valid for collected_params"""
+        remembered = self._values.get((name, param_config["api_call"]))
+        if remembered is None:
+            return None
+        ttl = param_config.get("cache_ttl")
+        if ttl is not None and time.time() - remembered.remembered_at > ttl:
+            return None
+        if remembered.dependencies != self._dependencies(param_config, dependencies, collected_params):
+            return None
+        return remembered
+    
+    def remember(self, name: str, param_config: Dict[str, Any], dependencies: Iterable[str],
+                 collected_params: Dict[str, Any], value: Any, options: List[Dict[str, Any]],
+                 complete: bool = True) -> None:
+        """complete=False marks options as one page of a longer list"""
+        label = next((str(option["label"]) for option in options if option["value"] == value), str(value))
+        self._values[(name, param_config["api_call"])] = RememberedValue(
+            value, label, self._dependencies(param_config, dependencies, collected_params),
+            options if complete and len(options) <= self.remember_options else None, time.time()
+        )
+    
+    def forget(self) -> None:
+        self._values.clear()
+    
+    def __len__(self) -> int:
+        return len(self._values)
@@ -0,0 +1,81 @@
+import re
+from typing import Any, Dict, List
+from utils.json_path_extractor import JSONPathExtractor
+
+_PLACEHOLDER = re.compile(r"\{([^{}]+)\}")
+
+
+class ResponseRenderer:
+    """Format API responses locally from a workflow's response_template
+
+    A template block may contain:
+      title   - heading line, e.g. "✅ Order {data.order_id} confirmed"
+      fields  - {"Label": "json.path"} pairs rendered as "  • Label: value"
+      list    - path to an array; each element is rendered with "item"
+      item    - line template whose placeholders resolve against one element
+      empty   - line shown when the list is empty
+      sections - nested blocks rendered in order
+      footer  - closing line
+    Placeholders are JSONPathExtractor paths; {count} is the length of "list".
+    """
+    
+    @staticmethod
+    def render(template: Dict[str, Any], response: Dict[str, Any]) -> str:
+        return "\n".join(ResponseRenderer._render_block(template, response)).strip("\n")
+    
+    @staticmethod
+    def render_string(template: str, data: Any, extra: Dict[str, Any] = None) -> str:
+        """Replace each {path} placeholder with the value found at that path"""
+        def substitute(match):
+            path = match.group(1).strip()
+            if extra and path in extra:
+                value = extra[path]
+            else:
+                value = JSONPathExtractor.compile(path).extract(data)
+            return ResponseRenderer._format_value(value)
+        return _PLACEHOLDER.sub(substitute, template)
+    
+    @staticmethod
+    def _render_block(block: Dict[str, Any], response: Dict[str, Any]) -> List[str]:
+        items = None
+        extra = {}
+        if block.get("list"):
+            items = JSONPathExtractor.compile(block["list"]).extract(response)
+            items = items if isinstance(items, list) else []
+            extra["count"] = len(items)
+        
+        lines = []
+        if block.get("title"):
+            lines.append(ResponseRenderer.render_string(block["title"], response, extra))
+        
+        for label, path in block.get("fields", {}).items():
+            value = JSONPathExtractor.compile(path).extract(response)
+            if value is not None:
+                lines.append(f"  • {label}: {ResponseRenderer._format_value(value)}")
+        
+        if items is not None:
+            item_template = block.get("item", "  • {name}")
+            for item in items:
+                lines.append(ResponseRenderer.render_string(item_template, item))
+            if not items and block.get("empty"):
+                lines.append(block["empty"])
+        
+        for section in block.get("sections", []):
+            lines.append("")
+            lines.extend(ResponseRenderer._render_block(section, response))
+        
+        if block.get("footer"):
+            lines.append("")
+            lines.append(ResponseRenderer.render_string(block["footer"], response, extra))
+        
+        return lines
+    
+    @staticmethod
+    def _format_value(value: Any) -> str:
+        if value is None:
+            return ""
+        if isinstance(value, bool):
+            return "Yes" if value else "No"
+        if isinstance(value, list):
+            return ", ".join(ResponseRenderer._format_value(v) for v in value)
+        return str(value)
@@ -0,0 +1,61 @@
+import re
+from typing import Dict, Any, List
+
+_JSON_TYPES = {"integer": "integer", "number": "number", "float": "number", "boolean": "boolean"}
+
+
+def parameter_properties(params: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """JSON schema properties with one nullable entry per parameter"""
+    properties = {}
+    for name, param_config in params.items():
+        json_type = _JSON_TYPES.get(param_config.get("type", "string"), "string")
+        properties[name] = {"type": [json_type, "null"]}
+        if param_config.get("label"):
+            properties[name]["description"] = param_config["label"]
+    return properties
+
+
+def free_text_parameters(config: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Parameters the LLM can fill from the request; api_call dropdowns are resolved by the collector"""
+    return {
+        name: param_config for name, param_config in config.get("parameters", {}).items()
+        if not param_config.get("api_call")
+    }
+
+
+def tool_name(workflow_name: str) -> str:
+    """Workflow name in the character set OpenAI allows for function names"""
+    return re.sub(r"[^a-zA-Z0-9_-]", "_", workflow_name)[:64]
+
+
+def workflow_tool(workflow_name: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    """OpenAI function/tool definition for a workflow config"""
+    return {
+        "type": "function",
+        "function": {
+            "name": tool_name(workflow_name),
+            "description": config.get("description", workflow_name),
+            "parameters": {
+                "type": "object",
+                "properties": parameter_properties(free_text_parameters(config))
+            }
+        }
+    }
+
+
+def workflow_tools(workflows: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [workflow_tool(name, config) for name, config in workflows.items()]
+
+
+def clean_arguments(arguments: Dict[str, Any], params: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Keep known parameters with real values, dropping nulls, blanks and NOT_FOUND markers"""
+    values = {}
+    for name in params:
+        value = arguments.get(name) if isinstance(arguments, dict) else None
+        if isinstance(value, str):
+            value = value.strip()
+            if value in ("", "NOT_FOUND"):
+                value = None
+        if value is not None:
+            values[name] = value
+    return values
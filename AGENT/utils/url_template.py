@@ -0,0 +1,73 @@
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+_PLACEHOLDER = re.compile(r"\{([^{}]+)\}")
+
+# Literal text and placeholder names alternate: ("lit", "/plans/"), ("var", "plan"), ...
+Parts = Tuple[Tuple[str, str], ...]
+
+
+def _split(template: str) -> Parts:
+    parts = []
+    position = 0
+    for match in _PLACEHOLDER.finditer(template):
+        if match.start() > position:
+            parts.append(("lit", template[position:match.start()]))
+        parts.append(("var", match.group(1)))
+        position = match.end()
+    if position < len(template):
+        parts.append(("lit", template[position:]))
+    return tuple(parts)
+
+
+class URLTemplate:
+    """An api_call/endpoint template parsed once into path parts and query items
+
+    Path placeholders are percent-encoded; query values are returned unencoded in a
+    params dict for the HTTP client to encode. Unknown placeholders are left as-is.
+    """
+    
+    def __init__(self, template: str):
+        self.template = template
+        path, _, query = template.partition("?")
+        self.path = _split(path)
+        self.query: List[Tuple[str, Parts]] = []
+        for item in query.split("&") if query else []:
+            if "=" in item:
+                key, value = item.split("=", 1)
+                self.query.append((key, _split(value)))
+        self.placeholders = {
+            name for parts in (self.path, *(value for _, value in self.query))
+            for kind, name in parts if kind == "var"
+        }
+    
+    def __repr__(self) -> str:
+        return f"URLTemplate({self.template!r})"
+    
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def compile(template: str) -> "URLTemplate":
+        """Parse a template once; repeated templates reuse the cached instance"""
+        return URLTemplate(template)
+    
+    def build(self, values: Dict[str, Any]) -> Tuple[str, Optional[Dict[str, str]]]:
+        """Fill placeholders and return (path, query params or None)"""
+        path = self._render(self.path, values, encode=True)
+        if not self.query:
+            return path, None
+        return path, {key: self._render(parts, values, encode=False) for key, parts in self.query}
+    
+    @staticmethod
+    def _render(parts: Parts, values: Dict[str, Any], encode: bool) -> str:
+        rendered = []
+        for kind, text in parts:
+            if kind == "lit":
+                rendered.append(text)
+            elif text in values:
+                value = str(values[text])
+                rendered.append(quote(value, safe="") if encode else value)
+            else:
+                rendered.append(f"{{{text}}}")
+        return "".join(rendered)
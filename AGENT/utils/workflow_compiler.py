@@ -0,0 +1,117 @@
+from typing import Any, Dict, List, Optional
+from utils.dependency_graph import get_dependency_graph
+from utils.json_path_extractor import JSONPathExtractor
+from utils.url_template import URLTemplate
+
+_METHODS = {"GET", "POST", "PUT", "PATCH", "DELETE"}
+_LOCATIONS = {"body", "query", "path"}
+
+
+class WorkflowConfigError(ValueError):
+    """Raised when a workflow config fails validation"""
+
+
+def _depends_on(param_config: Dict[str, Any]) -> List[str]:
+    depends_on = param_config.get("depends_on") or []
+    return [depends_on] if isinstance(depends_on, str) else list(depends_on)
+
+
+def _check_path(errors: List[str], where: str, path: Any) -> None:
+    if not isinstance(path, str):
+        errors.append(f"{where} must be a string")
+        return
+    try:
+        JSONPathExtractor.compile(path)
+    except ValueError as e:
+        errors.append(f"{where}: {e}")
+
+
+def workflow_errors(config: Any) -> List[str]:
+    """Every schema problem in a workflow config (empty when it is valid)"""
+    if not isinstance(config, dict):
+        return ["config must be a JSON object"]
+    errors = []
+    for field in ("endpoint", "method"):
+        if not isinstance(config.get(field), str) or not config.get(field):
+            errors.append(f"'{field}' is required and must be a string")
+    if "api_name" in config and (not isinstance(config["api_name"], str) or not config["api_name"]):
+        errors.append("'api_name' must be a non-empty string")
+    if isinstance(config.get("method"), str) and config["method"].upper() not in _METHODS:
+        errors.append(f"unsupported method '{config['method']}'")
+    
+    parameters = config.get("parameters", {})
+    if not isinstance(parameters, dict):
+        return errors + ["'parameters' must be an object"]
+    
+    tree = config.get("prefetch_tree")
+    if tree is not None and not (isinstance(tree, dict) and isinstance(tree.get("api_call"), str)):
+        errors.append("'prefetch_tree' must be an object with an 'api_call' string")
+    elif tree is not None:
+        URLTemplate.compile(tree["api_call"])
+    if "response_template" in config and not isinstance(config["response_template"], dict):
+        errors.append("'response_template' must be an object")
+    
+    for name, param_config in parameters.items():
+        where = f"parameter '{name}'"
+        if not isinstance(param_config, dict):
+            errors.append(f"{where} must be an object")
+            continue
+        if param_config.get("location", "body") not in _LOCATIONS:
+            errors.append(f"{where}: location must be one of {', '.join(sorted(_LOCATIONS))}")
+        depends_on = param_config.get("depends_on")
+        if depends_on is not None and not (
+            isinstance(depends_on, str) or (isinstance(depends_on, list) and all(isinstance(d, str) for d in depends_on))
+        ):
+            errors.append(f"{where}: depends_on must be a string or a list of strings")
+            continue
+        for field in ("cache_ttl", "page_size"):
+            value = param_config.get(field)
+            if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0):
+                errors.append(f"{where}: {field} must be a non-negative number")
+        if param_config.get("tree_level") and tree is None:
+            errors.append(f"{where}: tree_level needs a top-level prefetch_tree")
+        
+        api_call = param_config.get("api_call")
+        if api_call is None:
+            continue
+        if not isinstance(api_call, str):
+            errors.append(f"{where}: api_call must be a string")
+            continue
+        # Options can only be fetched once every value the URL needs has been collected
+        missing = URLTemplate.compile(api_call).placeholders - set(_depends_on(param_config))
+        if missing:
+            errors.append(f"{where}: api_call uses {', '.join(sorted(missing))} without depends_on")
+        response_field = param_config.get("response_field", "data")
+        _check_path(errors, f"{where} response_field", response_field)
+        _check_path(errors, f"{where} display_field", param_config.get("display_field", response_field))
+    
+    if isinstance(config.get("endpoint"), str):
+        unknown = URLTemplate.compile(config["endpoint"]).placeholders - set(parameters)
+        if unknown:
+            errors.append(f"endpoint uses unknown parameters: {', '.join(sorted(unknown))}")
+    return errors
+
+
+class CompiledWorkflow:
+    """A validated workflow config whose URL templates, JSON paths and dependency graph are prebuilt
+
+    Nothing compiled is kept here: validation parses every template and path through
+    URLTemplate.compile and JSONPathExtractor.compile, whose lru caches (and the
+    dependency graph cache) are what the collector and executor look up by string.
+    Compiling a workflow therefore just warms those caches.
+    """
+    
+    def __init__(self, config: Dict[str, Any], source: Optional[str] = None):
+        errors = workflow_errors(config)
+        if errors:
+            raise WorkflowConfigError("; ".join(errors))
+        self.config = config
+        self.source = source
+        self.name = config.get("api_name") or (source.rsplit(".", 1)[0] if source else config["endpoint"])
+        try:
+            get_dependency_graph(config)
+        except ValueError as e:
+            raise WorkflowConfigError(str(e)) from e
+    
+    def __repr__(self) -> str:
+        return f"CompiledWorkflow({self.name!r})"
@@ -0,0 +1,103 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset({
+    "a", "an", "the", "for", "of", "to", "in", "on", "with", "and", "or", "me", "my", "i",
+    "want", "please", "can", "you", "is", "are", "be", "using", "all", "some", "new", "show"
+})
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, split on non-alphanumerics (and underscores), drop stopwords, strip plurals"""
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower().replace("_", " ")):
+        if token in _STOPWORDS:
+            continue
+        if len(token) > 4 and token.endswith("ies"):
+            token = token[:-3] + "y"
+        elif len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class WorkflowIndex:
+    """BM25 index over each workflow's api_name, description and parameter names
+
+    api_name tokens are counted name_weight times so the workflow name outweighs
+    incidental mentions in descriptions. Parameter names help rank workflows but are
+    weak evidence on their own ("phone" is a field of several forms), so score() can
+    leave out terms a workflow only has as parameter names.
+    """
+    
+    def __init__(self, workflows: Dict[str, Dict[str, Any]], k1: float = 1.5, b: float = 0.75,
+                 name_weight: int = 2):
+        self.k1 = k1
+        self.b = b
+        self.term_freqs: Dict[str, Counter] = {}
+        self.doc_lengths: Dict[str, int] = {}
+        # Terms of each workflow's name and description
+        self.described: Dict[str, Set[str]] = {}
+        self.names: Dict[str, Tuple[str, ...]] = {}
+        
+        for name, config in workflows.items():
+            self.names[name] = tuple(tokenize(config.get("api_name", name)))
+            tokens = list(self.names[name]) * name_weight
+            tokens += tokenize(config.get("description", ""))
+            self.described[name] = set(tokens)
+            for param_name in config.get("parameters", {}):
+                tokens += tokenize(param_name)
+            self.term_freqs[name] = Counter(tokens)
+            self.doc_lengths[name] = len(tokens)
+        
+        doc_count = len(self.term_freqs)
+        self.avg_length = sum(self.doc_lengths.values()) / doc_count if doc_count else 0.0
+        doc_freqs = Counter(term for freqs in self.term_freqs.values() for term in freqs)
+        self.idf = {
+            term: math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+            for term, df in doc_freqs.items()
+        }
+    
+    def score(self, query: str, described_only: bool = False) -> Dict[str, float]:
+        """BM25 score of every workflow sharing at least one term with the query
+        
+        With described_only, only terms in a workflow's name or description count.
+        """
+        scores: Dict[str, float] = {}
+        terms = set(tokenize(query))
+        for name, freqs in self.term_freqs.items():
+            norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[name] / self.avg_length)
+            total = 0.0
+            for term in terms:
+                if described_only and term not in self.described[name]:
+                    continue
+                tf = freqs.get(term)
+                if tf:
+                    total += self.idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            if total > 0:
+                scores[name] = total
+        return scores
+    
+    def name_match(self, query: str) -> Optional[str]:
+        """The workflow whose whole name appears as a phrase in the query ("view the countries")
+        
+        The longest such name wins; two of the same length are ambiguous and give None.
+        """
+        tokens = tokenize(query)
+        best, best_length, tied = None, 0, False
+        for name, words in self.names.items():
+            length = len(words)
+            if not length or length < best_length:
+                continue
+            if any(tuple(tokens[i:i + length]) == words for i in range(len(tokens) - length + 1)):
+                tied = length == best_length
+                best, best_length = name, length
+        return None if tied else best
+    
+    def search(self, query: str, top_k: int = 5) -> List[Tuple[str, float]]:
+        """Top-k (workflow name, score) pairs, best first"""
+        ranked = sorted(self.score(query).items(), key=lambda item: item[1], reverse=True)
+        return ranked[:top_k]
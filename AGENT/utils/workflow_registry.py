@@ -0,0 +1,103 @@
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from utils.config_loader import ConfigLoader
+from utils.workflow_compiler import CompiledWorkflow
+
+# A file is recompiled when either its mtime or its size changes
+FileStamp = Tuple[int, int]
+Listener = Callable[[Dict[str, Dict[str, Any]]], None]
+
+
+class WorkflowRegistry:
+    """Compiled workflows of a config directory, recompiled file by file when they change
+    
+    reload() stats every *.json file and recompiles only those whose mtime/size
+    changed. The name -> config map is then rebuilt and swapped in with a single
+    assignment, so readers always see either the old or the new set. A file that
+    fails to compile keeps its previous version until it is fixed.
+    """
+    
+    def __init__(self, config_dir: str):
+        self.config_dir = Path(config_dir)
+        self.workflows: Dict[str, Dict[str, Any]] = {}
+        self._files: Dict[Path, Tuple[FileStamp, CompiledWorkflow]] = {}
+        self._failed: Dict[Path, FileStamp] = {}
+        self._listeners: List[Listener] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self.reload(strict=True)
+    
+    def subscribe(self, listener: Listener) -> None:
+        """Call listener with the new workflow map after every change"""
+        self._listeners.append(listener)
+    
+    def reload(self, strict: bool = False) -> List[str]:
+        """Recompile changed files and swap in the new workflows; returns the changed workflow names
+        
+        With strict, an invalid file raises instead of keeping its previous version.
+        """
+        with self._lock:
+            files = {}
+            changed = []
+            for path in self.config_dir.glob("*.json"):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                stamp = (stat.st_mtime_ns, stat.st_size)
+                previous = self._files.get(path)
+                if previous is not None and previous[0] == stamp:
+                    files[path] = previous
+                    continue
+                if self._failed.get(path) == stamp:
+                    if previous is not None:
+                        files[path] = previous
+                    continue
+                try:
+                    compiled = ConfigLoader.compile(path)
+                except (OSError, ValueError) as e:
+                    if strict:
+                        raise
+                    print(f"⚠️  {e}" + ("; keeping the previous version" if previous else ""))
+                    self._failed[path] = stamp
+                    if previous is not None:
+                        files[path] = previous
+                    continue
+                self._failed.pop(path, None)
+                files[path] = (stamp, compiled)
+                changed.append(compiled.name)
+            
+            removed = [compiled.name for path, (_, compiled) in self._files.items() if path not in files]
+            if not changed and not removed:
+                return []
+            
+            self._files = files
+            self.workflows = {compiled.name: compiled.config for _, compiled in files.values()}
+            workflows = self.workflows
+        
+        for listener in self._listeners:
+            listener(workflows)
+        return changed + [name for name in removed if name not in changed]
+    
+    def watch(self, interval: float = 2.0) -> None:
+        """Poll the directory every interval seconds on a daemon thread"""
+        if self._watcher is not None:
+            return
+        
+        def poll():
+            while not self._stop.wait(interval):
+                try:
+                    names = self.reload()
+                except Exception as e:
+                    print(f"⚠️  Workflow reload failed: {e}")
+                    continue
+                if names:
+                    print(f"\n🔄 Reloaded workflows: {', '.join(names)}")
+        
+        self._watcher = threading.Thread(target=poll, name="workflow-reload", daemon=True)
+        self._watcher.start()
+    
+    def stop(self) -> None:
+        self._stop.set()
@@ -1,35 +1,67 @@
-from typing import Dict, Any, TypedDict
+from typing import Dict, Any, List, Optional, TypedDict
 from langgraph.graph import StateGraph, END
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langchain_core.runnables import RunnableConfig
 from agents.parameter_collector_agent import ParameterCollectorAgent
 from agents.api_executor_agent import APIExecutorAgent
+from agents.selectors import OptionSelector
+from utils.parameter_memory import ParameterMemory
 from services.tracing_service import tracing_service
+from services.metrics_service import metrics
+from utils.async_utils import dual_node
 import os
 
 class WorkflowState(TypedDict):
     config: Dict[str, Any]
     user_input: str
     collected_params: Dict[str, Any]
+    extract: bool
     api_response: Dict[str, Any]
     error: str
     iteration: int
     max_iterations: int
+    options: Dict[str, List[Dict[str, Any]]]
+    revise: bool
+    revisions: Dict[str, Any]
+    unchanged: bool
+    executed: bool
 
 class LangGraphWorkflowExecutor:
     def __init__(self, parameter_collector: ParameterCollectorAgent, 
-                 api_executor: APIExecutorAgent):
+                 api_executor: APIExecutorAgent, checkpointer: Optional[BaseCheckpointSaver] = None):
         self.parameter_collector = parameter_collector
         self.api_executor = api_executor
-        self.graph = self._build_graph()
+        builder = self._build_graph()
+        self.graph = builder.compile()
+        # Runs with a thread_id are checkpointed so the next turn of that thread can resume them
+        self.checkpointer = checkpointer
+        self.session_graph = builder.compile(checkpointer=checkpointer) if checkpointer else None
     
     def _build_graph(self) -> StateGraph:
         os.environ["LANGCHAIN_TRACING_V2"] = "true"
         workflow = StateGraph(WorkflowState)
         
-        workflow.add_node("collect_parameters", self._collect_parameters_node)
-        workflow.add_node("execute_api", self._execute_api_node)
+        workflow.add_node("revise_parameters", dual_node(self._revise_parameters_node))
+        workflow.add_node("collect_parameters", dual_node(self._collect_parameters_node))
+        workflow.add_node("execute_api", dual_node(self._execute_api_node))
         workflow.add_node("handle_error", self._handle_error_node)
         
-        workflow.set_entry_point("collect_parameters")
+        workflow.set_conditional_entry_point(
+            lambda state: "revise" if state.get("revise") else "collect",
+            {
+                "revise": "revise_parameters",
+                "collect": "collect_parameters"
+            }
+        )
+        # A follow-up that changes nothing is not run again (see unchanged in execute)
+        workflow.add_conditional_edges(
+            "revise_parameters",
+            lambda state: "unchanged" if state.get("unchanged") else "collect",
+            {
+                "collect": "collect_parameters",
+                "unchanged": END
+            }
+        )
         
         workflow.add_conditional_edges(
             "collect_parameters",
@@ -51,18 +83,46 @@ class LangGraphWorkflowExecutor:
         )
         
         workflow.add_edge("handle_error", END)
-        return workflow.compile()
+        return workflow
+    
+    @tracing_service.trace_function("revise_parameters_node")
+    async def _revise_parameters_node(self, state: WorkflowState) -> WorkflowState:
+        """Follow-up turn: keep the thread's parameters except those the new request changes"""
+        print("\n🔁 Resuming previous parameters...")
+        collected_params, changes = await self.parameter_collector.arevise_parameters(
+            config=state["config"],
+            user_input=state["user_input"],
+            collected_params=state.get("collected_params", {}),
+            seen_options=state.get("options", {}),
+            extract=state.get("extract", True),
+            revisions=state.get("revisions")
+        )
+        state["collected_params"] = collected_params
+        state["revise"] = False
+        state["unchanged"] = not changes
+        # Unchanged parameters are still those of the call that succeeded
+        state["executed"] = not changes
+        # The follow-up was already searched for free-text values
+        state["extract"] = False
+        return state
     
     @tracing_service.trace_function("collect_parameters_node")
-    def _collect_parameters_node(self, state: WorkflowState) -> WorkflowState:
+    async def _collect_parameters_node(self, state: WorkflowState, config: RunnableConfig) -> WorkflowState:
         try:
             print(f"\n📋 Collecting parameters (iteration {state.get('iteration', 0) + 1})...")
-            collected_params = self.parameter_collector.collect_parameters(
+            configurable = (config or {}).get("configurable", {})
+            options = dict(state.get("options") or {})
+            collected_params = await self.parameter_collector.acollect_parameters(
                 config=state["config"],
                 user_input=state["user_input"],
-                collected_params=state.get("collected_params", {})
+                collected_params=state.get("collected_params", {}),
+                extract=state.get("extract", True),
+                selector=configurable.get("selector"),
+                seen_options=options,
+                memory=configurable.get("memory")
             )
             state["collected_params"] = collected_params
+            state["options"] = options
             state["iteration"] = state.get("iteration", 0) + 1
             state["error"] = ""
             print(f"✅ Collected {len(collected_params)} parameters")
@@ -72,14 +132,15 @@ class LangGraphWorkflowExecutor:
         return state
     
     @tracing_service.trace_function("execute_api_node")
-    def _execute_api_node(self, state: WorkflowState) -> WorkflowState:
+    async def _execute_api_node(self, state: WorkflowState) -> WorkflowState:
         try:
             print("\n🚀 Executing API call...")
-            api_response = self.api_executor.execute(
+            api_response = await self.api_executor.aexecute(
                 config=state["config"],
                 parameters=state["collected_params"]
             )
             state["api_response"] = api_response
+            state["executed"] = api_response.get("success", True)
             if not api_response.get("success", True):
                 state["error"] = api_response.get("error", "API call failed")
         except Exception as e:
@@ -108,9 +169,14 @@ class LangGraphWorkflowExecutor:
         missing = [p for p in required_params if p not in collected or collected[p] is None]
         
         if missing:
+            workflow = config.get("api_name", "unknown")
             if state.get("iteration", 0) >= state.get("max_iterations", 10):
                 state["error"] = f"Could not collect required parameters: {missing}"
+                metrics.inc("agent_collect_parameters_exhausted_total",
+                            "Workflows that gave up collecting required parameters", workflow=workflow)
                 return "error"
+            metrics.inc("agent_collect_parameters_retries_total",
+                        "collect_parameters runs repeated because required parameters were missing", workflow=workflow)
             return "retry"
         return "execute"
     
@@ -122,27 +188,116 @@ class LangGraphWorkflowExecutor:
             return "error"
         return "success"
     
-    @tracing_service.trace_function("workflow_execute")
-    def execute(self, config: Dict[str, Any], user_input: str) -> Dict[str, Any]:
-        initial_state: WorkflowState = {
+    @staticmethod
+    def _initial_state(config: Dict[str, Any], user_input: str,
+                       collected_params: Optional[Dict[str, Any]] = None, extract: bool = True) -> WorkflowState:
+        return {
             "config": config,
             "user_input": user_input,
-            "collected_params": {},
+            "collected_params": dict(collected_params or {}),
+            "extract": extract,
             "api_response": {},
             "error": "",
             "iteration": 0,
-            "max_iterations": 10
+            "max_iterations": 10,
+            "options": {},
+            "revise": False,
+            "revisions": {},
+            "unchanged": False,
+            "executed": False
         }
+    
+    @classmethod
+    def _turn_state(cls, previous: Dict[str, Any], config: Dict[str, Any], user_input: str,
+                    collected_params: Optional[Dict[str, Any]], extract: bool, resume: bool = True) -> WorkflowState:
+        """Input for a thread's next turn: a resume of the same workflow, otherwise a fresh start
         
+        Only a run whose API call succeeded is resumed; after a failure the request starts over.
+        Keys left out of a resume (collected_params, options) keep their checkpointed values.
+        """
+        if not resume or previous.get("config") != config or not previous.get("executed"):
+            return cls._initial_state(config, user_input, collected_params, extract)
+        return {
+            "config": config,
+            "user_input": user_input,
+            "extract": extract,
+            "api_response": {},
+            "error": "",
+            "iteration": 0,
+            "max_iterations": 10,
+            "revise": True,
+            "revisions": dict(collected_params or {}),
+            "unchanged": False,
+            "executed": False
+        }
+    
+    @staticmethod
+    def _run_config(config: Dict[str, Any], selector: Optional[OptionSelector],
+                    thread_id: Optional[str] = None, memory: Optional[ParameterMemory] = None) -> RunnableConfig:
+        run_config: RunnableConfig = {"run_name": f"Workflow: {config.get('api_name', 'Unknown')}"}
+        configurable = {}
+        if selector is not None:
+            configurable["selector"] = selector
+        if thread_id is not None:
+            configurable["thread_id"] = f"{thread_id}:workflow"
+        if memory is not None:
+            configurable["memory"] = memory
+        if configurable:
+            run_config["configurable"] = configurable
+        return run_config
+    
+    def _session_graph(self, thread_id: Optional[str]):
+        if thread_id is not None and self.session_graph is None:
+            raise ValueError("thread_id needs an executor created with a checkpointer")
+        return self.session_graph if thread_id is not None else self.graph
+    
+    @tracing_service.trace_function("workflow_execute")
+    def execute(self, config: Dict[str, Any], user_input: str,
+                collected_params: Optional[Dict[str, Any]] = None, extract: bool = True,
+                selector: Optional[OptionSelector] = None, thread_id: Optional[str] = None,
+                memory: Optional[ParameterMemory] = None, resume: bool = True) -> Dict[str, Any]:
+        """Run the workflow; collected_params pre-fills values, extract=False skips LLM extraction
+        and selector overrides the collector's selection policy for this run. With a thread_id
+        the run is checkpointed, and a later turn of the same workflow on that thread resumes
+        from its parameters, re-collecting only what the new request changes; a turn that
+        changes none of them is not run and comes back with unchanged=True (resume=False
+        starts afresh instead). A session memory supplies dropdown values already chosen by
+        earlier requests of the session."""
         print("\n🔍 LangGraph execution will be traced in LangSmith...")
-        final_state = self.graph.invoke(
-            initial_state,
-            config={"run_name": f"Workflow: {config.get('api_name', 'Unknown')}"}
-        )
-        
+        graph = self._session_graph(thread_id)
+        run_config = self._run_config(config, selector, thread_id, memory)
+        if thread_id is None:
+            state = self._initial_state(config, user_input, collected_params, extract)
+        else:
+            previous = graph.get_state(run_config).values
+            state = self._turn_state(previous, config, user_input, collected_params, extract, resume)
+        return self._result(graph.invoke(state, config=run_config))
+    
+    @tracing_service.trace_function("workflow_execute")
+    async def aexecute(self, config: Dict[str, Any], user_input: str,
+                       collected_params: Optional[Dict[str, Any]] = None, extract: bool = True,
+                       selector: Optional[OptionSelector] = None, thread_id: Optional[str] = None,
+                       memory: Optional[ParameterMemory] = None, resume: bool = True) -> Dict[str, Any]:
+        graph = self._session_graph(thread_id)
+        run_config = self._run_config(config, selector, thread_id, memory)
+        if thread_id is None:
+            state = self._initial_state(config, user_input, collected_params, extract)
+        else:
+            previous = (await graph.aget_state(run_config)).values
+            state = self._turn_state(previous, config, user_input, collected_params, extract, resume)
+        return self._result(await graph.ainvoke(state, config=run_config))
+    
+    def forget(self, thread_id: str) -> None:
+        """Drop a thread's checkpoints"""
+        if self.checkpointer is not None:
+            self.checkpointer.delete_thread(f"{thread_id}:workflow")
+    
+    @staticmethod
+    def _result(final_state: WorkflowState) -> Dict[str, Any]:
         return {
             "success": not final_state.get("error"),
             "collected_params": final_state.get("collected_params", {}),
             "api_response": final_state.get("api_response", {}),
-            "error": final_state.get("error", "")
+            "error": final_state.get("error", ""),
+            "unchanged": final_state.get("unchanged", False)
         }
@@ -1,12 +1,17 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from routers import states, policies, plans, risks, identifier, identifier_v2, dummy_endpoints
+from fastapi.responses import ORJSONResponse
+from utils.response_cache import CachedRoute
+from routers import states, policies, plans, risks, identifier, identifier_v2, quotes, catalog, dummy_endpoints
 
 app = FastAPI(
     title="Health Insurance Enrollment API",
     description="REST APIs for dynamic form-filling system with interdependent data flow",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
+# App-level GETs below are static; routers opt in with route_class=CachedRoute
+app.router.route_class = CachedRoute
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,6 +27,8 @@ app.include_router(plans.router)
 app.include_router(risks.router)
 app.include_router(identifier.router)
 app.include_router(identifier_v2.router)
+app.include_router(quotes.router)
+app.include_router(catalog.router)
 app.include_router(dummy_endpoints.router)
 
 @app.get("/")
@@ -38,6 +45,8 @@ def root():
             "risk_types": "/api/v1/programs/{program_name_or_id}/risk-types",
             "risk_levels": "/api/v1/risk-types/{risk_type_name_or_id}/risk-levels",
             "create_identifier": "/api/v1/identifier/create",
+            "bulk_quotes": "/api/v1/quotes/bulk",
+            "catalog_tree": "/api/v1/catalog/tree?state={state}&depth={depth}",
             "countries": "/api/v1/dummy/countries",
             "cities": "/api/v1/dummy/cities?country={country_name}",
             "categories": "/api/v1/dummy/categories",
@@ -0,0 +1,66 @@
+from fastapi import APIRouter, Query, HTTPException
+from typing import Any, Dict, Optional
+from utils.catalog import catalog, ENROLLMENT_LEVELS
+from utils.response_cache import CachedRoute
+
+router = APIRouter(prefix="/api/v1/catalog", tags=["Catalog"], route_class=CachedRoute)
+
+def _node(level: str, item: Dict[str, Any], depth: Optional[int]) -> Dict[str, Any]:
+    """One tree node with its children expanded until the depth limit"""
+    index = catalog.enrollment[level]
+    node = {"level": level, "id": item[index.id_field], "name": item[index.name_field]}
+    position = ENROLLMENT_LEVELS.index(level)
+    if position + 1 < len(ENROLLMENT_LEVELS) and depth != 0:
+        child_level = ENROLLMENT_LEVELS[position + 1]
+        node["children"] = [
+            _node(child_level, child, None if depth is None else depth - 1)
+            for child in catalog.enrollment[child_level].children_of(node["id"])
+        ]
+    return node
+
+@router.get("/tree", response_model=dict)
+def get_catalog_tree(
+    state: Optional[str] = Query(None, description="State name or ID"),
+    policy: Optional[str] = Query(None, description="Policy name or ID"),
+    plan: Optional[str] = Query(None, description="Plan name or ID"),
+    program: Optional[str] = Query(None, description="Program name or ID"),
+    risk_type: Optional[str] = Query(None, description="Risk type name or ID"),
+    depth: Optional[int] = Query(None, ge=0, le=5, description="Levels to expand below the root (default: all)"),
+    active: bool = Query(True, description="Only include active states when no state is given")
+):
+    """Retrieve the state -> policy -> plan -> program -> risk type -> risk level tree in one call
+
+    The tree is rooted at the deepest given node, or at every state when none is given.
+    Given levels must be contiguous; each name is resolved under the level above it.
+    """
+    selected = {"state": state, "policy": policy, "plan": plan, "program": program, "risk_type": risk_type}
+    given = [level for level, value in selected.items() if value is not None]
+    if given:
+        start = ENROLLMENT_LEVELS.index(given[0])
+        if given != list(ENROLLMENT_LEVELS[start:start + len(given)]):
+            raise HTTPException(status_code=400, detail="Tree filters must be contiguous levels (e.g. state, policy, plan)")
+    
+    root_level = None
+    root = None
+    for level in given:
+        index = catalog.enrollment[level]
+        item = index.get_in(root[index.parent_field], selected[level]) if root is not None else index.get(selected[level])
+        if not item:
+            label = level.replace("_", " ").capitalize()
+            raise HTTPException(status_code=404, detail=f"{label} not found" + (" for the given parent" if root else ""))
+        root_level, root = level, item
+    
+    if root is None:
+        root_level = "state"
+        roots = catalog.active_states if active else catalog.states.items
+    else:
+        roots = [root]
+    
+    start = ENROLLMENT_LEVELS.index(root_level)
+    end = len(ENROLLMENT_LEVELS) if depth is None else min(len(ENROLLMENT_LEVELS), start + depth + 1)
+    return {
+        "success": True,
+        "levels": list(ENROLLMENT_LEVELS[start:end]),
+        "data": [_node(root_level, item, depth) for item in roots],
+        "message": "Catalog tree fetched successfully"
+    }
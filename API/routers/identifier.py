@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from models.schemas import EnrollmentRequest, EnrollmentResponse
-from utils.data import STATES, POLICIES, PLANS, PROGRAMS, RISK_TYPES, RISK_LEVELS
+from utils.catalog import catalog
+from utils.premium_engine import premium_engine
 from datetime import datetime
 import uuid
 
@@ -11,36 +12,37 @@ def create_enrollment_identifier(request: EnrollmentRequest):
     """Create a unique enrollment identifier by consolidating all selections from the enrollment flow"""
     
     # Validate all dependencies
-    state = next((s for s in STATES if s["state_id"] == request.state_id), None)
+    state = catalog.states.by_id.get(request.state_id)
     if not state:
         raise HTTPException(status_code=404, detail="Invalid state_id")
     
-    policy = next((p for p in POLICIES if p["policy_id"] == request.policy_id and p["state_id"] == request.state_id), None)
+    policy = catalog.policies.child_by_id(request.state_id, request.policy_id)
     if not policy:
         raise HTTPException(status_code=404, detail="Invalid policy_id or policy not available in selected state")
     
-    plan = next((p for p in PLANS if p["plan_id"] == request.plan_id and p["policy_id"] == request.policy_id), None)
+    plan = catalog.plans.child_by_id(request.policy_id, request.plan_id)
     if not plan:
         raise HTTPException(status_code=404, detail="Invalid plan_id or plan not available for selected policy")
     
-    program = next((p for p in PROGRAMS if p["program_id"] == request.program_id and p["plan_id"] == request.plan_id), None)
+    program = catalog.programs.child_by_id(request.plan_id, request.program_id)
     if not program:
         raise HTTPException(status_code=404, detail="Invalid program_id or program not available for selected plan")
     
-    risk_type = next((r for r in RISK_TYPES if r["risk_type_id"] == request.risk_type_id and r["program_id"] == request.program_id), None)
+    risk_type = catalog.risk_types.child_by_id(request.program_id, request.risk_type_id)
     if not risk_type:
         raise HTTPException(status_code=404, detail="Invalid risk_type_id or risk type not available for selected program")
     
-    risk_level = next((r for r in RISK_LEVELS if r["risk_level_id"] == request.risk_level_id and r["risk_type_id"] == request.risk_type_id), None)
+    risk_level = catalog.risk_levels.child_by_id(request.risk_type_id, request.risk_level_id)
     if not risk_level:
         raise HTTPException(status_code=404, detail="Invalid risk_level_id or risk level not available for selected risk type")
     
     # Calculate premium
-    base_premium = policy["base_premium"]
-    plan_adjustment = base_premium * (plan["premium_multiplier"] - 1)
-    program_cost = program["additional_cost"]
-    risk_adjustment = (base_premium * risk_type["premium_impact_percentage"] / 100) + risk_level["premium_adjustment"]
-    total_premium = base_premium + plan_adjustment + program_cost + risk_adjustment
+    premium = premium_engine.quote(plan["plan_id"], program["program_id"], risk_type["risk_type_id"], risk_level["risk_level_id"])
+    base_premium = premium["base_premium"]
+    plan_adjustment = premium["plan_adjustment"]
+    program_cost = premium["program_cost"]
+    risk_adjustment = premium["risk_adjustment"]
+    total_premium = premium["total_premium"]
     
     # Generate enrollment ID and identifier code
     enrollment_id = f"ENR{datetime.now().strftime('%Y%m%d')}{str(uuid.uuid4().int)[:6]}"
@@ -1,8 +1,13 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import Optional
-from utils.data import STATES, POLICIES, PLANS, PROGRAMS, RISK_TYPES, RISK_LEVELS
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
+from typing import Any, Dict, Iterator, Optional
+from utils.catalog import catalog
+from utils.premium_engine import premium_engine
+from utils.record_stream import iter_records
 from datetime import datetime
+import json
+import tempfile
 import uuid
 
 router = APIRouter(prefix="/api/v1", tags=["Identifier V2"])
@@ -22,52 +27,60 @@ class IdentifierRequest(BaseModel):
 @router.post("/identifier/create", response_model=dict)
 def create_identifier_flexible(request: IdentifierRequest):
     """Create enrollment identifier accepting names or IDs"""
+    return {
+        "success": True,
+        "data": build_identifier(request),
+        "message": "Identifier created successfully"
+    }
+
+def build_identifier(request: IdentifierRequest, enrollment_id: Optional[str] = None) -> Dict[str, Any]:
+    """Resolve the request against the catalog and build the identifier record (raises HTTPException)"""
     
     # Find state
-    state = next((s for s in STATES if s["state_id"] == request.state or s["state_name"] == request.state), None)
+    state = catalog.states.get(request.state)
     if not state:
         raise HTTPException(status_code=404, detail="State not found")
     
     # Find policy
-    policy = next((p for p in POLICIES if (p["policy_id"] == request.policy or p["policy_name"] == request.policy) and p["state_id"] == state["state_id"]), None)
+    policy = catalog.policies.get_in(state["state_id"], request.policy)
     if not policy:
         raise HTTPException(status_code=404, detail="Policy not found for state")
     
     # Find plan
-    plan = next((p for p in PLANS if (p["plan_id"] == request.plan or p["plan_name"] == request.plan) and p["policy_id"] == policy["policy_id"]), None)
+    plan = catalog.plans.get_in(policy["policy_id"], request.plan)
     if not plan:
         raise HTTPException(status_code=404, detail="Plan not found for policy")
     
     # Optional: Find program
     program = None
-    program_cost = 0
     if request.program:
-        program = next((p for p in PROGRAMS if (p["program_id"] == request.program or p["program_name"] == request.program) and p["plan_id"] == plan["plan_id"]), None)
-        if program:
-            program_cost = program["additional_cost"]
+        program = catalog.programs.get_in(plan["plan_id"], request.program)
     
     # Optional: Find risk type
     risk_type = None
-    risk_adjustment = 0
     if request.risk_type and program:
-        risk_type = next((r for r in RISK_TYPES if (r["risk_type_id"] == request.risk_type or r["risk_type_name"] == request.risk_type) and r["program_id"] == program["program_id"]), None)
-        if risk_type:
-            risk_adjustment = policy["base_premium"] * risk_type["premium_impact_percentage"] / 100
+        risk_type = catalog.risk_types.get_in(program["program_id"], request.risk_type)
     
     # Optional: Find risk level
     risk_level = None
     if request.risk_level and risk_type:
-        risk_level = next((r for r in RISK_LEVELS if (r["risk_level_id"] == request.risk_level or r["risk_level_name"] == request.risk_level) and r["risk_type_id"] == risk_type["risk_type_id"]), None)
-        if risk_level:
-            risk_adjustment += risk_level["premium_adjustment"]
+        risk_level = catalog.risk_levels.get_in(risk_type["risk_type_id"], request.risk_level)
     
-    # Calculate premium
-    base_premium = policy["base_premium"]
-    plan_adjustment = base_premium * (plan["premium_multiplier"] - 1)
-    total_premium = base_premium + plan_adjustment + program_cost + risk_adjustment
+    # Look up the precomputed premium for the deepest resolved level
+    premium = premium_engine.quote(
+        plan["plan_id"],
+        program["program_id"] if program else None,
+        risk_type["risk_type_id"] if risk_type else None,
+        risk_level["risk_level_id"] if risk_level else None
+    )
+    base_premium = premium["base_premium"]
+    plan_adjustment = premium["plan_adjustment"]
+    program_cost = premium["program_cost"]
+    risk_adjustment = premium["risk_adjustment"]
+    total_premium = premium["total_premium"]
     
     # Generate IDs
-    enrollment_id = f"ENR{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    enrollment_id = enrollment_id or f"ENR{datetime.now().strftime('%Y%m%d%H%M%S')}"
     identifier_code = f"{state['state_code']}-{policy['policy_name'][:3].upper()}-{plan['plan_name'][:3].upper()}-{datetime.now().strftime('%Y%m%d')}"
     
     response_data = {
@@ -97,8 +110,39 @@ def create_identifier_flexible(request: IdentifierRequest):
         }
     }
     
-    return {
-        "success": True,
-        "data": response_data,
-        "message": "Identifier created successfully"
-    }
+    return response_data
+
+@router.post("/identifier/create/batch")
+async def create_identifiers_batch(request: Request):
+    """Create many identifiers from a JSON array or NDJSON body of IdentifierRequest records
+    
+    Results stream back as NDJSON, one success or error line per record in input order.
+    The upload is spooled to a temporary file (on disk past 1 MB) and parsed one record
+    at a time, so memory stays flat regardless of batch size.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    async for chunk in request.stream():
+        spool.write(chunk)
+    spool.seek(0)
+    
+    return StreamingResponse(_batch_results(spool), media_type="application/x-ndjson")
+
+def _batch_results(spool) -> Iterator[bytes]:
+    batch_id = f"ENR{datetime.now().strftime('%Y%m%d%H%M%S')}{str(uuid.uuid4().int)[:6]}"
+    try:
+        for index, record, error in iter_records(spool):
+            if error is None:
+                try:
+                    item = IdentifierRequest.model_validate(record)
+                    data = build_identifier(item, enrollment_id=f"{batch_id}-{index:06d}")
+                    result = {"index": index, "success": True, "data": data}
+                except ValidationError as e:
+                    result = {"index": index, "success": False, "status_code": 422,
+                              "error": e.errors(include_url=False, include_context=False)}
+                except HTTPException as e:
+                    result = {"index": index, "success": False, "status_code": e.status_code, "error": e.detail}
+            else:
+                result = {"index": index, "success": False, "status_code": 400, "error": error}
+            yield (json.dumps(result, default=str) + "\n").encode("utf-8")
+    finally:
+        spool.close()
@@ -1,31 +1,32 @@
-from fastapi import APIRouter, Path, Query, HTTPException
+from fastapi import APIRouter, Depends, Path, Query, HTTPException
 from typing import Optional
-from utils.data import PLANS, POLICIES, PROGRAMS, STATES
+from utils.catalog import catalog
+from utils.response_cache import CachedRoute
+from utils.pagination import Page, PageParams
 
-router = APIRouter(prefix="/api/v1", tags=["Plans"])
+router = APIRouter(prefix="/api/v1", tags=["Plans"], route_class=CachedRoute)
 
 @router.get("/plans", response_model=dict)
 def get_plans_by_query(
     state: str = Query(..., description="State name or ID"),
     policy: str = Query(..., description="Policy name or ID"),
-    min_coverage: Optional[float] = Query(None, description="Minimum coverage amount filter")
+    min_coverage: Optional[float] = Query(None, description="Minimum coverage amount filter"),
+    paging: PageParams = Depends()
 ):
     """Retrieve available insurance plans for a specific state and policy (query params)"""
-    state_obj = next((s for s in STATES if s["state_id"] == state or s["state_name"] == state), None)
+    state_obj = catalog.states.get(state)
     if not state_obj:
         raise HTTPException(status_code=404, detail="State not found")
     
-    policy_obj = next((p for p in POLICIES if (p["policy_id"] == policy or p["policy_name"] == policy) and p["state_id"] == state_obj["state_id"]), None)
+    policy_obj = catalog.policies.get_in(state_obj["state_id"], policy)
     if not policy_obj:
         raise HTTPException(status_code=404, detail="Policy not found for the given state")
     
-    filtered_plans = [p for p in PLANS if p["policy_id"] == policy_obj["policy_id"]]
+    filtered_plans = catalog.plans.children_of(policy_obj["policy_id"])
     
-    return {
-        "success": True,
-        "classPlanList": [{**p, "PlanDescription": p["plan_name"]} for p in filtered_plans],
-        "message": "Plans fetched successfully"
-    }
+    return Page(filtered_plans, paging).respond(
+        "classPlanList", lambda p: {**p, "PlanDescription": p["plan_name"]}, message="Plans fetched successfully"
+    )
 
 @router.get("/policies/{policy_id}/plans", response_model=dict)
 def get_plans(
@@ -33,10 +34,10 @@ def get_plans(
     min_coverage: Optional[float] = Query(None, description="Minimum coverage amount filter")
 ):
     """Retrieve available insurance plans for a specific policy"""
-    if not any(p["policy_id"] == policy_id for p in POLICIES):
+    if policy_id not in catalog.policies.by_id:
         raise HTTPException(status_code=404, detail="Policy not found")
     
-    filtered_plans = [p for p in PLANS if p["policy_id"] == policy_id]
+    filtered_plans = catalog.plans.children_of(policy_id)
     
     return {
         "success": True,
@@ -51,11 +52,11 @@ def get_programs(
     program_type: Optional[str] = Query(None, description="Filter by program type")
 ):
     """Retrieve available health programs under a specific plan"""
-    plan = next((p for p in PLANS if p["plan_id"] == plan_identifier or p["plan_name"] == plan_identifier), None)
+    plan = catalog.plans.get(plan_identifier)
     if not plan:
         raise HTTPException(status_code=404, detail="Plan not found")
     
-    filtered_programs = [p for p in PROGRAMS if p["plan_id"] == plan["plan_id"]]
+    filtered_programs = catalog.programs.children_of(plan["plan_id"])
     if program_type:
         filtered_programs = [p for p in filtered_programs if p["program_type"] == program_type]
     
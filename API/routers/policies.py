@@ -1,28 +1,29 @@
-from fastapi import APIRouter, Path, Query, HTTPException
+from fastapi import APIRouter, Depends, Path, Query, HTTPException
 from typing import Optional
-from utils.data import POLICIES, STATES
+from utils.catalog import catalog
+from utils.response_cache import CachedRoute
+from utils.pagination import Page, PageParams
 
-router = APIRouter(prefix="/api/v1", tags=["Policies"])
+router = APIRouter(prefix="/api/v1", tags=["Policies"], route_class=CachedRoute)
 
 @router.get("/policies", response_model=dict)
 def get_policies_by_state(
     state: str = Query(..., description="State name or ID"),
-    category: Optional[str] = Query(None, description="Filter by policy category")
+    category: Optional[str] = Query(None, description="Filter by policy category"),
+    paging: PageParams = Depends()
 ):
     """Retrieve available health insurance policies for a specific state (query param)"""
-    state_obj = next((s for s in STATES if s["state_id"] == state or s["state_name"] == state), None)
+    state_obj = catalog.states.get(state)
     if not state_obj:
         raise HTTPException(status_code=404, detail="State not found")
     
-    filtered_policies = [p for p in POLICIES if p["state_id"] == state_obj["state_id"]]
+    filtered_policies = catalog.policies.children_of(state_obj["state_id"])
     if category:
         filtered_policies = [p for p in filtered_policies if p["category"] == category]
     
-    return {
-        "success": True,
-        "classPlanList": [{**p, "PolicyId": p["policy_id"]} for p in filtered_policies],
-        "message": "Policies fetched successfully"
-    }
+    return Page(filtered_policies, paging).respond(
+        "classPlanList", lambda p: {**p, "PolicyId": p["policy_id"]}, message="Policies fetched successfully"
+    )
 
 @router.get("/states/{state_id}/policies", response_model=dict)
 def get_policies(
@@ -30,10 +31,10 @@ def get_policies(
     category: Optional[str] = Query(None, description="Filter by policy category")
 ):
     """Retrieve available health insurance policies for a specific state"""
-    if not any(s["state_id"] == state_id for s in STATES):
+    if state_id not in catalog.states.by_id:
         raise HTTPException(status_code=404, detail="State not found")
     
-    filtered_policies = [p for p in POLICIES if p["state_id"] == state_id]
+    filtered_policies = catalog.policies.children_of(state_id)
     if category:
         filtered_policies = [p for p in filtered_policies if p["category"] == category]
     
@@ -0,0 +1,53 @@
+from fastapi import APIRouter
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+from utils.premium_engine import premium_engine
+
+router = APIRouter(prefix="/api/v1/quotes", tags=["Quotes"])
+
+class QuoteCombination(BaseModel):
+    state: str
+    policy: str
+    plan: str
+    program: Optional[str] = None
+    risk_type: Optional[str] = None
+    risk_level: Optional[str] = None
+
+class QuoteFilters(BaseModel):
+    state: Optional[str] = None
+    policy: Optional[str] = None
+    plan: Optional[str] = None
+    program: Optional[str] = None
+    risk_type: Optional[str] = None
+    risk_level: Optional[str] = None
+    category: Optional[str] = None
+    tier: Optional[str] = None
+    depth: Optional[Literal["plan", "program", "risk_type", "risk_level"]] = None
+    max_premium: Optional[float] = None
+
+class BulkQuoteRequest(BaseModel):
+    combinations: Optional[List[QuoteCombination]] = Field(None, max_length=10000)
+    filters: QuoteFilters = QuoteFilters()
+    top_k: int = Field(10, ge=1, le=1000)
+
+@router.post("/bulk", response_model=dict)
+def bulk_quotes(request: BulkQuoteRequest):
+    """Price many state/policy/plan/program/risk combinations (names or IDs) and return the cheapest top_k
+    
+    Without combinations every valid path is priced; filter depth then defaults to complete
+    paths (risk_level). Invalid combinations are reported by their index in the request.
+    """
+    filters = request.filters.model_dump()
+    if request.combinations is None and filters["depth"] is None:
+        filters["depth"] = "risk_level"
+    combinations = [c.model_dump() for c in request.combinations] if request.combinations is not None else None
+    
+    result = premium_engine.bulk_quote(combinations, filters, request.top_k)
+    
+    return {
+        "success": True,
+        "data": result["quotes"],
+        "matched": result["matched"],
+        "invalid_combinations": result["invalid"],
+        "message": "Quotes calculated successfully"
+    }
@@ -1,16 +1,17 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, Query
 from typing import List
 from models.schemas import StateResponse
-from utils.data import STATES
+from utils.catalog import catalog
+from utils.response_cache import CachedRoute
+from utils.pagination import Page, PageParams
 
-router = APIRouter(prefix="/api/v1/states", tags=["States"])
+router = APIRouter(prefix="/api/v1/states", tags=["States"], route_class=CachedRoute)
 
 @router.get("", response_model=dict)
-def get_states(active: bool = Query(True, description="Filter by active states")):
+def get_states(
+    active: bool = Query(True, description="Filter by active states"),
+    paging: PageParams = Depends()
+):
     """Retrieve list of states where health insurance enrollment is available"""
-    filtered_states = [s for s in STATES if s["active"] == active] if active else STATES
-    return {
-        "success": True,
-        "data": filtered_states,
-        "message": "States fetched successfully"
-    }
+    filtered_states = catalog.active_states if active else catalog.states.items
+    return Page(filtered_states, paging).respond("data", message="States fetched successfully")
@@ -0,0 +1,95 @@
+"""Indexed, read-only view of the in-memory data store
+
+Routers resolve entities by ID or name and list children by parent ID on every
+request; the indexes here are built once at startup so those lookups are O(1).
+"""
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from utils import data
+
+ENROLLMENT_LEVELS = ("state", "policy", "plan", "program", "risk_type", "risk_level")
+
+
+class EntityIndex:
+    """Hash indexes over one entity list: by ID, by name, by (parent ID, name) and parent -> children"""
+    
+    def __init__(self, items: List[Dict[str, Any]], id_field: str, name_field: str,
+                 parent_field: Optional[str] = None, ignore_case: bool = False):
+        self.items = items
+        self.id_field = id_field
+        self.name_field = name_field
+        self.parent_field = parent_field
+        self.ignore_case = ignore_case
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+        self.by_name: Dict[str, Dict[str, Any]] = {}
+        self.by_parent_name: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.children: Dict[str, List[Dict[str, Any]]] = {}
+        
+        # setdefault keeps the first occurrence, matching the old next(...) scans
+        for item in items:
+            name = self._name_key(item[name_field])
+            self.by_id.setdefault(item[id_field], item)
+            self.by_name.setdefault(name, item)
+            if parent_field:
+                parent_id = item[parent_field]
+                self.by_parent_name.setdefault((parent_id, name), item)
+                self.children.setdefault(parent_id, []).append(item)
+    
+    def _name_key(self, name: str) -> str:
+        return name.lower() if self.ignore_case else name
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Find an entity by ID or name"""
+        return self.by_id.get(key) or self.by_name.get(self._name_key(key))
+    
+    def get_in(self, parent_id: str, key: str) -> Optional[Dict[str, Any]]:
+        """Find an entity by ID or name among the children of parent_id"""
+        return self.child_by_id(parent_id, key) or self.by_parent_name.get((parent_id, self._name_key(key)))
+    
+    def child_by_id(self, parent_id: str, item_id: str) -> Optional[Dict[str, Any]]:
+        """Find an entity by ID only if it belongs to parent_id"""
+        item = self.by_id.get(item_id)
+        return item if item is not None and item[self.parent_field] == parent_id else None
+    
+    def children_of(self, parent_id: str) -> List[Dict[str, Any]]:
+        return self.children.get(parent_id, [])
+
+
+class Catalog:
+    """All entity indexes plus a version that changes whenever they are rebuilt"""
+    
+    def __init__(self):
+        self.version = 0
+        self._lock = threading.Lock()
+        self.rebuild()
+    
+    def rebuild(self) -> None:
+        """Re-index the data store (call after mutating utils.data)"""
+        with self._lock:
+            self.states = EntityIndex(data.STATES, "state_id", "state_name")
+            self.active_states = [s for s in data.STATES if s["active"]]
+            self.policies = EntityIndex(data.POLICIES, "policy_id", "policy_name", "state_id")
+            self.plans = EntityIndex(data.PLANS, "plan_id", "plan_name", "policy_id")
+            self.programs = EntityIndex(data.PROGRAMS, "program_id", "program_name", "plan_id")
+            self.risk_types = EntityIndex(data.RISK_TYPES, "risk_type_id", "risk_type_name", "program_id")
+            self.risk_levels = EntityIndex(data.RISK_LEVELS, "risk_level_id", "risk_level_name", "risk_type_id")
+            # Enrollment hierarchy, parent level first
+            self.enrollment = dict(zip(ENROLLMENT_LEVELS, (
+                self.states, self.policies, self.plans, self.programs, self.risk_types, self.risk_levels
+            )))
+            
+            self.countries = EntityIndex(data.COUNTRIES, "id", "name", ignore_case=True)
+            self.cities = EntityIndex(
+                [city for cities in data.CITIES.values() for city in cities], "id", "name", "country_id"
+            )
+            self.categories = EntityIndex(data.CATEGORIES, "id", "name")
+            self.products = EntityIndex(
+                [product for products in data.PRODUCTS.values() for product in products], "id", "name", "category"
+            )
+            self.brands = EntityIndex(
+                [brand for brands in data.BRANDS.values() for brand in brands], "id", "name", "product_id"
+            )
+            self.version += 1
+
+
+catalog = Catalog()
@@ -90,3 +90,62 @@ RISK_LEVELS = [
     {"risk_level_id": "RL014", "risk_type_id": "RT009", "risk_level_name": "Tier 1", "tier": "basic", "premium_adjustment": 10, "description": "High-risk maternity"},
     {"risk_level_id": "RL015", "risk_type_id": "RT010", "risk_level_name": "Tier 1", "tier": "basic", "premium_adjustment": 0, "description": "Healthy wellness"}
 ]
+
+# Dummy endpoint data (countries, cities, product catalog)
+COUNTRIES = [
+    {"id": "IN", "name": "India", "code": "+91"},
+    {"id": "US", "name": "United States", "code": "+1"},
+    {"id": "UK", "name": "United Kingdom", "code": "+44"},
+    {"id": "CA", "name": "Canada", "code": "+1"}
+]
+
+CITIES = {
+    "IN": [
+        {"id": "MUM", "name": "Mumbai", "country_id": "IN"},
+        {"id": "DEL", "name": "Delhi", "country_id": "IN"},
+        {"id": "BLR", "name": "Bangalore", "country_id": "IN"},
+        {"id": "HYD", "name": "Hyderabad", "country_id": "IN"}
+    ],
+    "US": [
+        {"id": "NYC", "name": "New York", "country_id": "US"},
+        {"id": "LAX", "name": "Los Angeles", "country_id": "US"},
+        {"id": "CHI", "name": "Chicago", "country_id": "US"}
+    ],
+    "UK": [
+        {"id": "LON", "name": "London", "country_id": "UK"},
+        {"id": "MAN", "name": "Manchester", "country_id": "UK"}
+    ],
+    "CA": [
+        {"id": "TOR", "name": "Toronto", "country_id": "CA"},
+        {"id": "VAN", "name": "Vancouver", "country_id": "CA"}
+    ]
+}
+
+CATEGORIES = [
+    {"id": "electronics", "name": "Electronics", "description": "Electronic devices"},
+    {"id": "clothing", "name": "Clothing", "description": "Apparel and fashion"},
+    {"id": "books", "name": "Books", "description": "Books and publications"}
+]
+
+PRODUCTS = {
+    "electronics": [
+        {"id": "P001", "name": "Laptop", "category": "electronics", "price": 50000},
+        {"id": "P002", "name": "Mobile Phone", "category": "electronics", "price": 30000},
+        {"id": "P003", "name": "Tablet", "category": "electronics", "price": 25000}
+    ],
+    "clothing": [
+        {"id": "P004", "name": "T-Shirt", "category": "clothing", "price": 500},
+        {"id": "P005", "name": "Jeans", "category": "clothing", "price": 1500},
+        {"id": "P006", "name": "Jacket", "category": "clothing", "price": 3000}
+    ],
+    "books": [
+        {"id": "P007", "name": "Python Programming", "category": "books", "price": 800},
+        {"id": "P008", "name": "AI Handbook", "category": "books", "price": 1200}
+    ]
+}
+
+BRANDS = {
+    "P001": [{"id": "B001", "name": "Dell", "product_id": "P001"}, {"id": "B002", "name": "HP", "product_id": "P001"}],
+    "P002": [{"id": "B003", "name": "Samsung", "product_id": "P002"}, {"id": "B004", "name": "Apple", "product_id": "P002"}],
+    "P003": [{"id": "B005", "name": "iPad", "product_id": "P003"}, {"id": "B006", "name": "Samsung Tab", "product_id": "P003"}]
+}
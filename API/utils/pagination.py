@@ -0,0 +1,84 @@
+"""Opaque-cursor pagination and NDJSON streaming for list endpoints
+
+Cursors encode the offset of the next item together with the catalog version,
+so a cursor issued before the catalog was re-indexed is rejected instead of
+silently skipping or repeating items.
+"""
+import base64
+import json
+import orjson
+from typing import Any, Callable, Iterator, Optional, Sequence
+from fastapi import HTTPException, Query
+from fastapi.responses import StreamingResponse
+from utils.catalog import catalog
+
+MAX_LIMIT = 1000
+
+
+def encode_cursor(offset: int) -> str:
+    raw = json.dumps({"v": catalog.version, "o": offset}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Offset stored in a cursor; 400 when it is malformed or from an older catalog"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        state = json.loads(raw)
+        offset = int(state["o"])
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if state.get("v") != catalog.version or offset < 0:
+        raise HTTPException(status_code=400, detail="Cursor expired, restart from the first page")
+    return offset
+
+
+class PageParams:
+    """Shared limit/cursor/stream query parameters (use with Depends)"""
+    
+    def __init__(
+        self,
+        limit: Optional[int] = Query(None, ge=1, le=MAX_LIMIT, description="Page size (default: everything)"),
+        cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+        stream: bool = Query(False, description="Stream items as NDJSON instead of one JSON body")
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.stream = stream
+
+
+class Page:
+    """One slice of a list plus the cursor of the next slice (None on the last page)"""
+    
+    def __init__(self, items: Sequence[Any], params: PageParams):
+        self.params = params
+        self.paginated = params.limit is not None or params.cursor is not None
+        start = decode_cursor(params.cursor) if params.cursor else 0
+        end = len(items) if params.limit is None else start + params.limit
+        self.items = items[start:end]
+        self.total = len(items)
+        self.next_cursor = encode_cursor(end) if end < len(items) else None
+    
+    def respond(self, field: str, transform: Optional[Callable[[Any], Any]] = None, **extra: Any) -> Any:
+        """JSON body with the page under field (or an NDJSON stream when requested)
+
+        Pagination keys are only added when a page was requested, so plain calls are unchanged.
+        """
+        if self.params.stream:
+            return self._stream(transform)
+        items = [transform(item) for item in self.items] if transform else self.items
+        body = {"success": True, field: items, **extra}
+        if self.paginated:
+            body["total"] = self.total
+            body["next_cursor"] = self.next_cursor
+        return body
+    
+    def _stream(self, transform: Optional[Callable[[Any], Any]]) -> StreamingResponse:
+        # One item per line; the next cursor travels in a header
+        def lines() -> Iterator[bytes]:
+            for item in self.items:
+                yield orjson.dumps(transform(item) if transform else item) + b"\n"
+        headers = {"X-Total-Count": str(self.total)}
+        if self.next_cursor:
+            headers["X-Next-Cursor"] = self.next_cursor
+        return StreamingResponse(lines(), media_type="application/x-ndjson", headers=headers)
@@ -0,0 +1,246 @@
+"""Vectorized premium pricing over every valid enrollment path
+
+Every plan, program, risk type and risk level is the deepest node of exactly one
+state -> policy -> plan -> program -> risk_type -> risk_level path (IDs are unique
+and each entity has one parent), so one row per entity holds the precomputed
+premium components of the path ending there. Parent/child validity is kept in
+boolean adjacency bitmaps so any combination is checked in O(1).
+"""
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+from utils.catalog import catalog, ENROLLMENT_LEVELS
+
+LEVELS = ENROLLMENT_LEVELS
+DEPTHS = LEVELS[2:]
+
+
+class PremiumEngine:
+    """Premium components for every path, stored column-wise in NumPy arrays"""
+    
+    def __init__(self):
+        self.catalog_version = None
+        self._lock = threading.Lock()
+        self.refresh()
+    
+    def refresh(self) -> None:
+        """Rebuild the arrays if the catalog was re-indexed since the last build"""
+        if self.catalog_version == catalog.version:
+            return
+        with self._lock:
+            if self.catalog_version != catalog.version:
+                self._build()
+                self.catalog_version = catalog.version
+    
+    def _build(self) -> None:
+        self.indexes = dict(catalog.enrollment)
+        # Entity ID -> position in its catalog list
+        self.position = {
+            level: {item[index.id_field]: i for i, item in enumerate(index.items)}
+            for level, index in self.indexes.items()
+        }
+        # adjacency[level][parent_pos, child_pos] is True when child belongs to parent
+        self.adjacency = {}
+        for parent, child in zip(LEVELS, LEVELS[1:]):
+            index = self.indexes[child]
+            bitmap = np.zeros((len(self.indexes[parent].items), len(index.items)), dtype=bool)
+            for i, item in enumerate(index.items):
+                parent_pos = self.position[parent].get(item[index.parent_field])
+                if parent_pos is not None:
+                    bitmap[parent_pos, i] = True
+            self.adjacency[child] = bitmap
+        
+        paths: List[Dict[str, int]] = []
+        depths: List[int] = []
+        self.row_of = {level: np.full(len(self.indexes[level].items), -1, dtype=np.int64) for level in DEPTHS}
+        for depth_index, depth in enumerate(DEPTHS):
+            index = self.indexes[depth]
+            parent_level = LEVELS[LEVELS.index(depth) - 1]
+            for i, item in enumerate(index.items):
+                parent_pos = self.position[parent_level].get(item[index.parent_field])
+                if parent_pos is None:
+                    continue
+                if depth == "plan":
+                    path = self._plan_prefix(parent_pos)
+                elif self.row_of[parent_level][parent_pos] >= 0:
+                    path = dict(paths[self.row_of[parent_level][parent_pos]])
+                else:
+                    continue
+                path[depth] = i
+                self.row_of[depth][i] = len(paths)
+                paths.append(path)
+                depths.append(depth_index)
+        
+        # Path membership: columns[level][row] is the entity position at that level, -1 when absent
+        self.columns = {level: np.array([p.get(level, -1) for p in paths], dtype=np.int64) for level in LEVELS}
+        self.depth = np.array(depths, dtype=np.int64)
+        
+        def values(level: str, field: str, default=0):
+            items = self.indexes[level].items
+            raw = [items[p][field] if p >= 0 else default for p in self.columns[level]]
+            return np.asarray(raw) if raw else np.zeros(0)
+        
+        self.base_premium = values("policy", "base_premium")
+        multiplier = values("plan", "premium_multiplier").astype(float)
+        impact = values("risk_type", "premium_impact_percentage").astype(float)
+        self.plan_adjustment = self.base_premium * (multiplier - 1)
+        self.program_cost = values("program", "additional_cost")
+        self.risk_adjustment = self.base_premium * impact / 100 + values("risk_level", "premium_adjustment")
+        self.total_premium = self.base_premium + self.plan_adjustment + self.program_cost + self.risk_adjustment
+        self.row_count = len(paths)
+    
+    def _plan_prefix(self, policy_pos: int) -> Dict[str, int]:
+        policy = catalog.policies.items[policy_pos]
+        return {"state": self.position["state"].get(policy["state_id"], -1), "policy": policy_pos}
+    
+    def is_valid(self, **ids: Optional[str]) -> bool:
+        """True when the given IDs (state=..., policy=..., ...) form a connected path"""
+        previous = None
+        for level in LEVELS:
+            entity_id = ids.get(level)
+            if entity_id is None:
+                break
+            pos = self.position[level].get(entity_id)
+            if pos is None or (previous is not None and not self.adjacency[level][previous, pos]):
+                return False
+            previous = pos
+        return True
+    
+    def row(self, plan_id: str, program_id: Optional[str] = None, risk_type_id: Optional[str] = None,
+            risk_level_id: Optional[str] = None) -> int:
+        """Row of the path ending at the deepest given entity"""
+        for level, entity_id in (("risk_level", risk_level_id), ("risk_type", risk_type_id),
+                                 ("program", program_id), ("plan", plan_id)):
+            if entity_id is not None:
+                return int(self.row_of[level][self.position[level][entity_id]])
+        raise ValueError("plan_id is required")
+    
+    def quote(self, plan_id: str, program_id: Optional[str] = None, risk_type_id: Optional[str] = None,
+              risk_level_id: Optional[str] = None) -> Dict[str, Any]:
+        """Premium breakdown for an already validated path"""
+        self.refresh()
+        return self.components(self.row(plan_id, program_id, risk_type_id, risk_level_id))
+    
+    def components(self, row: int) -> Dict[str, Any]:
+        """Premium breakdown of one row as plain Python numbers"""
+        has_risk = self.columns["risk_type"][row] >= 0
+        return {
+            "base_premium": self.base_premium[row].item(),
+            "plan_adjustment": self.plan_adjustment[row].item(),
+            "program_cost": self.program_cost[row].item(),
+            "risk_adjustment": self.risk_adjustment[row].item() if has_risk else 0,
+            "total_premium": self.total_premium[row].item()
+        }
+    
+    def resolve(self, combination: Dict[str, Optional[str]]) -> Optional[Dict[str, int]]:
+        """Map names or IDs to catalog positions; names are looked up under the resolved parent
+
+        Returns None when a given value is unknown or a level is given without its parent.
+        """
+        positions = {}
+        parent_id = None
+        for level in LEVELS:
+            value = combination.get(level)
+            if value is None:
+                parent_id = None
+                continue
+            if level != "state" and parent_id is None:
+                return None
+            index = self.indexes[level]
+            if value in self.position[level]:
+                item = index.by_id[value]
+            elif parent_id is not None:
+                item = index.by_parent_name.get((parent_id, value))
+            else:
+                item = index.by_name.get(value)
+            if item is None:
+                return None
+            positions[level] = self.position[level][item[index.id_field]]
+            parent_id = item[index.id_field]
+        return positions
+    
+    def rows_for(self, paths: Sequence[Dict[str, Optional[int]]]) -> np.ndarray:
+        """Vectorized validity check and row lookup for positional paths; invalid paths map to -1"""
+        n = len(paths)
+        positions = {level: np.array([p.get(level, -1) for p in paths], dtype=np.int64) for level in LEVELS}
+        # state, policy and plan are required; deeper levels are optional but need their parent
+        valid = (positions["state"] >= 0) & (positions["policy"] >= 0) & (positions["plan"] >= 0)
+        for parent, child in zip(LEVELS, LEVELS[1:]):
+            present = valid & (positions[child] >= 0)
+            linked = np.zeros(n, dtype=bool)
+            has_parent = present & (positions[parent] >= 0)
+            linked[has_parent] = self.adjacency[child][positions[parent][has_parent], positions[child][has_parent]]
+            valid &= ~present | linked
+        
+        rows = np.full(n, -1, dtype=np.int64)
+        for level in DEPTHS:
+            present = valid & (positions[level] >= 0)
+            rows[present] = self.row_of[level][positions[level][present]]
+        return rows
+    
+    def filter_mask(self, rows: np.ndarray, filters: Dict[str, Any]) -> np.ndarray:
+        """Boolean mask over rows for name/ID, category, tier, depth and premium filters"""
+        mask = np.ones(len(rows), dtype=bool)
+        for level in LEVELS:
+            value = filters.get(level)
+            if value is None:
+                continue
+            index = self.indexes[level]
+            matching = [i for i, item in enumerate(index.items)
+                        if item[index.id_field] == value or item[index.name_field] == value]
+            mask &= np.isin(self.columns[level][rows], matching)
+        if filters.get("category") is not None:
+            categories = [i for i, p in enumerate(catalog.policies.items) if p["category"] == filters["category"]]
+            mask &= np.isin(self.columns["policy"][rows], categories)
+        if filters.get("tier") is not None:
+            tiers = [i for i, p in enumerate(catalog.plans.items) if p["tier"] == filters["tier"]]
+            mask &= np.isin(self.columns["plan"][rows], tiers)
+        if filters.get("depth") is not None:
+            mask &= self.depth[rows] == DEPTHS.index(filters["depth"])
+        if filters.get("max_premium") is not None:
+            mask &= self.total_premium[rows] <= filters["max_premium"]
+        return mask
+    
+    def cheapest(self, rows: np.ndarray, top_k: int) -> np.ndarray:
+        """Up to top_k rows with the lowest total premium, cheapest first"""
+        if len(rows) > top_k:
+            rows = rows[np.argpartition(self.total_premium[rows], top_k - 1)[:top_k]]
+        return rows[np.argsort(self.total_premium[rows], kind="stable")]
+    
+    def describe(self, row: int) -> Dict[str, Any]:
+        """IDs, names and premium breakdown of the path stored at row"""
+        path = {}
+        for level in LEVELS:
+            pos = self.columns[level][row]
+            if pos >= 0:
+                index = self.indexes[level]
+                item = index.items[pos]
+                path[level] = {"id": item[index.id_field], "name": item[index.name_field]}
+            else:
+                path[level] = None
+        premium = {name: round(value, 2) for name, value in self.components(row).items()}
+        premium["currency"] = "INR"
+        path["premium"] = premium
+        return path
+    
+    def bulk_quote(self, combinations: Optional[List[Dict[str, Optional[str]]]], filters: Dict[str, Any],
+                   top_k: int) -> Dict[str, Any]:
+        """Price the given combinations (or every path) and return the cheapest top_k matching filters"""
+        self.refresh()
+        invalid = []
+        if combinations is None:
+            rows = np.arange(self.row_count)
+        else:
+            resolved = [self.resolve(c) for c in combinations]
+            rows = self.rows_for([p if p is not None else {} for p in resolved])
+            invalid = np.flatnonzero(rows < 0).tolist()
+            rows = np.unique(rows[rows >= 0])
+        rows = rows[self.filter_mask(rows, filters)]
+        return {
+            "matched": int(len(rows)),
+            "quotes": [self.describe(int(row)) for row in self.cheapest(rows, top_k)],
+            "invalid": invalid
+        }
+
+
+premium_engine = PremiumEngine()
@@ -0,0 +1,136 @@
+"""Incremental JSON record reader for batch uploads
+
+Reads a JSON array or NDJSON from a file object in fixed-size chunks so only
+one record (plus one chunk) is held in memory at a time.
+"""
+import codecs
+import itertools
+import json
+from typing import Any, BinaryIO, Iterator, Optional, Tuple
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+
+Record = Tuple[int, Optional[Any], Optional[str]]
+
+
+def iter_records(stream: BinaryIO, chunk_size: int = 65536,
+                 max_record_size: int = 1024 * 1024) -> Iterator[Record]:
+    """Yield (index, record, error) for each record of a JSON array or NDJSON body
+
+    Exactly one of record/error is set. A malformed NDJSON line only fails that
+    line; a malformed array element ends the array since it cannot be resynced.
+    Records larger than max_record_size characters are rejected instead of buffered.
+    """
+    chunks = _iter_text(stream, chunk_size)
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk
+        if buffer.lstrip(_WHITESPACE):
+            break
+    buffer = buffer.lstrip(_WHITESPACE)
+    if buffer.startswith("["):
+        yield from _iter_array(buffer[1:], chunks, max_record_size)
+    elif buffer:
+        yield from _iter_lines(buffer, chunks, max_record_size)
+
+
+def _iter_text(stream: BinaryIO, chunk_size: int) -> Iterator[str]:
+    # Decode incrementally so multi-byte characters split across chunks survive
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    while True:
+        data = stream.read(chunk_size)
+        if not data:
+            tail = decoder.decode(b"", final=True)
+            if tail:
+                yield tail
+            return
+        yield decoder.decode(data)
+
+
+def _parse_line(index: int, line: str) -> Record:
+    try:
+        return index, json.loads(line), None
+    except ValueError as e:
+        return index, None, f"Invalid JSON: {e}"
+
+
+def _iter_lines(buffer: str, chunks: Iterator[str], max_record_size: int) -> Iterator[Record]:
+    index = 0
+    pending = ""
+    oversized = False
+    for chunk in itertools.chain([buffer], chunks):
+        lines = (pending + chunk).split("\n")
+        pending = lines.pop()
+        for line in lines:
+            if oversized:
+                # Tail of a line that was already rejected
+                oversized = False
+                continue
+            if line.strip():
+                yield _parse_line(index, line)
+                index += 1
+        if len(pending) > max_record_size and not oversized:
+            yield index, None, f"Record exceeds {max_record_size} characters"
+            index += 1
+            oversized = True
+        if oversized:
+            pending = ""
+    if pending.strip() and not oversized:
+        yield _parse_line(index, pending)
+
+
+def _iter_array(buffer: str, chunks: Iterator[str], max_record_size: int) -> Iterator[Record]:
+    index = 0
+    pos = 0
+    exhausted = False
+    expect_value = True
+    
+    def more() -> bool:
+        nonlocal buffer, pos, exhausted
+        try:
+            buffer = buffer[pos:] + next(chunks)
+            pos = 0
+            return True
+        except StopIteration:
+            exhausted = True
+            return False
+    
+    while True:
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+            pos += 1
+        if pos == len(buffer):
+            if exhausted or not more():
+                yield index, None, "Unterminated JSON array"
+                return
+            continue
+        
+        if buffer[pos] == "]":
+            return
+        if not expect_value:
+            if buffer[pos] != ",":
+                yield index, None, f"Expected ',' or ']' but found {buffer[pos]!r}"
+                return
+            pos += 1
+            expect_value = True
+            continue
+        
+        try:
+            record, end = _decoder.raw_decode(buffer, pos)
+        except ValueError as e:
+            # The element may just be split across chunks; only fail once input is exhausted
+            if len(buffer) - pos > max_record_size:
+                yield index, None, f"Record exceeds {max_record_size} characters"
+                return
+            if exhausted or not more():
+                yield index, None, f"Invalid JSON: {e}"
+                return
+            continue
+        if end == len(buffer) and not exhausted and not isinstance(record, (dict, list, str)):
+            # A bare number or literal at the buffer edge may continue in the next chunk
+            if more():
+                continue
+        yield index, record, None
+        index += 1
+        pos = end
+        expect_value = False
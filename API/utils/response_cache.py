@@ -0,0 +1,106 @@
+"""Pre-serialized response bodies for catalog GET endpoints
+
+Catalog responses only change when the catalog is re-indexed, so the first
+successful response for a path + query is kept as bytes and replayed without
+running the endpoint, validation or JSON encoding again. Entries are dropped
+as soon as catalog.version changes. Each body carries a strong ETag (a hash of
+its bytes) and requests whose If-None-Match matches get an empty 304.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from starlette.responses import StreamingResponse
+from utils.catalog import catalog
+
+
+class ResponseCache:
+    """LRU map of (path, query) -> (status, media type, body bytes, ETag) for one catalog version"""
+    
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self.version = catalog.version
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, bytes], Tuple[int, str, bytes, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _check_version(self) -> None:
+        if self.version != catalog.version:
+            self._entries.clear()
+            self.version = catalog.version
+    
+    def get(self, key: Tuple[str, bytes]) -> Optional[Tuple[int, str, bytes, str]]:
+        with self._lock:
+            self._check_version()
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+    
+    def set(self, key: Tuple[str, bytes], entry: Tuple[int, str, bytes, str], version: int) -> None:
+        with self._lock:
+            self._check_version()
+            # Skip bodies rendered against a catalog that was replaced mid-request
+            if version != self.version:
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+response_cache = ResponseCache()
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag (as RFC 9110 requires for GET)"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+class CachedRoute(APIRoute):
+    """Route class that serves repeated GETs from response_cache (pass as route_class)"""
+    
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        if "GET" not in self.methods:
+            return handler
+        
+        async def cached_handler(request: Request) -> Response:
+            key = (request.url.path, request.scope.get("query_string", b""))
+            entry = response_cache.get(key)
+            if entry is None:
+                version = catalog.version
+                response = await handler(request)
+                # Streams are produced lazily and errors are raised, so only complete 200 bodies are kept
+                if response.status_code != 200 or isinstance(response, StreamingResponse):
+                    return response
+                body = bytes(response.body)
+                entry = (response.status_code, response.media_type, body, make_etag(body))
+                response_cache.set(key, entry, version)
+            
+            status_code, media_type, body, etag = entry
+            if etag_matches(request.headers.get("if-none-match"), etag):
+                return Response(status_code=304, headers={"ETag": etag})
+            return Response(content=body, status_code=status_code, media_type=media_type, headers={"ETag": etag})
+        
+        return cached_handler